@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,6 +49,12 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 10,
 }
 
+# Largest ?page_size= accepted by the keyset-paginated threat data lists
+KEYSET_MAX_PAGE_SIZE = 1000
+
+# Most values accepted by one indicator lookup request
+INDICATOR_LOOKUP_MAX_VALUES = 10000
+
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -85,11 +92,45 @@ WSGI_APPLICATION = "sadtime_backend.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.environ.get("SADTIME_DB_PATH", BASE_DIR / "db.sqlite3"),
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Pick a backend with SADTIME_CACHE_BACKEND=locmem|file|redis
+# locmem is per-process: a write only invalidates the writing process's
+# cached analytics, the others expire theirs after ANALYTICS_CACHE_TTL.
+
+CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "sadtime",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / ".cache",
+    },
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("SADTIME_REDIS_URL", "redis://127.0.0.1:6379"),
+    },
+}
+
+CACHES = {
+    "default": CACHE_BACKENDS[os.environ.get("SADTIME_CACHE_BACKEND", "locmem")],
+}
+
+# Seconds an analytics response may be served from cache. Ingest also
+# invalidates cached responses explicitly.
+ANALYTICS_CACHE_TTL = 10
+
+# Seconds between checks of the shared reference-data generation (see
+# threat_models/reference.py) by a process holding an ATT&CK snapshot.
+REFERENCE_DATA_CHECK_INTERVAL = 5
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,48 @@
+"""
+Throwaway database with a large synthetic ThreatEvent fixture, shared by
+the benchmark scripts. Nothing is written to the development database.
+
+Usage (from another script in this directory):
+    from benchmark_fixture import setup_fixture, teardown_fixture
+    old_name = setup_fixture(rows=1_000_000)
+    ...
+    teardown_fixture(old_name)
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sadtime_backend.settings")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import setup_test_environment
+
+from threat_models.synthetic import create_fixture
+
+
+def setup_fixture(rows: int) -> str:
+    """
+    Create a test database holding `rows` events spread over the last year.
+
+    Returns:
+        The original database name, for teardown_fixture
+    """
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ["*"]
+    old_name = connection.creation.create_test_db(verbosity=0)
+
+    started = time.perf_counter()
+    create_fixture(rows)
+    print(f"Fixture: {rows:,} events in {time.perf_counter() - started:.1f}s")
+    return old_name
+
+
+def teardown_fixture(old_name: str):
+    connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -74,3 +74,14 @@ class AttackTechniqueAdmin(admin.ModelAdmin):
 @admin.register(TechniqueUsage)
 class TechniqueUsageAdmin(admin.ModelAdmin):
     list_display = ("id", "event_id", "technique_id")
+
+
+@admin.register(EventRollup)
+class EventRollupAdmin(admin.ModelAdmin):
+    list_display = ("id", "granularity", "dimension", "bucket", "key", "event_count")
+    list_filter = ("granularity", "dimension")
+
+
+@admin.register(IndicatorTypeCount)
+class IndicatorTypeCountAdmin(admin.ModelAdmin):
+    list_display = ("id", "type", "indicator_count")
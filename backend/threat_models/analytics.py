@@ -1,10 +1,27 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Count
+from django.db.models import Case, CharField, F, Sum, Value, When
 from django.utils import timezone
 from datetime import timedelta
 
 from .models import *
+from . import reference
+from .caching import cached_analytics
+from .rollups import day_bucket, hour_bucket
+
+
+def rollup_rows(granularity, dimension, since=None):
+    rows = EventRollup.objects.filter(granularity=granularity, dimension=dimension)
+    if since is not None:
+        rows = rows.filter(bucket__gte=since)
+    return rows
+
+
+def rollup_total(granularity, since=None):
+    total = rollup_rows(granularity, EventRollup.TOTAL, since).aggregate(
+        total=Sum("event_count")
+    )["total"]
+    return total or 0
 
 
 class IndicatorCountsView(APIView):
@@ -13,11 +30,12 @@ class IndicatorCountsView(APIView):
     Returns counts of indicators grouped by type.
     """
 
+    @cached_analytics("indicator-counts")
     def get(self, request):
         counts = (
-            Indicator.objects.values("type")
-            .annotate(count=Count("id"))
+            IndicatorTypeCount.objects.filter(indicator_count__gt=0)
             .order_by("type")
+            .values("type", count=F("indicator_count"))
         )
         return Response({"indicator_counts": list(counts)})
 
@@ -25,41 +43,77 @@ class IndicatorCountsView(APIView):
 class TopTechniquesView(APIView):
     """
     GET /api/analytics/techniques/top/
-    Returns most frequently used ATT&CK techniques.
-    Optional query param: ?limit=10
+    Returns most frequently used ATT&CK techniques and tactics.
+    Optional query params: ?limit=10&days=30 (days omitted = all time)
+
+    Counts events by related_technique, from the technique rollups, rather
+    than TechniqueUsage rows: an event whose technique is missing from the
+    reference data is still counted, under the name "Unknown", and
+    TechniqueUsage rows added or removed by hand do not change the counts.
     """
 
+    @cached_analytics("top-techniques")
     def get(self, request):
         limit = int(request.query_params.get("limit", 10))
+        days = request.query_params.get("days")
+        since = None
+        if days is not None:
+            since = day_bucket(timezone.now() - timedelta(days=int(days)))
+
+        usage = rollup_rows(EventRollup.DAY, EventRollup.TECHNIQUE, since)
+        ref = reference.get_reference_data()
 
-        top_techniques = (
-            TechniqueUsage.objects.values("technique_id")
-            .annotate(count=Count("id"))
-            .order_by("-count")[:limit]
+        counts = (
+            usage.values("key")
+            .annotate(count=Sum("event_count"))
+            .filter(count__gt=0)
+            .order_by("-count", "key")[:limit]
+        )
+        top_techniques = []
+        for item in counts:
+            technique = ref.techniques.get(item["key"])
+            top_techniques.append(
+                {
+                    "technique_id": item["key"],
+                    "name": technique["name"] if technique else "Unknown",
+                    "tactic_id": technique["tactic_id"] if technique else None,
+                    "count": item["count"],
+                }
+            )
+
+        # Map technique ids to tactics in SQL using the cached reference data
+        tactic = Case(
+            *[
+                When(key__in=technique_ids, then=Value(tactic_id))
+                for tactic_id, technique_ids in ref.techniques_by_tactic.items()
+            ],
+            default=None,
+            output_field=CharField(),
+        )
+        top_tactics = (
+            usage.annotate(tactic=tactic)
+            .filter(tactic__isnull=False)
+            .values("tactic")
+            .annotate(count=Sum("event_count"))
+            .filter(count__gt=0)
+            .order_by("-count", "tactic")[:limit]
+            if ref.techniques_by_tactic
+            else []
         )
 
-        result = []
-        for item in top_techniques:
-            try:
-                technique = AttackTechnique.objects.get(id=item["technique_id"])
-                result.append(
-                    {
-                        "technique_id": item["technique_id"],
-                        "name": technique.name,
-                        "tactic_id": technique.tactic_id_id,
-                        "count": item["count"],
-                    }
-                )
-            except AttackTechnique.DoesNotExist:
-                result.append(
+        return Response(
+            {
+                "top_techniques": top_techniques,
+                "top_tactics": [
                     {
-                        "technique_id": item["technique_id"],
-                        "name": "Unknown",
+                        "tactic_id": item["tactic"],
+                        "name": ref.tactics[item["tactic"]]["name"],
                         "count": item["count"],
                     }
-                )
-
-        return Response({"top_techniques": result})
+                    for item in top_tactics
+                ],
+            }
+        )
 
 
 class RecentEventsView(APIView):
@@ -69,6 +123,7 @@ class RecentEventsView(APIView):
     Optional query params: ?limit=20&days=7
     """
 
+    @cached_analytics("recent-events")
     def get(self, request):
         limit = int(request.query_params.get("limit", 20))
         days = int(request.query_params.get("days", 7))
@@ -99,47 +154,54 @@ class RecentEventsView(APIView):
 class EventTimelineView(APIView):
     """
     GET /api/analytics/events/timeline/
-    Returns event counts grouped by day.
+    Returns event counts grouped by day (whole UTC days, read from rollups).
     Optional query param: ?days=30
     """
 
+    @cached_analytics("event-timeline")
     def get(self, request):
         days = int(request.query_params.get("days", 30))
-        cutoff = timezone.now() - timedelta(days=days)
+        cutoff = day_bucket(timezone.now() - timedelta(days=days))
 
-        events = (
-            ThreatEvent.objects.filter(timestamp__gte=cutoff)
-            .extra(select={"day": "date(timestamp)"})
-            .values("day")
-            .annotate(count=Count("id"))
-            .order_by("day")
+        buckets = rollup_rows(EventRollup.DAY, EventRollup.TOTAL, cutoff).order_by(
+            "bucket"
         )
+        timeline = [
+            {"day": row.bucket.date().isoformat(), "count": row.event_count}
+            for row in buckets
+            if row.event_count
+        ]
 
-        return Response({"timeline": list(events)})
+        return Response({"timeline": timeline})
 
 
 class DashboardSummaryView(APIView):
     """
     GET /api/analytics/summary/
     Returns a quick overview for the dashboard.
+    Event counts come from rollups; windows are rounded to the hour.
     """
 
+    @cached_analytics("dashboard-summary")
     def get(self, request):
         now = timezone.now()
-        last_24h = now - timedelta(hours=24)
-        last_7d = now - timedelta(days=7)
+        last_24h = hour_bucket(now - timedelta(hours=24))
+        last_7d = hour_bucket(now - timedelta(days=7))
 
         return Response(
             {
-                "total_events": ThreatEvent.objects.count(),
-                "events_last_24h": ThreatEvent.objects.filter(
-                    timestamp__gte=last_24h
-                ).count(),
-                "events_last_7d": ThreatEvent.objects.filter(
-                    timestamp__gte=last_7d
-                ).count(),
-                "total_indicators": Indicator.objects.count(),
-                "total_techniques_used": TechniqueUsage.objects.values("technique_id")
+                "total_events": rollup_total(EventRollup.DAY),
+                "events_last_24h": rollup_total(EventRollup.HOUR, last_24h),
+                "events_last_7d": rollup_total(EventRollup.HOUR, last_7d),
+                "total_indicators": IndicatorTypeCount.objects.aggregate(
+                    total=Sum("indicator_count")
+                )["total"]
+                or 0,
+                "total_techniques_used": rollup_rows(
+                    EventRollup.DAY, EventRollup.TECHNIQUE
+                )
+                .filter(event_count__gt=0)
+                .values("key")
                 .distinct()
                 .count(),
             }
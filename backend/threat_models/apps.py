@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class ThreatModelsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "threat_models"
+
+    def ready(self):
+        # Registers the signal handlers that invalidate the ATT&CK cache
+        # and the indicator lookup index, and that keep rollups current
+        from . import lookup, reference, rollups  # noqa: F401
@@ -0,0 +1,105 @@
+"""
+Response caching for the analytics endpoints.
+
+Cached responses are keyed by endpoint, query parameters and a generation
+token. Ingest replaces the token, which orphans every cached response at
+once; the TTL bounds staleness for anything the ingest path does not see.
+Responses carry an ETag so unchanged dashboards get 304 Not Modified.
+
+The token lives in the Django cache, so invalidation reaches exactly the
+processes that share it. With the default locmem cache (see CACHES in
+settings) every process has its own token and responses: a write drops
+only the writing process's cache, and the others serve their copies for
+up to ANALYTICS_CACHE_TTL seconds. Use the file or redis backend to
+invalidate across processes.
+"""
+
+import hashlib
+import json
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.cache import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+GENERATION_KEY = "analytics:generation"
+
+
+def read_generation(key: str) -> str:
+    """The generation token stored under `key`, created on first use."""
+    generation = cache.get(key)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        cache.add(key, generation, timeout=None)
+        generation = cache.get(key, generation)
+    return generation
+
+
+def replace_generation(key: str):
+    """Replace the token under `key` once the current transaction commits."""
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, timeout=None))
+
+
+def current_generation() -> str:
+    return read_generation(GENERATION_KEY)
+
+
+def invalidate_analytics():
+    """Drop all cached analytics responses once the current transaction commits."""
+    replace_generation(GENERATION_KEY)
+
+
+def _cache_key(name: str, request) -> str:
+    params = sorted(request.query_params.lists())
+    digest = hashlib.sha1(json.dumps(params).encode()).hexdigest()
+    return f"analytics:{current_generation()}:{name}:{digest}"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header with a response's ETag:
+    "*" matches anything, otherwise one listed tag must equal it with any
+    W/ prefix ignored.
+    """
+    etags = parse_etags(if_none_match)
+    if etags == ["*"]:
+        return True
+    return etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in etags}
+
+
+def cached_analytics(name: str):
+    """
+    Cache a view's GET response and answer If-None-Match with 304.
+    Only 200 responses are cached.
+    """
+
+    def decorator(get):
+        @wraps(get)
+        def wrapper(self, request, *args, **kwargs):
+            ttl = settings.ANALYTICS_CACHE_TTL
+            key = _cache_key(name, request)
+            cached = cache.get(key)
+
+            if cached is None:
+                response = get(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                body = json.dumps(response.data, cls=DjangoJSONEncoder, sort_keys=True)
+                etag = f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+                cached = (response.data, etag)
+                cache.set(key, cached, timeout=ttl)
+
+            data, etag = cached
+            headers = {"ETag": etag, "Cache-Control": f"max-age={ttl}"}
+            if _etag_matches(request.headers.get("If-None-Match", ""), etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            return Response(data, headers=headers)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,92 @@
+"""
+Streaming export of ThreatEvents as NDJSON or CSV.
+
+Rows are read with a server-side iterator and written out in chunks, so
+memory use depends on EXPORT_CHUNK_SIZE, not on how many rows match.
+"""
+
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Rows fetched from the database and written to the response per chunk
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = (
+    "id",
+    "timestamp",
+    "source",
+    "raw_indicator",
+    "indicator_type",
+    "related_technique",
+    "confidence",
+    "metadata_json",
+    "created_at",
+)
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _isoformat(value):
+    # Same representation as the DRF serializers
+    if value is None:
+        return None
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def _rows(queryset):
+    for row in (
+        queryset.order_by("timestamp", "id")
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    ):
+        row = list(row)
+        row[1] = _isoformat(row[1])
+        row[8] = _isoformat(row[8])
+        yield row
+
+
+def _chunked(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_ndjson(queryset):
+    encode = DjangoJSONEncoder(separators=(",", ":")).encode
+    for chunk in _chunked(_rows(queryset)):
+        yield "".join(
+            encode(dict(zip(EXPORT_FIELDS, row))) + "\n" for row in chunk
+        )
+
+
+def iter_csv(queryset):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for chunk in _chunked(_rows(queryset)):
+        for row in chunk:
+            row[7] = json.dumps(row[7]) if row[7] is not None else ""
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+FORMATS = {
+    "ndjson": iter_ndjson,
+    "csv": iter_csv,
+}
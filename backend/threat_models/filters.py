@@ -0,0 +1,94 @@
+"""
+Query-parameter filters for the threat data APIs, shared by the list
+endpoints and the export endpoint.
+
+ThreatEvent params:
+    ?since=<ISO datetime>&until=<ISO datetime>   timestamp >= since, < until
+    ?source=<name>
+    ?indicator_type=ip|domain|url|hash
+    ?technique=<technique id>
+    ?tactic=<tactic id>          events whose technique belongs to the tactic
+    ?min_confidence=<0-100>
+    ?campaign=<name>&region=<name>   metadata_json keys
+
+Indicator params:
+    ?type=ip|domain|url|hash
+    ?value=<exact value>
+
+Each equality filter has a (column, timestamp) index on ThreatEvent, so
+filtered pages are read in timestamp order straight from an index.
+"""
+
+from datetime import timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from . import reference
+from .models import MetadataKey
+
+
+def parse_timestamp(name: str, value: str):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValidationError({name: "Expected an ISO 8601 datetime"})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def parse_int(name: str, value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "Expected an integer"})
+
+
+def filter_events(queryset, params):
+    """Narrow a ThreatEvent queryset by the request's query params."""
+    if "since" in params:
+        queryset = queryset.filter(timestamp__gte=parse_timestamp("since", params["since"]))
+    if "until" in params:
+        queryset = queryset.filter(timestamp__lt=parse_timestamp("until", params["until"]))
+    if "source" in params:
+        queryset = queryset.filter(source=params["source"])
+    if "indicator_type" in params:
+        queryset = queryset.filter(indicator_type=params["indicator_type"])
+    if "technique" in params:
+        queryset = queryset.filter(related_technique=params["technique"])
+    if "tactic" in params:
+        # Resolved through the reference cache instead of joining AttackTechnique
+        queryset = queryset.filter(
+            related_technique__in=reference.techniques_for_tactic(params["tactic"])
+        )
+    if "min_confidence" in params:
+        queryset = queryset.filter(
+            confidence__gte=parse_int("min_confidence", params["min_confidence"])
+        )
+    for key in ("campaign", "region"):
+        if key in params:
+            queryset = queryset.alias(
+                **{key: MetadataKey("metadata_json", key=key)}
+            ).filter(**{key: params[key]})
+    return queryset
+
+
+def filter_indicators(queryset, params):
+    """Narrow an Indicator queryset by the request's query params."""
+    if "type" in params:
+        queryset = queryset.filter(type=params["type"])
+    if "value" in params:
+        queryset = queryset.filter(value=params["value"])
+    return queryset
+
+
+class ThreatEventFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        return filter_events(queryset, request.query_params)
+
+
+class IndicatorFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        return filter_indicators(queryset, request.query_params)
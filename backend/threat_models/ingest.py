@@ -0,0 +1,142 @@
+"""
+Ingest pipeline for ThreatEvents.
+
+Events are stored with one bulk insert and then run through the
+post-insert stages as a batch:
+- enrichment: upsert Indicators by (value, type), counting new ones in
+  IndicatorTypeCount, link them with EventIndicatorMap rows and create
+  TechniqueUsage rows for techniques known to the reference-data cache
+- rollups: update EventRollup counts
+- cache: invalidate cached analytics responses
+
+Each stage costs a fixed number of queries per batch, independent of how
+many events or links the batch contains.
+"""
+
+from collections import Counter
+
+from django.db import connection, transaction
+
+from . import lookup, reference
+from .normalize import indicator_key
+from .caching import invalidate_analytics
+from .models import (
+    EventIndicatorMap,
+    Indicator,
+    TechniqueUsage,
+    ThreatEvent,
+)
+from .rollups import record_events, record_indicators
+
+INDICATOR_UPSERT_SQL = """
+    INSERT INTO {table} (value, type, first_seen, last_seen, event_count, value_key)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (value, type) DO UPDATE SET
+        event_count = COALESCE({table}.event_count, 0) + excluded.event_count,
+        last_seen = CASE WHEN excluded.last_seen > {table}.last_seen
+                         THEN excluded.last_seen ELSE {table}.last_seen END
+"""
+
+
+def upsert_indicators(events) -> dict[tuple[str, str], int]:
+    """
+    Create or update one Indicator per distinct (value, type) in events.
+    Values are expected to be normalized already (see serializers).
+
+    Returns:
+        Mapping of (value, type) to Indicator id
+    """
+    seen = {}
+    for event in events:
+        if not event.raw_indicator:
+            continue
+        key = (event.raw_indicator, event.indicator_type)
+        first, last, count = seen.get(key, (event.timestamp, event.timestamp, 0))
+        seen[key] = (
+            min(first, event.timestamp),
+            max(last, event.timestamp),
+            count + 1,
+        )
+
+    if not seen:
+        return {}
+
+    # Rows that exist already; the rest are new and add to the type counts.
+    # Read under the write lock ingest_events already holds.
+    keys = {indicator_key(value) for value, _ in seen}
+    existing = set(
+        Indicator.objects.filter(value_key__in=keys).values_list("value", "type")
+    )
+    new_types = Counter(
+        ind_type for value, ind_type in seen if (value, ind_type) not in existing
+    )
+
+    adapt = connection.ops.adapt_datetimefield_value
+    sql = INDICATOR_UPSERT_SQL.format(
+        table=connection.ops.quote_name(Indicator._meta.db_table)
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            sql,
+            [
+                (value, ind_type, adapt(first), adapt(last), count, indicator_key(value))
+                for (value, ind_type), (first, last, count) in seen.items()
+            ],
+        )
+
+    record_indicators(new_types)
+    if new_types["ip"]:
+        lookup.invalidate()
+
+    rows = Indicator.objects.filter(value_key__in=keys).values_list("id", "value", "type")
+    return {
+        (value, ind_type): pk
+        for pk, value, ind_type in rows
+        if (value, ind_type) in seen
+    }
+
+
+def enrich_events(events):
+    """Create indicator links and technique usages for stored events."""
+    indicator_ids = upsert_indicators(events)
+    techniques = reference.technique_ids()
+
+    maps = []
+    usages = []
+    for event in events:
+        indicator_id = indicator_ids.get((event.raw_indicator, event.indicator_type))
+        if indicator_id is not None:
+            maps.append(
+                EventIndicatorMap(event_id=event, indicator_id_id=indicator_id)
+            )
+        if event.related_technique in techniques:
+            usages.append(
+                TechniqueUsage(event_id=event, technique_id_id=event.related_technique)
+            )
+
+    EventIndicatorMap.objects.bulk_create(maps)
+    TechniqueUsage.objects.bulk_create(usages)
+
+
+def process_ingested(events):
+    """Run the post-insert stages for events that are already stored."""
+    enrich_events(events)
+    record_events(events)
+    invalidate_analytics()
+
+
+def ingest_events(events: list[ThreatEvent]) -> list[ThreatEvent]:
+    """
+    Store new events and run them through the pipeline in one transaction.
+
+    Returns:
+        The created events, with primary keys set
+    """
+    # bulk_create skips ThreatEvent.save(), which sets the key
+    for event in events:
+        event.indicator_key = indicator_key(event.raw_indicator)
+
+    with transaction.atomic():
+        created = ThreatEvent.objects.bulk_create(events)
+        process_ingested(created)
+    return created
@@ -0,0 +1,237 @@
+"""
+Indicator lookup: "have we seen this value?" for many values at once.
+
+Each queried value is matched three ways:
+- exact: equality on the normalized value, compared through the indexed
+  64-bit Indicator.value_key
+- domain_suffix: indicators of type "domain" that are a parent domain of
+  the queried domain (sub.evil.com matches evil.com)
+- cidr: for IP indicators, containment in either direction between the
+  queried address/network and stored addresses/networks
+
+CIDR matching runs against an in-process IpIndex: one sorted list of
+network integers per (IP version, prefix length). A query checks the
+enclosing network at each stored prefix length with a bisect, and the
+range of networks inside the query with two bisects, so its cost depends
+on the number of distinct prefix lengths, not on the number of IPs.
+
+The index is tagged with a generation token from the Django cache (see
+caching.read_generation). Ingest of new IP indicators and any Indicator
+save or delete replace the token on commit, and the next lookup rebuilds
+the index from the committed rows, in whatever order their ids were
+assigned. With the default locmem cache the token is per-process.
+"""
+
+import bisect
+import ipaddress
+import threading
+from typing import Optional
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import read_generation, replace_generation
+from .models import Indicator
+from .normalize import indicator_key, normalize_indicator
+
+# IN (...) lists are split to stay well under SQLite's variable limit
+LOOKUP_CHUNK_SIZE = 500
+
+EXACT = "exact"
+DOMAIN_SUFFIX = "domain_suffix"
+CIDR = "cidr"
+
+GENERATION_KEY = "lookup:ip-generation"
+
+
+def parse_network(value: str):
+    try:
+        return ipaddress.ip_network(value.strip(), strict=False)
+    except ValueError:
+        return None
+
+
+def canonical(value: str) -> str:
+    """Normalize a lookup value whose indicator type is not given."""
+    value = value.strip()
+    if "://" in value:
+        guesses = ("url",)
+    elif "." in value or ":" in value:
+        guesses = ("ip", "domain")
+    else:
+        guesses = ("hash",)
+    for indicator_type in guesses:
+        try:
+            return normalize_indicator(value, indicator_type)
+        except ValueError:
+            pass
+    return value
+
+
+def parent_domains(domain: str) -> list[str]:
+    """sub.evil.com -> [evil.com]; bare TLDs are never returned."""
+    labels = domain.split(".")
+    return [".".join(labels[i:]) for i in range(1, len(labels) - 1)]
+
+
+class IpIndex:
+    """Sorted per-prefix-length arrays of IP indicator networks."""
+
+    def __init__(self, generation: str):
+        # (version, prefixlen) -> (sorted network ints, matching indicator ids)
+        self.buckets: dict[tuple[int, int], tuple[list[int], list[int]]] = {}
+        self.generation = generation
+
+        pairs: dict[tuple[int, int], list[tuple[int, int]]] = {}
+        for pk, value in (
+            Indicator.objects.filter(type="ip")
+            .values_list("id", "value")
+            .iterator(chunk_size=LOOKUP_CHUNK_SIZE)
+        ):
+            network = parse_network(value)
+            if network is not None:
+                key = (network.version, network.prefixlen)
+                pairs.setdefault(key, []).append((int(network.network_address), pk))
+
+        for key, bucket in pairs.items():
+            bucket.sort()
+            self.buckets[key] = ([n for n, _ in bucket], [i for _, i in bucket])
+
+    def match(self, network) -> list[int]:
+        """Ids of stored networks that contain, equal or fall inside `network`."""
+        bits = network.max_prefixlen
+        start = int(network.network_address)
+        end = int(network.broadcast_address)
+        found = []
+
+        for (version, prefixlen), (nets, ids) in self.buckets.items():
+            if version != network.version:
+                continue
+            if prefixlen <= network.prefixlen:
+                # Stored network of this size that encloses the query
+                shift = bits - prefixlen
+                enclosing = start >> shift << shift
+                lo = bisect.bisect_left(nets, enclosing)
+                hi = bisect.bisect_right(nets, enclosing, lo)
+            else:
+                # Stored networks inside the query range
+                lo = bisect.bisect_left(nets, start)
+                hi = bisect.bisect_right(nets, end, lo)
+            found.extend(ids[lo:hi])
+        return found
+
+
+_lock = threading.Lock()
+_ip_index: Optional[IpIndex] = None
+
+
+def get_ip_index() -> IpIndex:
+    """The IP index for the current generation, rebuilt if it changed."""
+    global _ip_index
+    # Read the token before the rows, so a concurrent write at worst
+    # costs one extra rebuild
+    generation = read_generation(GENERATION_KEY)
+    with _lock:
+        if _ip_index is None or _ip_index.generation != generation:
+            _ip_index = IpIndex(generation)
+        return _ip_index
+
+
+def invalidate():
+    """
+    Drop the IP index in this process now, and in every process sharing
+    the cache once the current transaction commits.
+    """
+    global _ip_index
+    with _lock:
+        _ip_index = None
+    replace_generation(GENERATION_KEY)
+
+
+@receiver(post_save, sender=Indicator)
+def _invalidate_on_save(sender, instance, created, **kwargs):
+    # Edits can change a value or type in place
+    if not created or instance.type == "ip":
+        invalidate()
+
+
+@receiver(post_delete, sender=Indicator)
+def _invalidate_on_delete(sender, **kwargs):
+    invalidate()
+
+
+def _exact_rows(values) -> list[dict]:
+    keys = list({indicator_key(value) for value in values})
+    rows = []
+    for i in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        rows.extend(
+            Indicator.objects.filter(value_key__in=keys[i : i + LOOKUP_CHUNK_SIZE]).values(
+                "id", "value", "type", "first_seen", "last_seen", "event_count"
+            )
+        )
+    return rows
+
+
+def _rows_by_id(ids) -> dict[int, dict]:
+    ids = list(ids)
+    rows = {}
+    for i in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+        for row in Indicator.objects.filter(id__in=ids[i : i + LOOKUP_CHUNK_SIZE]).values(
+            "id", "value", "type", "first_seen", "last_seen", "event_count"
+        ):
+            rows[row["id"]] = row
+    return rows
+
+
+def lookup_indicators(values: list[str]) -> list[dict]:
+    """
+    Match each value against known indicators.
+
+    Returns:
+        One {"query", "matches"} entry per value, in input order. Each match
+        is an Indicator row plus a "match" key (exact, domain_suffix, cidr).
+    """
+    queries = [canonical(value) for value in values]
+    networks = {query: parse_network(query) for query in queries}
+    parents = {
+        query: parent_domains(query)
+        for query in queries
+        if networks[query] is None and "." in query and "/" not in query
+    }
+
+    candidates = set(queries)
+    for domains in parents.values():
+        candidates.update(domains)
+    by_value: dict[str, list[dict]] = {}
+    for row in _exact_rows(candidates):
+        by_value.setdefault(row["value"], []).append(row)
+
+    cidr_ids = {}
+    if any(networks.values()):
+        index = get_ip_index()
+        for query, network in networks.items():
+            if network is not None:
+                cidr_ids[query] = index.match(network)
+    cidr_rows = _rows_by_id({pk for ids in cidr_ids.values() for pk in ids})
+
+    results = []
+    for value, query in zip(values, queries):
+        matches = []
+        seen = set()
+
+        def add(row, kind):
+            if row["id"] not in seen:
+                seen.add(row["id"])
+                matches.append({**row, "match": kind})
+
+        for row in by_value.get(query, []):
+            add(row, EXACT)
+        for domain in parents.get(query, []):
+            for row in by_value.get(domain, []):
+                if row["type"] == "domain":
+                    add(row, DOMAIN_SUFFIX)
+        for pk in cidr_ids.get(query, []):
+            if pk in cidr_rows:
+                add(cidr_rows[pk], CIDR)
+        results.append({"query": value, "matches": matches})
+    return results
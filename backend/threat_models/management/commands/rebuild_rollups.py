@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from threat_models.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute EventRollup rows from all stored ThreatEvents."
+
+    def handle(self, *args, **options):
+        written = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup rows"))
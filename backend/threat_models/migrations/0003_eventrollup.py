@@ -0,0 +1,81 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:33
+
+from collections import Counter
+from datetime import timezone as dt_timezone
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+def fill_rollups(apps, schema_editor):
+    """
+    Roll up the events already stored, as rollups.rebuild_rollups() does
+    (frozen here): hour and day buckets for the total, source, indicator
+    type and related technique dimensions.
+    """
+    ThreatEvent = apps.get_model("threat_models", "ThreatEvent")
+    EventRollup = apps.get_model("threat_models", "EventRollup")
+
+    hourly = ThreatEvent.objects.annotate(
+        hour=TruncHour("timestamp", tzinfo=dt_timezone.utc)
+    )
+    counts = Counter()
+    for row in hourly.values("hour").annotate(count=Count("id")).order_by():
+        counts[("total", row["hour"], "")] += row["count"]
+    for dimension, field in (
+        ("source", "source"),
+        ("indicator_type", "indicator_type"),
+        ("technique", "related_technique"),
+    ):
+        events = hourly
+        if dimension == "technique":
+            events = hourly.exclude(related_technique__isnull=True).exclude(
+                related_technique=""
+            )
+        rows = events.values("hour", field).annotate(count=Count("id")).order_by()
+        for row in rows:
+            counts[(dimension, row["hour"], row[field] or "")] += row["count"]
+
+    daily = Counter()
+    for (dimension, hour, key), count in counts.items():
+        daily[(dimension, hour.replace(hour=0), key)] += count
+    EventRollup.objects.bulk_create(
+        (
+            EventRollup(
+                granularity=granularity,
+                dimension=dimension,
+                bucket=bucket,
+                key=key,
+                event_count=count,
+            )
+            for granularity, buckets in (("hour", counts), ("day", daily))
+            for (dimension, bucket, key), count in buckets.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threat_models', '0002_rename_attacktactics_attacktactic_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(max_length=10)),
+                ('dimension', models.CharField(max_length=20)),
+                ('bucket', models.DateTimeField()),
+                ('key', models.CharField(blank=True, default='', max_length=255)),
+                ('event_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'dimension', 'bucket', 'key'), name='unique_event_rollup_bucket')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
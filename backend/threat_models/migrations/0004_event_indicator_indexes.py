@@ -0,0 +1,71 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:33
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+
+def merge_duplicate_indicators(apps, schema_editor):
+    """
+    Collapse indicators sharing (value, type) onto the oldest row so the
+    unique constraint can be added to an existing database.
+    """
+    Indicator = apps.get_model("threat_models", "Indicator")
+    EventIndicatorMap = apps.get_model("threat_models", "EventIndicatorMap")
+
+    duplicates = (
+        Indicator.objects.values("value", "type")
+        .annotate(
+            rows=Count("id"),
+            keep_id=Min("id"),
+            first=Min("first_seen"),
+            last=Max("last_seen"),
+            events=Sum("event_count"),
+        )
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates:
+        others = Indicator.objects.filter(value=dup["value"], type=dup["type"]).exclude(
+            id=dup["keep_id"]
+        )
+        EventIndicatorMap.objects.filter(indicator_id__in=others).update(
+            indicator_id=dup["keep_id"]
+        )
+        others.delete()
+        Indicator.objects.filter(id=dup["keep_id"]).update(
+            first_seen=dup["first"], last_seen=dup["last"], event_count=dup["events"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threat_models', '0003_eventrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='indicator',
+            index=models.Index(fields=['type'], name='indicator_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='threatevent',
+            index=models.Index(fields=['timestamp'], name='event_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='threatevent',
+            index=models.Index(fields=['source', 'timestamp'], name='event_source_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='threatevent',
+            index=models.Index(fields=['indicator_type', 'timestamp'], name='event_ind_type_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='threatevent',
+            index=models.Index(fields=['related_technique', 'timestamp'], name='event_technique_ts_idx'),
+        ),
+        migrations.RunPython(merge_duplicate_indicators, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='indicator',
+            constraint=models.UniqueConstraint(fields=('value', 'type'), name='unique_indicator_value_type'),
+        ),
+    ]
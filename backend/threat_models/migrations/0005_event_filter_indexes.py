@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:47
+
+import threat_models.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threat_models', '0004_event_indicator_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='threatevent',
+            index=models.Index(fields=['confidence'], name='event_confidence_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='threatevent',
+            index=models.Index(threat_models.models.MetadataKey('metadata_json', key='campaign'), models.F('timestamp'), name='event_campaign_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='threatevent',
+            index=models.Index(threat_models.models.MetadataKey('metadata_json', key='region'), models.F('timestamp'), name='event_region_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,196 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:51
+
+import hashlib
+import ipaddress
+from urllib.parse import urlsplit, urlunsplit
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+# Frozen copy of threat_models.normalize at this migration
+
+HASH_LENGTHS = {32, 40, 64, 128}
+HEX_DIGITS = frozenset("0123456789abcdef")
+DEFAULT_PORTS = {"http": 80, "https": 443, "ftp": 21}
+
+
+def normalize_ip(value):
+    if "/" in value:
+        return str(ipaddress.ip_network(value, strict=False))
+    return str(ipaddress.ip_address(value))
+
+
+def normalize_domain(value):
+    domain = value.rstrip(".").lower()
+    if not domain:
+        raise ValueError("empty domain")
+    try:
+        return domain.encode("idna").decode("ascii")
+    except UnicodeError as e:
+        raise ValueError(f"invalid domain {value!r}: {e}") from None
+
+
+def normalize_url(value):
+    parts = urlsplit(value)
+    if not parts.scheme or not parts.hostname:
+        raise ValueError(f"invalid URL {value!r}")
+
+    scheme = parts.scheme.lower()
+    host = parts.hostname
+    try:
+        host = normalize_ip(host)
+        if ":" in host:
+            host = f"[{host}]"
+    except ValueError:
+        host = normalize_domain(host)
+
+    netloc = host
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username
+        if parts.password:
+            userinfo = f"{userinfo}:{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def normalize_hash(value):
+    digest = value.lower()
+    if len(digest) not in HASH_LENGTHS or not HEX_DIGITS.issuperset(digest):
+        raise ValueError(f"invalid hash {value!r}: expected 32/40/64/128 hex digits")
+    return digest
+
+
+NORMALIZERS = {
+    "ip": normalize_ip,
+    "domain": normalize_domain,
+    "url": normalize_url,
+    "hash": normalize_hash,
+}
+
+
+def normalize_indicator(value, indicator_type):
+    value = value.strip()
+    normalizer = NORMALIZERS.get(indicator_type)
+    return normalizer(value) if normalizer else value
+
+
+def indicator_key(value):
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def canonical(value, indicator_type):
+    """The normalized value, or the stored one if it is not valid for its type."""
+    try:
+        return normalize_indicator(value, indicator_type)
+    except ValueError:
+        return value
+
+
+def rewrite(Model, value_field, key_field, type_field):
+    """Store the canonical value and its key on every row, in batches."""
+    batch = []
+    rows = Model.objects.only("id", value_field, type_field).iterator(chunk_size=2000)
+    for row in rows:
+        value = canonical(getattr(row, value_field), getattr(row, type_field))
+        setattr(row, value_field, value)
+        setattr(row, key_field, indicator_key(value))
+        batch.append(row)
+        if len(batch) == 2000:
+            Model.objects.bulk_update(batch, [value_field, key_field])
+            batch = []
+    Model.objects.bulk_update(batch, [value_field, key_field])
+
+
+def merge_duplicate_indicators(Indicator, EventIndicatorMap):
+    """
+    Collapse indicators whose values normalize to the same canonical value
+    onto the oldest row, as 0004 does for exact duplicates.
+    """
+    # Key every row by its canonical value first; the values themselves
+    # can only be rewritten once no two rows would collide
+    batch = []
+    for row in Indicator.objects.only("id", "value", "type").iterator(chunk_size=2000):
+        row.value_key = indicator_key(canonical(row.value, row.type))
+        batch.append(row)
+        if len(batch) == 2000:
+            Indicator.objects.bulk_update(batch, ["value_key"])
+            batch = []
+    Indicator.objects.bulk_update(batch, ["value_key"])
+
+    keyed = (
+        Indicator.objects.values("value_key", "type")
+        .annotate(rows=Count("id"))
+        .filter(rows__gt=1)
+    )
+    for dup in keyed:
+        same_key = Indicator.objects.filter(value_key=dup["value_key"], type=dup["type"])
+        groups = {}
+        for row in same_key.only("id", "value", "type"):
+            groups.setdefault(canonical(row.value, row.type), []).append(row.id)
+        for ids in groups.values():
+            if len(ids) < 2:
+                continue
+            group = Indicator.objects.filter(id__in=ids).aggregate(
+                keep_id=Min("id"),
+                first=Min("first_seen"),
+                last=Max("last_seen"),
+                events=Sum("event_count"),
+            )
+            others = Indicator.objects.filter(id__in=ids).exclude(id=group["keep_id"])
+            EventIndicatorMap.objects.filter(indicator_id__in=others).update(
+                indicator_id=group["keep_id"]
+            )
+            others.delete()
+            Indicator.objects.filter(id=group["keep_id"]).update(
+                first_seen=group["first"],
+                last_seen=group["last"],
+                event_count=group["events"],
+            )
+
+
+def backfill_keys(apps, schema_editor):
+    """
+    Normalize the values stored before normalization was introduced, merge
+    the indicators that become duplicates, and key every row. Values that
+    are not valid for their type are kept as stored.
+    """
+    Indicator = apps.get_model("threat_models", "Indicator")
+    EventIndicatorMap = apps.get_model("threat_models", "EventIndicatorMap")
+    ThreatEvent = apps.get_model("threat_models", "ThreatEvent")
+
+    merge_duplicate_indicators(Indicator, EventIndicatorMap)
+    rewrite(Indicator, "value", "value_key", "type")
+    rewrite(ThreatEvent, "raw_indicator", "indicator_key", "indicator_type")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threat_models', '0005_event_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indicator',
+            name='value_key',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='threatevent',
+            name='indicator_key',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='indicator',
+            index=models.Index(fields=['value_key'], name='indicator_value_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='threatevent',
+            index=models.Index(fields=['indicator_key'], name='event_indicator_key_idx'),
+        ),
+        migrations.RunPython(backfill_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:26
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_indicators(apps, schema_editor):
+    Indicator = apps.get_model("threat_models", "Indicator")
+    IndicatorTypeCount = apps.get_model("threat_models", "IndicatorTypeCount")
+    IndicatorTypeCount.objects.bulk_create(
+        IndicatorTypeCount(type=row["type"], indicator_count=row["count"])
+        for row in Indicator.objects.values("type").annotate(count=Count("id")).order_by()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threat_models', '0006_indicator_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndicatorTypeCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(max_length=50, unique=True)),
+                ('indicator_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_indicators, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,30 @@
 from django.db import models
 
+from .normalize import indicator_key
+
+
+class MetadataKey(models.Func):
+    """
+    Text value of a top-level metadata_json key, e.g.
+    MetadataKey("metadata_json", key="campaign").
+
+    The JSON path is written into the SQL rather than bound as a parameter,
+    so the expression matches the expression indexes on ThreatEvent.
+    `key` must be a constant identifier, never user input.
+    """
+
+    function = "JSON_EXTRACT"
+    template = "%(function)s(%(expressions)s, '$.%(key)s')"
+    output_field = models.CharField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="(%(expressions)s ->> '%(key)s')",
+            **extra_context,
+        )
+
 
 class ThreatEvent(models.Model):
     timestamp = models.DateTimeField()  # When the event occurred
@@ -22,6 +47,37 @@ class ThreatEvent(models.Model):
         default=dict
     )  # Any extra info, like campaign name, region, etc.
     created_at = models.DateTimeField(auto_now_add=True)  # When the event was recorded
+    indicator_key = models.BigIntegerField(
+        null=True, blank=True, editable=False
+    )  # 64-bit key of raw_indicator, matches Indicator.value_key
+
+    def save(self, *args, **kwargs):
+        self.indicator_key = indicator_key(self.raw_indicator)
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["timestamp"], name="event_timestamp_idx"),
+            models.Index(fields=["indicator_key"], name="event_indicator_key_idx"),
+            models.Index(fields=["source", "timestamp"], name="event_source_ts_idx"),
+            models.Index(
+                fields=["indicator_type", "timestamp"], name="event_ind_type_ts_idx"
+            ),
+            models.Index(
+                fields=["related_technique", "timestamp"], name="event_technique_ts_idx"
+            ),
+            models.Index(fields=["confidence"], name="event_confidence_idx"),
+            models.Index(
+                MetadataKey("metadata_json", key="campaign"),
+                "timestamp",
+                name="event_campaign_ts_idx",
+            ),
+            models.Index(
+                MetadataKey("metadata_json", key="region"),
+                "timestamp",
+                name="event_region_ts_idx",
+            ),
+        ]
 
 
 class Indicator(models.Model):
@@ -36,6 +92,24 @@ class Indicator(models.Model):
     event_count = models.IntegerField(
         null=True, blank=True
     )  # How many events reference this indicator
+    value_key = models.BigIntegerField(
+        null=True, blank=True, editable=False
+    )  # 64-bit key of value, see normalize.indicator_key
+
+    def save(self, *args, **kwargs):
+        self.value_key = indicator_key(self.value)
+        super().save(*args, **kwargs)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["value", "type"], name="unique_indicator_value_type"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["type"], name="indicator_type_idx"),
+            models.Index(fields=["value_key"], name="indicator_value_key_idx"),
+        ]
 
 
 class EventIndicatorMap(models.Model):
@@ -67,3 +141,46 @@ class AttackTactic(models.Model):
 class TechniqueUsage(models.Model):
     event_id = models.ForeignKey("ThreatEvent", on_delete=models.CASCADE)
     technique_id = models.ForeignKey("AttackTechnique", on_delete=models.CASCADE)
+
+
+class EventRollup(models.Model):
+    """
+    Pre-aggregated ThreatEvent counts, maintained on ingest so analytics
+    read a bounded number of rows no matter how many events are stored.
+    """
+
+    HOUR = "hour"
+    DAY = "day"
+
+    TOTAL = "total"
+    SOURCE = "source"
+    INDICATOR_TYPE = "indicator_type"
+    TECHNIQUE = "technique"
+
+    granularity = models.CharField(max_length=10)  # "hour" or "day"
+    dimension = models.CharField(
+        max_length=20
+    )  # What is counted: total, source, indicator_type, technique
+    bucket = models.DateTimeField()  # Start of the hour/day (UTC)
+    key = models.CharField(
+        max_length=255, blank=True, default=""
+    )  # Dimension value (e.g. "honeypot", "ip", "T1059"); empty for total
+    event_count = models.IntegerField(default=0)  # Events in this bucket
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["granularity", "dimension", "bucket", "key"],
+                name="unique_event_rollup_bucket",
+            )
+        ]
+
+
+class IndicatorTypeCount(models.Model):
+    """
+    Number of Indicator rows per type, maintained on every write (see
+    rollups.py) so analytics never count the Indicator table.
+    """
+
+    type = models.CharField(max_length=50, unique=True)  # Indicator type
+    indicator_count = models.IntegerField(default=0)  # Indicators of this type
@@ -0,0 +1,101 @@
+"""
+Indicator normalization and canonical keys.
+
+The same value can arrive in many spellings (" 10.0.0.1", "EVIL.com",
+"evil.com."). normalize_indicator() maps each spelling to one canonical
+form and indicator_key() reduces that form to a signed 64-bit integer, which
+is stored and indexed next to the value so dedup and joins compare
+integers instead of strings.
+
+This module has no Django imports and is kept in sync with
+services/normalize.py, which the consumer applies before posting events;
+both are tested against the cases in normalize_cases.json.
+"""
+
+import hashlib
+import ipaddress
+from urllib.parse import urlsplit, urlunsplit
+
+# Hex digest lengths accepted for hash indicators (MD5, SHA-1, SHA-256, SHA-512)
+HASH_LENGTHS = {32, 40, 64, 128}
+HEX_DIGITS = frozenset("0123456789abcdef")
+
+DEFAULT_PORTS = {"http": 80, "https": 443, "ftp": 21}
+
+
+def normalize_ip(value: str) -> str:
+    """Canonical address or network text ("2001:DB8::0:1" -> "2001:db8::1")."""
+    if "/" in value:
+        return str(ipaddress.ip_network(value, strict=False))
+    return str(ipaddress.ip_address(value))
+
+
+def normalize_domain(value: str) -> str:
+    """Lowercase, no trailing dot, internationalized labels in IDNA (punycode) form."""
+    domain = value.rstrip(".").lower()
+    if not domain:
+        raise ValueError("empty domain")
+    try:
+        return domain.encode("idna").decode("ascii")
+    except UnicodeError as e:
+        raise ValueError(f"invalid domain {value!r}: {e}") from None
+
+
+def normalize_url(value: str) -> str:
+    """Lowercase scheme and host, IDNA host, no default port or fragment, "/" for an empty path."""
+    parts = urlsplit(value)
+    if not parts.scheme or not parts.hostname:
+        raise ValueError(f"invalid URL {value!r}")
+
+    scheme = parts.scheme.lower()
+    host = parts.hostname
+    try:
+        host = normalize_ip(host)
+        if ":" in host:
+            host = f"[{host}]"
+    except ValueError:
+        host = normalize_domain(host)
+
+    netloc = host
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username
+        if parts.password:
+            userinfo = f"{userinfo}:{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def normalize_hash(value: str) -> str:
+    digest = value.lower()
+    if len(digest) not in HASH_LENGTHS or not HEX_DIGITS.issuperset(digest):
+        raise ValueError(f"invalid hash {value!r}: expected 32/40/64/128 hex digits")
+    return digest
+
+
+NORMALIZERS = {
+    "ip": normalize_ip,
+    "domain": normalize_domain,
+    "url": normalize_url,
+    "hash": normalize_hash,
+}
+
+
+def normalize_indicator(value: str, indicator_type: str) -> str:
+    """
+    Canonical form of an indicator value. Unknown types are only stripped.
+
+    Raises:
+        ValueError if the value is not valid for its type
+    """
+    value = value.strip()
+    normalizer = NORMALIZERS.get(indicator_type)
+    return normalizer(value) if normalizer else value
+
+
+def indicator_key(value: str) -> int:
+    """Signed 64-bit blake2b key of an (already normalized) indicator value."""
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
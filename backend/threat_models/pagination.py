@@ -0,0 +1,129 @@
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder without its millisecond rounding: a cursor truncated
+    below the stored value would skip the rows in between.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination, newest first.
+
+    The view sets `keyset_ordering`, a tuple of fields that together are
+    unique, e.g. ("timestamp", "id"). Each page is fetched with
+    WHERE (fields) < (last row of previous page) ORDER BY fields DESC
+    LIMIT n, so deep pages cost the same as the first one. The total count
+    is only computed when the client asks for it with ?count=true.
+
+    Query params: ?cursor=<opaque>&page_size=N&count=true
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fields = tuple(getattr(view, "keyset_ordering", ("id",)))
+        self.page_size = self.get_page_size(request)
+        self.count = None
+
+        if request.query_params.get(self.count_query_param) in ("1", "true"):
+            self.count = queryset.count()
+
+        cursor = self.decode_cursor(request, queryset.model)
+        if cursor is not None:
+            queryset = queryset.filter(self.keyset_filter(cursor))
+
+        ordered = queryset.order_by(*(f"-{field}" for field in self.fields))
+        rows = list(ordered[: self.page_size + 1])
+
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request) -> int:
+        page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            pass
+        return max(1, min(page_size, settings.KEYSET_MAX_PAGE_SIZE))
+
+    def keyset_filter(self, values: list) -> Q:
+        """
+        Rows strictly after `values` in descending order, written as
+        f1 <= v1 AND (f1 < v1 OR (f2 <= v2 AND (... fn < vn)))
+        so the leading field is a plain index range.
+        """
+        *leading, last = list(zip(self.fields, values))
+        condition = Q(**{f"{last[0]}__lt": last[1]})
+        for field, value in reversed(leading):
+            condition = Q(**{f"{field}__lte": value}) & (
+                Q(**{f"{field}__lt": value}) | condition
+            )
+        return condition
+
+    def encode_cursor(self, row) -> str:
+        values = [getattr(row, field) for field in self.fields]
+        raw = json.dumps(values, cls=CursorEncoder).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded))
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise NotFound("Invalid cursor")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        response = {"next": self.get_next_link(), "results": data}
+        if self.count is not None:
+            response["count"] = self.count
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "count": {"type": "integer"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,118 @@
+"""
+In-process cache of ATT&CK reference data (tactics and techniques).
+
+The tables are static apart from admin edits, so each process keeps one
+snapshot. A save or delete of an AttackTactic or AttackTechnique drops it
+in the writing process at once and, on commit, replaces a generation token
+in the Django cache. Other processes compare that token with their
+snapshot's at most every REFERENCE_DATA_CHECK_INTERVAL seconds and reload
+when it changed. With the default locmem cache the token is per-process,
+so the interval is then only the bound on how long another process keeps
+serving an edited table.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import read_generation, replace_generation
+from .models import AttackTactic, AttackTechnique
+
+
+class ReferenceData:
+    """Immutable snapshot of the ATT&CK tables."""
+
+    def __init__(self):
+        self.tactics = {
+            row["id"]: row
+            for row in AttackTactic.objects.values("id", "name", "description")
+        }
+        self.techniques = {
+            row["id"]: row
+            for row in AttackTechnique.objects.values(
+                "id", "name", "description", "tactic_id"
+            )
+        }
+        self.technique_ids = frozenset(self.techniques)
+        self.techniques_by_tactic: dict[str, list[str]] = {}
+        for technique in self.techniques.values():
+            self.techniques_by_tactic.setdefault(technique["tactic_id"], []).append(
+                technique["id"]
+            )
+
+
+GENERATION_KEY = "reference:generation"
+
+_lock = threading.Lock()
+_data: Optional[ReferenceData] = None
+_generation: Optional[str] = None
+_checked_at = 0.0
+
+
+def get_reference_data() -> ReferenceData:
+    global _data, _generation, _checked_at
+    now = time.monotonic()
+    data = _data
+    if data is not None and now - _checked_at < settings.REFERENCE_DATA_CHECK_INTERVAL:
+        return data
+
+    with _lock:
+        # Read the token before the tables, so a concurrent edit at worst
+        # costs one extra reload
+        generation = read_generation(GENERATION_KEY)
+        if _data is None or generation != _generation:
+            _data = ReferenceData()
+            _generation = generation
+        _checked_at = now
+        return _data
+
+
+def invalidate():
+    """
+    Drop the snapshot in this process now, and in every process sharing
+    the cache once the current transaction commits.
+    """
+    global _data
+    with _lock:
+        _data = None
+    replace_generation(GENERATION_KEY)
+
+
+def get_technique(technique_id: str) -> Optional[dict]:
+    return get_reference_data().techniques.get(technique_id)
+
+
+def get_tactic(tactic_id: str) -> Optional[dict]:
+    return get_reference_data().tactics.get(tactic_id)
+
+
+def technique_ids() -> frozenset[str]:
+    return get_reference_data().technique_ids
+
+
+def tactic_for_technique(technique_id: str) -> Optional[dict]:
+    technique = get_technique(technique_id)
+    return get_tactic(technique["tactic_id"]) if technique else None
+
+
+def parent_technique(technique_id: str) -> Optional[dict]:
+    """Parent of a sub-technique (T1059.001 -> T1059), None otherwise."""
+    if "." not in technique_id:
+        return None
+    return get_technique(technique_id.split(".", 1)[0])
+
+
+def techniques_for_tactic(tactic_id: str) -> list[str]:
+    return list(get_reference_data().techniques_by_tactic.get(tactic_id, []))
+
+
+@receiver(post_save, sender=AttackTactic)
+@receiver(post_delete, sender=AttackTactic)
+@receiver(post_save, sender=AttackTechnique)
+@receiver(post_delete, sender=AttackTechnique)
+def _invalidate_on_change(sender, **kwargs):
+    invalidate()
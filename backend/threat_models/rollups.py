@@ -0,0 +1,238 @@
+"""
+Incrementally maintained ThreatEvent rollups and Indicator counts.
+
+Every stored event adds one to its hour and day bucket for each dimension
+(total, source, indicator type, technique), and every stored indicator to
+the count of its type. Analytics views read these rows instead of
+scanning ThreatEvent or Indicator.
+
+Both follow every model-level write: save() and delete() (the API, the
+admin, scripts, QuerySet.delete()) through the signal handlers below, and
+ingest.ingest_events(), whose bulk writes send no signals, explicitly.
+Writes that skip both, QuerySet.update() and raw SQL, need
+rebuild_rollups() afterwards.
+"""
+
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils.dateparse import parse_datetime
+
+from .caching import invalidate_analytics
+from .models import EventRollup, Indicator, IndicatorTypeCount, ThreatEvent
+
+# Fields that decide an event's rollup buckets
+ROLLUP_FIELDS = ("timestamp", "source", "indicator_type", "related_technique")
+
+UPSERT_SQL = """
+    INSERT INTO {table} (granularity, dimension, bucket, {key}, event_count)
+    VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (granularity, dimension, bucket, {key})
+    DO UPDATE SET event_count = {table}.event_count + excluded.event_count
+"""
+INDICATOR_COUNT_UPSERT_SQL = """
+    INSERT INTO {table} (type, indicator_count) VALUES (%s, %s)
+    ON CONFLICT (type)
+    DO UPDATE SET indicator_count = {table}.indicator_count + excluded.indicator_count
+"""
+
+
+def hour_bucket(value: datetime) -> datetime:
+    if isinstance(value, str):
+        # Model fields assigned as text keep it until reloaded
+        value = parse_datetime(value)
+    return value.astimezone(dt_timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    )
+
+
+def day_bucket(value: datetime) -> datetime:
+    return hour_bucket(value).replace(hour=0)
+
+
+def _dimensions(event) -> list[tuple[str, str]]:
+    dims = [
+        (EventRollup.TOTAL, ""),
+        (EventRollup.SOURCE, event.source or ""),
+        (EventRollup.INDICATOR_TYPE, event.indicator_type or ""),
+    ]
+    if event.related_technique:
+        dims.append((EventRollup.TECHNIQUE, event.related_technique))
+    return dims
+
+
+def record_events(events, delta: int = 1):
+    """
+    Add (or with delta=-1, remove) events to the rollups.
+    Costs one executemany regardless of how many events are passed.
+    """
+    counts = Counter()
+    for event in events:
+        hour = hour_bucket(event.timestamp)
+        day = hour.replace(hour=0)
+        for dimension, key in _dimensions(event):
+            counts[(EventRollup.HOUR, dimension, hour, key)] += delta
+            counts[(EventRollup.DAY, dimension, day, key)] += delta
+
+    if not counts:
+        return
+
+    qn = connection.ops.quote_name
+    sql = UPSERT_SQL.format(table=qn(EventRollup._meta.db_table), key=qn("key"))
+    params = [
+        (
+            granularity,
+            dimension,
+            connection.ops.adapt_datetimefield_value(bucket),
+            key,
+            count,
+        )
+        for (granularity, dimension, bucket, key), count in counts.items()
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def record_indicators(counts: dict[str, int]):
+    """Add a count delta per indicator type, one executemany in total."""
+    counts = {ind_type: count for ind_type, count in counts.items() if count}
+    if not counts:
+        return
+    sql = INDICATOR_COUNT_UPSERT_SQL.format(
+        table=connection.ops.quote_name(IndicatorTypeCount._meta.db_table)
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, list(counts.items()))
+
+
+def rebuild_indicator_counts() -> int:
+    """Recompute IndicatorTypeCount from Indicator. Returns rows written."""
+    counts = [
+        IndicatorTypeCount(type=row["type"], indicator_count=row["count"])
+        for row in Indicator.objects.values("type").annotate(count=Count("id")).order_by()
+    ]
+    with transaction.atomic():
+        IndicatorTypeCount.objects.all().delete()
+        IndicatorTypeCount.objects.bulk_create(counts)
+    return len(counts)
+
+
+def rebuild_rollups() -> int:
+    """
+    Recompute all rollups from ThreatEvent, and the indicator counts from
+    Indicator. Used to backfill existing data or to repair drift; ingest
+    keeps them current afterwards.
+
+    Returns:
+        Number of rollup rows written
+    """
+    fields = {
+        EventRollup.SOURCE: "source",
+        EventRollup.INDICATOR_TYPE: "indicator_type",
+        EventRollup.TECHNIQUE: "related_technique",
+    }
+    counts = Counter()
+
+    hourly = ThreatEvent.objects.annotate(
+        hour=TruncHour("timestamp", tzinfo=dt_timezone.utc)
+    )
+    for row in hourly.values("hour").annotate(count=Count("id")).order_by():
+        counts[(EventRollup.TOTAL, row["hour"], "")] += row["count"]
+    for dimension, field in fields.items():
+        events = hourly
+        if dimension == EventRollup.TECHNIQUE:
+            events = hourly.exclude(related_technique__isnull=True).exclude(
+                related_technique=""
+            )
+        rows = events.values("hour", field).annotate(count=Count("id")).order_by()
+        for row in rows:
+            counts[(dimension, row["hour"], row[field])] += row["count"]
+
+    rollups = []
+    daily = Counter()
+    for (dimension, hour, key), count in counts.items():
+        rollups.append(
+            EventRollup(
+                granularity=EventRollup.HOUR,
+                dimension=dimension,
+                bucket=hour,
+                key=key,
+                event_count=count,
+            )
+        )
+        daily[(dimension, hour.replace(hour=0), key)] += count
+    for (dimension, day, key), count in daily.items():
+        rollups.append(
+            EventRollup(
+                granularity=EventRollup.DAY,
+                dimension=dimension,
+                bucket=day,
+                key=key,
+                event_count=count,
+            )
+        )
+
+    with transaction.atomic():
+        EventRollup.objects.all().delete()
+        EventRollup.objects.bulk_create(rollups, batch_size=1000)
+        written = len(rollups) + rebuild_indicator_counts()
+    return written
+
+
+@receiver(pre_save, sender=ThreatEvent)
+def _remember_stored(sender, instance, **kwargs):
+    # The stored row, so post_save can move the event out of its old buckets
+    instance._rollup_stored = (
+        ThreatEvent.objects.filter(pk=instance.pk).only(*ROLLUP_FIELDS).first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=ThreatEvent)
+def _record_saved(sender, instance, created, **kwargs):
+    stored = getattr(instance, "_rollup_stored", None)
+    instance._rollup_stored = None
+    if stored is not None and not created:
+        record_events([stored], delta=-1)
+    record_events([instance])
+    invalidate_analytics()
+
+
+@receiver(post_delete, sender=ThreatEvent)
+def _record_deleted(sender, instance, **kwargs):
+    record_events([instance], delta=-1)
+    invalidate_analytics()
+
+
+@receiver(pre_save, sender=Indicator)
+def _remember_stored_type(sender, instance, **kwargs):
+    instance._stored_type = (
+        Indicator.objects.filter(pk=instance.pk).values_list("type", flat=True).first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=Indicator)
+def _count_saved_indicator(sender, instance, created, **kwargs):
+    stored = getattr(instance, "_stored_type", None)
+    instance._stored_type = None
+    if created or stored is None:
+        record_indicators({instance.type: 1})
+    elif stored != instance.type:
+        record_indicators({stored: -1, instance.type: 1})
+    else:
+        return
+    invalidate_analytics()
+
+
+@receiver(post_delete, sender=Indicator)
+def _count_deleted_indicator(sender, instance, **kwargs):
+    record_indicators({instance.type: -1})
+    invalidate_analytics()
@@ -1,5 +1,14 @@
 from rest_framework import serializers
 from .models import *
+from . import reference
+from .normalize import normalize_indicator
+
+
+def _normalized(value, indicator_type, field):
+    try:
+        return normalize_indicator(value, indicator_type)
+    except ValueError as e:
+        raise serializers.ValidationError({field: str(e)})
 
 
 class AttackTacticSerializer(serializers.ModelSerializer):
@@ -9,7 +18,11 @@ class AttackTacticSerializer(serializers.ModelSerializer):
 
 
 class AttackTechniqueSerializer(serializers.ModelSerializer):
-    tactic = AttackTacticSerializer(source="tactic_id", read_only=True)
+    # Resolved from the reference-data cache instead of a per-row query
+    tactic = serializers.SerializerMethodField()
+
+    def get_tactic(self, obj):
+        return reference.get_tactic(obj.tactic_id_id)
 
     class Meta:
         model = AttackTechnique
@@ -17,15 +30,32 @@ class AttackTechniqueSerializer(serializers.ModelSerializer):
 
 
 class IndicatorSerializer(serializers.ModelSerializer):
+    def validate(self, attrs):
+        if "value" in attrs:
+            indicator_type = attrs.get("type", getattr(self.instance, "type", None))
+            attrs["value"] = _normalized(attrs["value"], indicator_type, "value")
+        return attrs
+
     class Meta:
         model = Indicator
-        fields = "__all__"
+        # 64-bit keys are internal and exceed JavaScript's safe integer range
+        exclude = ["value_key"]
 
 
 class ThreatEventSerializer(serializers.ModelSerializer):
+    def validate(self, attrs):
+        if "raw_indicator" in attrs:
+            indicator_type = attrs.get(
+                "indicator_type", getattr(self.instance, "indicator_type", None)
+            )
+            attrs["raw_indicator"] = _normalized(
+                attrs["raw_indicator"], indicator_type, "raw_indicator"
+            )
+        return attrs
+
     class Meta:
         model = ThreatEvent
-        fields = "__all__"
+        exclude = ["indicator_key"]
 
 
 class EventIndicatorMapSerializer(serializers.ModelSerializer):
@@ -0,0 +1,109 @@
+"""
+Synthetic ThreatEvent data generated inside SQLite, shared by the query
+plan tests and the benchmark scripts. One INSERT ... SELECT builds a
+million rows in seconds; building them in Python takes minutes.
+
+Raw SQL skips the model signals, so rollups are written here too.
+"""
+
+from django.db import connection
+
+from .models import AttackTactic, AttackTechnique, EventRollup, ThreatEvent
+
+TACTICS = {
+    "TA0001": ("Initial Access", ["T1566", "T1078"]),
+    "TA0002": ("Execution", ["T1059", "T1204"]),
+    "TA0011": ("Command and Control", ["T1105", "T1071"]),
+}
+
+
+def create_reference_data():
+    for tactic_id, (name, techniques) in TACTICS.items():
+        tactic = AttackTactic.objects.create(id=tactic_id, name=name, description="")
+        for technique_id in techniques:
+            AttackTechnique.objects.create(
+                id=technique_id, name=technique_id, description="", tactic_id=tactic
+            )
+
+
+def insert_events(rows: int):
+    """
+    Insert `rows` events spread over the last year with random sources,
+    indicator types, techniques, confidences and metadata.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH RECURSIVE seq(i) AS (
+                SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i < %s - 1
+            )
+            INSERT INTO {ThreatEvent._meta.db_table} (
+                timestamp, source, raw_indicator, indicator_type,
+                related_technique, confidence, metadata_json, created_at
+            )
+            SELECT
+                strftime('%%Y-%%m-%%d %%H:%%M:%%S', 'now',
+                         '-' || (abs(random()) %% 525600) || ' minutes'),
+                CASE abs(random()) %% 4 WHEN 0 THEN 'malware_feed'
+                    WHEN 1 THEN 'internal_siem' WHEN 2 THEN 'honeypot'
+                    ELSE 'osint_feed' END,
+                '10.' || (i / 65536 %% 256) || '.' || (i / 256 %% 256)
+                    || '.' || (i %% 256),
+                CASE abs(random()) %% 4 WHEN 0 THEN 'ip' WHEN 1 THEN 'domain'
+                    WHEN 2 THEN 'url' ELSE 'hash' END,
+                CASE abs(random()) %% 7 WHEN 0 THEN 'T1566' WHEN 1 THEN 'T1078'
+                    WHEN 2 THEN 'T1059' WHEN 3 THEN 'T1204' WHEN 4 THEN 'T1105'
+                    WHEN 5 THEN 'T1071' END,
+                abs(random()) %% 101,
+                json_object(
+                    'campaign', CASE abs(random()) %% 5 WHEN 0 THEN 'ShadowHydra'
+                        WHEN 1 THEN 'DarkNexus' WHEN 2 THEN 'PhantomBear'
+                        WHEN 3 THEN 'CryptoWolf' END,
+                    'region', CASE abs(random()) %% 5 WHEN 0 THEN 'US'
+                        WHEN 1 THEN 'EU' WHEN 2 THEN 'APAC' WHEN 3 THEN 'LATAM' END
+                ),
+                strftime('%%Y-%%m-%%d %%H:%%M:%%S', 'now')
+            FROM seq
+            """,
+            [rows],
+        )
+
+
+def insert_rollups():
+    """
+    Aggregate the inserted events into EventRollup in SQL, which
+    rollups.rebuild_rollups() would do row by row in Python.
+    """
+    dimensions = {
+        EventRollup.TOTAL: "''",
+        EventRollup.SOURCE: "source",
+        EventRollup.INDICATOR_TYPE: "indicator_type",
+        EventRollup.TECHNIQUE: "related_technique",
+    }
+    buckets = {
+        EventRollup.HOUR: "substr(timestamp, 1, 13) || ':00:00'",
+        EventRollup.DAY: "substr(timestamp, 1, 10) || ' 00:00:00'",
+    }
+    with connection.cursor() as cursor:
+        for granularity, bucket in buckets.items():
+            for dimension, column in dimensions.items():
+                cursor.execute(
+                    f"""
+                    INSERT INTO {EventRollup._meta.db_table}
+                        (granularity, dimension, bucket, key, event_count)
+                    SELECT %s, %s, {bucket}, {column}, COUNT(*)
+                    FROM {ThreatEvent._meta.db_table}
+                    WHERE {column} IS NOT NULL
+                    GROUP BY 3, 4
+                    """,
+                    [granularity, dimension],
+                )
+
+
+def create_fixture(rows: int):
+    """Reference data, `rows` events and their rollups, then ANALYZE."""
+    create_reference_data()
+    insert_events(rows)
+    insert_rollups()
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
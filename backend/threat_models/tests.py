@@ -0,0 +1,857 @@
+import csv
+import io
+import json
+import os
+import re
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from . import reference
+from .caching import current_generation, read_generation
+from .export import EXPORT_FIELDS
+from .lookup import GENERATION_KEY as IP_GENERATION_KEY
+from .normalize import indicator_key, normalize_indicator
+from .models import *
+from .rollups import rebuild_rollups
+from .synthetic import create_fixture
+
+# Normalization cases shared with services/tests/test_normalize.py
+NORMALIZE_CASES = os.path.join(os.path.dirname(__file__), "normalize_cases.json")
+
+# Size of the ThreatEvent fixture used for query plan checks
+PLAN_FIXTURE_ROWS = int(os.environ.get("SADTIME_PLAN_FIXTURE_ROWS", 1_000_000))
+
+# Tables large enough that a full scan is a regression
+LARGE_TABLES = (
+    ThreatEvent._meta.db_table,
+    EventRollup._meta.db_table,
+    Indicator._meta.db_table,
+    EventIndicatorMap._meta.db_table,
+    TechniqueUsage._meta.db_table,
+)
+# A bare SCAN reads every row; SCAN ... USING [COVERING] INDEX walks the
+# whole index (and with a non-covering one, every row too). Only SEARCH
+# is accepted on the large tables.
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?$")
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN output is SQLite's")
+class AnalyticsQueryPlanTests(TestCase):
+    """
+    Every query behind the analytics endpoints must be answered from an
+    index, not by scanning a large table.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixture(PLAN_FIXTURE_ROWS)
+
+    def setUp(self):
+        # A cached response would run no queries at all
+        cache.clear()
+
+    def assert_indexed(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                if not query["sql"].startswith("SELECT"):
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                for row in cursor.fetchall():
+                    match = FULL_SCAN.match(row[-1])
+                    self.assertFalse(
+                        match and match.group(1) in LARGE_TABLES,
+                        f"{url} scans {row[-1]!r}:\n{query['sql']}",
+                    )
+
+    def test_summary_uses_indexes(self):
+        self.assert_indexed("/api/analytics/summary/")
+
+    def test_timeline_uses_indexes(self):
+        self.assert_indexed("/api/analytics/events/timeline/?days=30")
+
+    def test_top_techniques_uses_indexes(self):
+        self.assert_indexed("/api/analytics/techniques/top/?limit=100")
+        self.assert_indexed("/api/analytics/techniques/top/?days=7")
+
+    def test_recent_events_uses_indexes(self):
+        self.assert_indexed("/api/analytics/events/recent/?limit=20&days=7")
+
+    def test_indicator_counts_uses_indexes(self):
+        self.assert_indexed("/api/analytics/indicators/counts/")
+
+    def test_event_list_pages_use_indexes(self):
+        first = self.client.get("/api/threat/events/?page_size=100").json()
+        self.assert_indexed(first["next"])
+
+    def test_filtered_event_lists_use_indexes(self):
+        for params in (
+            "since=2025-01-01T00:00:00Z",
+            "source=honeypot",
+            "indicator_type=domain",
+            "technique=T1059",
+            "tactic=TA0002",
+            "min_confidence=90",
+            "campaign=DarkNexus",
+            "region=EU",
+            "source=honeypot&indicator_type=ip&min_confidence=50",
+        ):
+            with self.subTest(params=params):
+                first = self.client.get(f"/api/threat/events/?{params}").json()
+                self.assert_indexed(f"{first['next']}&count=true")
+
+    def test_indicator_lookup_uses_indexes(self):
+        self.assert_indexed(
+            "/api/threat/indicators/lookup/?value=10.0.0.1&value=a.evil.com"
+        )
+
+
+class BulkIngestTests(TestCase):
+    """POST /api/threat/events/bulk/ stores valid items and reports the rest."""
+
+    URL = "/api/threat/events/bulk/"
+
+    def event(self, **fields):
+        return {
+            "timestamp": "2025-01-01T00:00:00Z",
+            "source": "honeypot",
+            "raw_indicator": "10.0.0.1",
+            "indicator_type": "ip",
+            "metadata_json": {},
+            **fields,
+        }
+
+    def post(self, payload):
+        return self.client.post(self.URL, payload, content_type="application/json")
+
+    def test_mixed_batch_stores_valid_items(self):
+        response = self.post(
+            [
+                self.event(raw_indicator=" EVIL.com. ", indicator_type="domain"),
+                self.event(raw_indicator="10.0.0.1", indicator_type="hash"),
+                self.event(source=None),
+                [1],
+                self.event(raw_indicator="10.0.0.2"),
+            ]
+        )
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual((data["created"], data["failed"]), (2, 3))
+        self.assertEqual(
+            [item["status"] for item in data["results"]],
+            ["created", "error", "error", "error", "created"],
+        )
+        self.assertEqual([item["index"] for item in data["results"]], list(range(5)))
+        self.assertIn("raw_indicator", data["results"][1]["errors"])
+        self.assertIn("source", data["results"][2]["errors"])
+
+        stored = ThreatEvent.objects.in_bulk(
+            [data["results"][0]["id"], data["results"][4]["id"]]
+        )
+        self.assertEqual(
+            sorted(event.raw_indicator for event in stored.values()),
+            ["10.0.0.2", "evil.com"],
+        )
+        self.assertEqual(ThreatEvent.objects.count(), 2)
+        self.assertEqual(EventIndicatorMap.objects.count(), 2)
+
+    def test_all_invalid_batch_is_rejected(self):
+        response = self.post([self.event(indicator_type="hash"), "not an event"])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["created"], 0)
+        self.assertFalse(ThreatEvent.objects.exists())
+
+    def test_body_must_be_a_list(self):
+        response = self.post(self.event())
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ThreatEvent.objects.exists())
+
+    def test_empty_batch(self):
+        response = self.post([])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {"created": 0, "failed": 0, "results": []})
+
+
+class RollupMaintenanceTests(TestCase):
+    """EventRollup follows every save() and delete(), not only API writes."""
+
+    def counts(self, dimension):
+        return {
+            row.key: row.event_count
+            for row in EventRollup.objects.filter(
+                granularity=EventRollup.DAY, dimension=dimension
+            )
+            if row.event_count
+        }
+
+    def create(self, **fields):
+        return ThreatEvent.objects.create(
+            **{
+                "timestamp": "2025-01-01T10:00:00Z",
+                "source": "honeypot",
+                "raw_indicator": "10.0.0.1",
+                "indicator_type": "ip",
+                "related_technique": "T1059",
+                **fields,
+            }
+        )
+
+    def test_orm_writes_update_rollups(self):
+        event = self.create()
+        other = self.create(source="osint_feed")
+        self.assertEqual(self.counts(EventRollup.SOURCE), {"honeypot": 1, "osint_feed": 1})
+
+        event.source = "osint_feed"
+        event.related_technique = "T1566"
+        event.save()
+        self.assertEqual(self.counts(EventRollup.SOURCE), {"osint_feed": 2})
+        self.assertEqual(
+            self.counts(EventRollup.TECHNIQUE), {"T1059": 1, "T1566": 1}
+        )
+
+        other.delete()
+        ThreatEvent.objects.filter(pk=event.pk).delete()
+        self.assertEqual(self.counts(EventRollup.TOTAL), {})
+
+    def test_api_writes_update_rollups_once(self):
+        created = self.client.post(
+            "/api/threat/events/",
+            {
+                "timestamp": "2025-01-01T10:00:00Z",
+                "source": "honeypot",
+                "raw_indicator": "10.0.0.1",
+                "indicator_type": "ip",
+                "metadata_json": {},
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(self.counts(EventRollup.TOTAL), {"": 1})
+
+        url = f"/api/threat/events/{created.json()['id']}/"
+        self.client.patch(url, {"source": "osint_feed"}, content_type="application/json")
+        self.assertEqual(self.counts(EventRollup.SOURCE), {"osint_feed": 1})
+        self.client.delete(url)
+        self.assertEqual(self.counts(EventRollup.TOTAL), {})
+
+    def test_rebuild_matches_maintained_rollups(self):
+        for source in ("honeypot", "honeypot", "osint_feed"):
+            self.create(source=source)
+        maintained = {
+            EventRollup.SOURCE: self.counts(EventRollup.SOURCE),
+            EventRollup.TECHNIQUE: self.counts(EventRollup.TECHNIQUE),
+        }
+        rebuild_rollups()
+        self.assertEqual(
+            maintained,
+            {
+                EventRollup.SOURCE: self.counts(EventRollup.SOURCE),
+                EventRollup.TECHNIQUE: self.counts(EventRollup.TECHNIQUE),
+            },
+        )
+
+
+class MigrationTests(TransactionTestCase):
+    """Data migrations bring rows written before them up to date."""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([("threat_models", target)])
+        return executor.loader.project_state(("threat_models", target)).apps
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def tearDown(self):
+        self.migrate_to_latest()
+
+    def test_0003_fills_rollups(self):
+        apps = self.migrate("0002_rename_attacktactics_attacktactic_and_more")
+        Event = apps.get_model("threat_models", "ThreatEvent")
+        for hour, technique in ((10, "T1059"), (11, ""), (11, "T1059")):
+            Event.objects.create(
+                timestamp=datetime(2025, 1, 1, hour, 30, tzinfo=timezone.utc),
+                source="honeypot",
+                raw_indicator="10.0.0.1",
+                indicator_type="ip",
+                related_technique=technique,
+                metadata_json={},
+            )
+
+        apps = self.migrate("0003_eventrollup")
+        Rollup = apps.get_model("threat_models", "EventRollup")
+        migrated = set(
+            Rollup.objects.values_list(
+                "granularity", "dimension", "bucket", "key", "event_count"
+            )
+        )
+        self.assertIn(
+            ("day", "technique", datetime(2025, 1, 1, tzinfo=timezone.utc), "T1059", 2),
+            migrated,
+        )
+
+        self.migrate_to_latest()
+        rebuild_rollups()
+        self.assertEqual(
+            migrated,
+            set(
+                EventRollup.objects.values_list(
+                    "granularity", "dimension", "bucket", "key", "event_count"
+                )
+            ),
+        )
+
+    def test_0006_normalizes_and_merges_indicators(self):
+        apps = self.migrate("0005_event_filter_indexes")
+        Event = apps.get_model("threat_models", "ThreatEvent")
+        Ind = apps.get_model("threat_models", "Indicator")
+        Map = apps.get_model("threat_models", "EventIndicatorMap")
+        for value, ind_type in (
+            ("evil.com", "domain"),
+            ("EVIL.com", "domain"),
+            ("evil.com.", "domain"),
+            ("not-an-ip", "ip"),
+        ):
+            event = Event.objects.create(
+                timestamp=datetime(2025, 1, 1, tzinfo=timezone.utc),
+                source="honeypot",
+                raw_indicator=value,
+                indicator_type=ind_type,
+                metadata_json={},
+            )
+            indicator = Ind.objects.create(value=value, type=ind_type, event_count=1)
+            Map.objects.create(event_id=event, indicator_id=indicator)
+
+        apps = self.migrate("0006_indicator_keys")
+        Event = apps.get_model("threat_models", "ThreatEvent")
+        Ind = apps.get_model("threat_models", "Indicator")
+        Map = apps.get_model("threat_models", "EventIndicatorMap")
+        self.assertEqual(
+            sorted(Ind.objects.values_list("value", "type", "event_count")),
+            [("evil.com", "domain", 3), ("not-an-ip", "ip", 1)],
+        )
+        domain = Ind.objects.get(type="domain")
+        self.assertEqual(domain.value_key, indicator_key("evil.com"))
+        self.assertEqual(Map.objects.filter(indicator_id=domain).count(), 3)
+        self.assertEqual(
+            sorted(Event.objects.values_list("raw_indicator", "indicator_key")),
+            sorted(
+                [("evil.com", indicator_key("evil.com"))] * 3
+                + [("not-an-ip", indicator_key("not-an-ip"))]
+            ),
+        )
+
+
+class IndicatorCountTests(TestCase):
+    """IndicatorTypeCount matches the Indicator table after any write."""
+
+    def counts(self):
+        # on_commit invalidation never fires inside a TestCase transaction
+        cache.clear()
+        response = self.client.get("/api/analytics/indicators/counts/")
+        return {row["type"]: row["count"] for row in response.json()["indicator_counts"]}
+
+    def test_ingest_counts_new_indicators_only(self):
+        events = [
+            {"raw_indicator": "10.0.0.1", "indicator_type": "ip"},
+            {"raw_indicator": "10.0.0.1", "indicator_type": "ip"},
+            {"raw_indicator": "evil.com", "indicator_type": "domain"},
+        ]
+        for batch in (events, events[:1] + [
+            {"raw_indicator": "10.0.0.2", "indicator_type": "ip"}
+        ]):
+            response = self.client.post(
+                "/api/threat/events/bulk/",
+                [
+                    {
+                        "timestamp": "2025-01-01T00:00:00Z",
+                        "source": "honeypot",
+                        "metadata_json": {},
+                        **event,
+                    }
+                    for event in batch
+                ],
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(self.counts(), {"domain": 1, "ip": 2})
+        cache.clear()
+        summary = self.client.get("/api/analytics/summary/").json()
+        self.assertEqual(summary["total_indicators"], 3)
+
+    def test_orm_writes_update_counts(self):
+        indicator = Indicator.objects.create(value="10.0.0.1", type="ip")
+        Indicator.objects.create(value="evil.com", type="domain")
+        self.assertEqual(self.counts(), {"domain": 1, "ip": 1})
+
+        indicator.type = "domain"
+        indicator.save()
+        self.assertEqual(self.counts(), {"domain": 2})
+
+        Indicator.objects.filter(type="domain").delete()
+        self.assertEqual(self.counts(), {})
+
+    def test_rebuild_matches_maintained_counts(self):
+        for value, ind_type in (("a.com", "domain"), ("10.0.0.1", "ip"), ("b.com", "domain")):
+            Indicator.objects.create(value=value, type=ind_type)
+        maintained = self.counts()
+        rebuild_rollups()
+        self.assertEqual(self.counts(), maintained)
+
+
+class ReferenceDataTests(TestCase):
+    """The per-process ATT&CK snapshot follows edits made by other processes."""
+
+    def setUp(self):
+        reference.invalidate()
+        AttackTactic.objects.create(id="TA0001", name="Initial Access", description="")
+
+    def add_tactic_elsewhere(self):
+        # bulk_create sends no signals, like a write from another process
+        AttackTactic.objects.bulk_create(
+            [AttackTactic(id="TA0002", name="Execution", description="")]
+        )
+
+    @override_settings(REFERENCE_DATA_CHECK_INTERVAL=60)
+    def test_snapshot_reused_within_interval(self):
+        self.assertIsNone(reference.get_tactic("TA0002"))
+        self.add_tactic_elsewhere()
+        cache.set(reference.GENERATION_KEY, "other-process")
+        with self.assertNumQueries(0):
+            self.assertIsNone(reference.get_tactic("TA0002"))
+
+    @override_settings(REFERENCE_DATA_CHECK_INTERVAL=0)
+    def test_reload_on_generation_change(self):
+        self.assertIsNone(reference.get_tactic("TA0002"))
+        self.add_tactic_elsewhere()
+        with self.assertNumQueries(0):
+            self.assertIsNone(reference.get_tactic("TA0002"))
+
+        cache.set(reference.GENERATION_KEY, "other-process")
+        self.assertEqual(reference.get_tactic("TA0002")["name"], "Execution")
+
+    def test_commit_replaces_generation(self):
+        before = read_generation(reference.GENERATION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            AttackTactic.objects.filter(pk="TA0001").get().save()
+        self.assertNotEqual(read_generation(reference.GENERATION_KEY), before)
+
+
+class AnalyticsCacheTests(TestCase):
+    """Cached analytics responses, their invalidation and conditional GETs."""
+
+    url = "/api/analytics/indicators/counts/"
+
+    def setUp(self):
+        cache.clear()
+        Indicator.objects.create(value="10.0.0.1", type="ip")
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_write_replaces_generation_on_commit(self):
+        self.client.get(self.url)
+        generation = current_generation()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Indicator.objects.create(value="evil.com", type="domain")
+        self.assertEqual(current_generation(), generation)
+        self.assertEqual(len(self.client.get(self.url).json()["indicator_counts"]), 1)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(current_generation(), generation)
+        self.assertEqual(len(self.client.get(self.url).json()["indicator_counts"]), 2)
+
+    def test_if_none_match(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.assertRegex(etag, r'^"[0-9a-f]{40}"$')
+
+        for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+
+        for header in ('"other"', etag[:-2] + '"', etag.strip('"'), f'"x{etag}"'):
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, 200)
+
+
+class KeysetPaginationTests(TestCase):
+    """Walking every page returns each row exactly once."""
+
+    def test_pages_over_equal_and_sub_millisecond_timestamps(self):
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        offsets = [0, 0, 0, 1, 1, 499, 500, 999, 1000, 1000, 1001, 1500]
+        expected = {
+            ThreatEvent.objects.create(
+                timestamp=base + timedelta(microseconds=offset),
+                source="honeypot",
+                raw_indicator=f"10.0.0.{i}",
+                indicator_type="ip",
+                metadata_json={},
+            ).id
+            for i, offset in enumerate(offsets)
+        }
+
+        for page_size in (1, 2, 3, 5):
+            with self.subTest(page_size=page_size):
+                seen = []
+                url = f"/api/threat/events/?page_size={page_size}"
+                while url:
+                    body = self.client.get(url).json()
+                    seen.extend(row["id"] for row in body["results"])
+                    url = body["next"]
+                self.assertEqual(len(seen), len(expected))
+                self.assertEqual(set(seen), expected)
+
+
+class ExportTests(TestCase):
+    """Streaming NDJSON and CSV exports of ThreatEvents."""
+
+    url = "/api/threat/events/export/"
+
+    @classmethod
+    def setUpTestData(cls):
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        rows = [
+            ("feed", "10.0.0.1", "ip", "T1059", 90, {"campaign": "Hydra"}),
+            ("siem", 'evil,"quoted"\nhost.com', "domain", None, None, {}),
+            ("feed", "http://a.com/x?y=1,2", "url", "T1566", 40, {"note": 'a "b", c'}),
+        ]
+        fields = (
+            "source",
+            "raw_indicator",
+            "indicator_type",
+            "related_technique",
+            "confidence",
+            "metadata_json",
+        )
+        cls.events = [
+            ThreatEvent.objects.create(
+                timestamp=base + timedelta(hours=i, microseconds=i),
+                **dict(zip(fields, row)),
+            )
+            for i, row in enumerate(rows)
+        ]
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        response, body = self.export(output="ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn('filename="threat_events.ndjson"', response["Content-Disposition"])
+
+        lines = body.splitlines()
+        self.assertEqual(len(lines), 3)
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([list(record) for record in records], [list(EXPORT_FIELDS)] * 3)
+        self.assertEqual([record["id"] for record in records], [e.id for e in self.events])
+        self.assertEqual(records[0]["timestamp"], "2025-01-01T00:00:00Z")
+        self.assertEqual(records[1]["timestamp"], "2025-01-01T01:00:00.000001Z")
+        self.assertEqual(records[1]["raw_indicator"], 'evil,"quoted"\nhost.com')
+        self.assertIsNone(records[1]["confidence"])
+        self.assertEqual(records[2]["metadata_json"], {"note": 'a "b", c'})
+
+    def test_csv(self):
+        response, body = self.export(output="csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], list(EXPORT_FIELDS))
+        self.assertEqual(len(rows), 4)
+        records = [dict(zip(rows[0], row)) for row in rows[1:]]
+        self.assertEqual(records[1]["raw_indicator"], 'evil,"quoted"\nhost.com')
+        self.assertEqual(records[1]["confidence"], "")
+        self.assertEqual(records[1]["related_technique"], "")
+        self.assertEqual(records[2]["raw_indicator"], "http://a.com/x?y=1,2")
+        self.assertEqual(json.loads(records[2]["metadata_json"]), {"note": 'a "b", c'})
+
+    def test_csv_without_rows_has_header(self):
+        _, body = self.export(output="csv", source="nobody")
+        self.assertEqual(list(csv.reader(io.StringIO(body))), [list(EXPORT_FIELDS)])
+
+    def test_filters(self):
+        cases = [
+            ({"source": "feed"}, [0, 2]),
+            ({"indicator_type": "domain"}, [1]),
+            ({"technique": "T1566"}, [2]),
+            ({"since": "2025-01-01T01:00:00.000001Z"}, [1, 2]),
+            ({"until": "2025-01-01T01:00:00.000001Z"}, [0]),
+            ({"since": "2025-01-01T00:30:00Z", "source": "feed"}, [2]),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                _, body = self.export(output="ndjson", **params)
+                ids = [json.loads(line)["id"] for line in body.splitlines()]
+                self.assertEqual(ids, [self.events[i].id for i in expected])
+
+    def test_unknown_output(self):
+        response = self.client.get(self.url, {"output": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+
+class FilterTests(TestCase):
+    """Each list filter returns exactly the matching rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for tactic_id, techniques in (("TA0001", ("T1566", "T1190")), ("TA0002", ("T1059",))):
+            tactic = AttackTactic.objects.create(id=tactic_id, name=tactic_id, description="")
+            for technique in techniques:
+                AttackTechnique.objects.create(
+                    id=technique, name=technique, description="", tactic_id=tactic
+                )
+
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        rows = [
+            ("feed", "ip", "T1566", 90, {"campaign": "Hydra", "region": "US"}),
+            ("feed", "domain", "T1059", 50, {"campaign": "Hydra", "region": "EU"}),
+            ("siem", "ip", "T1190", 79, {"campaign": "Kraken", "region": "US"}),
+            ("siem", "hash", None, None, {}),
+        ]
+        cls.events = [
+            ThreatEvent.objects.create(
+                timestamp=base + timedelta(days=i),
+                source=source,
+                raw_indicator=f"value-{i}",
+                indicator_type=indicator_type,
+                related_technique=technique,
+                confidence=confidence,
+                metadata_json=metadata,
+            )
+            for i, (source, indicator_type, technique, confidence, metadata) in enumerate(
+                rows
+            )
+        ]
+        Indicator.objects.create(value="10.0.0.1", type="ip")
+        Indicator.objects.create(value="evil.com", type="domain")
+        Indicator.objects.create(value="10.0.0.2", type="ip")
+
+    def results(self, url, params, field):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(row[field] for row in response.json()["results"])
+
+    def test_event_filters(self):
+        cases = [
+            ({"source": "siem"}, [2, 3]),
+            ({"indicator_type": "ip"}, [0, 2]),
+            ({"technique": "T1059"}, [1]),
+            ({"tactic": "TA0001"}, [0, 2]),
+            ({"tactic": "TA9999"}, []),
+            ({"min_confidence": "79"}, [0, 2]),
+            ({"min_confidence": "80"}, [0]),
+            ({"since": "2025-01-02T00:00:00Z"}, [1, 2, 3]),
+            ({"until": "2025-01-02T00:00:00Z"}, [0]),
+            ({"since": "2025-01-02T00:00:00Z", "until": "2025-01-04T00:00:00Z"}, [1, 2]),
+            ({"campaign": "Hydra"}, [0, 1]),
+            ({"region": "US"}, [0, 2]),
+            ({"campaign": "Hydra", "region": "US"}, [0]),
+            ({"source": "feed", "tactic": "TA0002", "min_confidence": "50"}, [1]),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(
+                    self.results("/api/threat/events/", params, "id"),
+                    [self.events[i].id for i in expected],
+                )
+
+    def test_invalid_event_filters(self):
+        for params in ({"since": "yesterday"}, {"min_confidence": "high"}):
+            with self.subTest(params=params):
+                response = self.client.get("/api/threat/events/", params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_indicator_filters(self):
+        cases = [
+            ({"type": "ip"}, ["10.0.0.1", "10.0.0.2"]),
+            ({"value": "evil.com"}, ["evil.com"]),
+            ({"type": "domain", "value": "10.0.0.1"}, []),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(
+                    self.results("/api/threat/indicators/", params, "value"), expected
+                )
+
+
+class IndicatorLookupTests(TestCase):
+    """Exact, parent-domain and CIDR matches from the lookup endpoint."""
+
+    url = "/api/threat/indicators/lookup/"
+
+    def setUp(self):
+        for value, ind_type in (
+            ("evil.com", "domain"),
+            ("sub.evil.com", "domain"),
+            ("10.1.2.3", "ip"),
+            ("192.168.0.0/16", "ip"),
+            ("2001:db8::1", "ip"),
+            ("d41d8cd98f00b204e9800998ecf8427e", "hash"),
+        ):
+            Indicator.objects.create(value=value, type=ind_type)
+
+    def lookup(self, *values):
+        response = self.client.post(
+            self.url, {"values": list(values)}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        return [
+            sorted((match["value"], match["match"]) for match in result["matches"])
+            for result in response.json()["results"]
+        ]
+
+    def test_exact(self):
+        self.assertEqual(
+            self.lookup(
+                "EVIL.com", "10.1.2.3", "D41D8CD98F00B204E9800998ECF8427E", "nope.org"
+            ),
+            [
+                [("evil.com", "exact")],
+                [("10.1.2.3", "exact")],
+                [("d41d8cd98f00b204e9800998ecf8427e", "exact")],
+                [],
+            ],
+        )
+
+    def test_domain_suffix(self):
+        self.assertEqual(
+            self.lookup("a.sub.evil.com", "notevil.com"),
+            [[("evil.com", "domain_suffix"), ("sub.evil.com", "domain_suffix")], []],
+        )
+
+    def test_cidr(self):
+        self.assertEqual(
+            self.lookup(
+                "192.168.4.5", "10.1.0.0/16", "10.2.0.0/16", "2001:db8::/64", "10.0.0.0/8"
+            ),
+            [
+                [("192.168.0.0/16", "cidr")],
+                [("10.1.2.3", "cidr")],
+                [],
+                [("2001:db8::1", "cidr")],
+                [("10.1.2.3", "cidr")],
+            ],
+        )
+
+    def test_rows_committed_out_of_id_order(self):
+        Indicator.objects.create(id=1000, value="172.16.0.9", type="ip")
+        self.assertEqual(self.lookup("172.16.0.0/24"), [[("172.16.0.9", "cidr")]])
+
+        # A lower id committed later by another process: no signal here,
+        # only the shared generation changes
+        Indicator.objects.bulk_create([Indicator(id=999, value="172.16.0.8", type="ip")])
+        cache.set(IP_GENERATION_KEY, "other-process")
+        self.assertEqual(
+            self.lookup("172.16.0.0/24"),
+            [[("172.16.0.8", "cidr"), ("172.16.0.9", "cidr")]],
+        )
+
+    def test_ingest_adds_new_ips(self):
+        self.lookup("172.16.0.0/24")
+        response = self.client.post(
+            "/api/threat/events/bulk/",
+            [
+                {
+                    "timestamp": "2025-01-01T00:00:00Z",
+                    "source": "honeypot",
+                    "raw_indicator": "172.16.0.7",
+                    "indicator_type": "ip",
+                    "metadata_json": {},
+                }
+            ],
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.lookup("172.16.0.0/24"), [[("172.16.0.7", "cidr")]])
+
+
+class NormalizeTests(SimpleTestCase):
+    """
+    One canonical spelling per indicator. The cases are shared with
+    services/tests/test_normalize.py, which runs services/normalize.py
+    against them too.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(NORMALIZE_CASES, encoding="utf-8") as f:
+            cls.cases = json.load(f)
+
+    def test_canonical_forms(self):
+        for case in self.cases:
+            if case["canonical"] is None:
+                continue
+            with self.subTest(**case):
+                self.assertEqual(
+                    normalize_indicator(case["value"], case["type"]), case["canonical"]
+                )
+
+    def test_invalid_values(self):
+        for case in self.cases:
+            if case["canonical"] is not None:
+                continue
+            with self.subTest(**case):
+                with self.assertRaises(ValueError):
+                    normalize_indicator(case["value"], case["type"])
+
+    def test_key(self):
+        self.assertEqual(indicator_key("evil.com"), indicator_key("evil.com"))
+        self.assertNotEqual(indicator_key("evil.com"), indicator_key("evil.org"))
+        self.assertTrue(-(2**63) <= indicator_key("evil.com") < 2**63)
+
+
+class IngestNormalizationTests(TestCase):
+    """The API stores the canonical value and rejects invalid ones."""
+
+    def post(self, indicator, indicator_type):
+        return self.client.post(
+            "/api/threat/events/",
+            {
+                "timestamp": "2025-01-01T00:00:00Z",
+                "source": "honeypot",
+                "raw_indicator": indicator,
+                "indicator_type": indicator_type,
+                "metadata_json": {},
+            },
+            content_type="application/json",
+        )
+
+    def test_spellings_share_one_indicator(self):
+        for spelling in ("EVIL.com", " evil.com. ", "evil.COM"):
+            self.assertEqual(self.post(spelling, "domain").status_code, 201)
+        self.assertEqual(
+            list(ThreatEvent.objects.values_list("raw_indicator", flat=True).distinct()),
+            ["evil.com"],
+        )
+        indicator = Indicator.objects.get()
+        self.assertEqual((indicator.value, indicator.event_count), ("evil.com", 3))
+        self.assertEqual(indicator.value_key, indicator_key("evil.com"))
+
+    def test_invalid_value_rejected(self):
+        response = self.post("not-an-ip", "ip")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("raw_indicator", response.json())
@@ -1,6 +1,16 @@
-from rest_framework import viewsets
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from .models import *
 from .serializers import *
+from .export import CONTENT_TYPES, FORMATS
+from .filters import IndicatorFilter, ThreatEventFilter
+from .ingest import ingest_events
+from .lookup import lookup_indicators
+from .pagination import KeysetPagination
 
 
 class AttackTacticViewSet(viewsets.ModelViewSet):
@@ -16,16 +26,141 @@ class AttackTechniqueViewSet(viewsets.ModelViewSet):
 class IndicatorViewSet(viewsets.ModelViewSet):
     queryset = Indicator.objects.all()
     serializer_class = IndicatorSerializer
+    filter_backends = [IndicatorFilter]
+    pagination_class = KeysetPagination
+    keyset_ordering = ("id",)
+
+    @action(detail=False, methods=["get", "post"], url_path="lookup")
+    def lookup(self, request):
+        """
+        GET  /api/threat/indicators/lookup/?value=evil.com
+        POST /api/threat/indicators/lookup/  {"values": ["1.2.3.4", ...]}
+        Matches each value exactly, by parent domain and by CIDR
+        containment. Returns one result per value in request order.
+        """
+        if request.method == "GET":
+            values = request.query_params.getlist("value")
+        else:
+            values = request.data.get("values") if isinstance(request.data, dict) else None
+            if not isinstance(values, list) or not all(
+                isinstance(value, str) for value in values
+            ):
+                return Response(
+                    {"error": "Expected {\"values\": [<string>, ...]}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        if len(values) > settings.INDICATOR_LOOKUP_MAX_VALUES:
+            return Response(
+                {
+                    "error": f"At most {settings.INDICATOR_LOOKUP_MAX_VALUES} "
+                    "values per request"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = lookup_indicators(values)
+        return Response(
+            {
+                "matched": sum(1 for result in results if result["matches"]),
+                "results": results,
+            }
+        )
 
 
 class ThreatEventViewSet(viewsets.ModelViewSet):
     queryset = ThreatEvent.objects.all()
     serializer_class = ThreatEventSerializer
+    filter_backends = [ThreatEventFilter]
+    pagination_class = KeysetPagination
+    keyset_ordering = ("timestamp", "id")
+
+    # Single creates take the bulk ingest path; updates and deletes keep
+    # EventRollup current through the model signals in rollups.py
+    def perform_create(self, serializer):
+        serializer.instance = ingest_events(
+            [ThreatEvent(**serializer.validated_data)]
+        )[0]
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        POST /api/threat/events/bulk/
+        Accepts a JSON array of events, validates each one and stores the
+        valid ones with a single bulk_create. Returns a per-item result in
+        request order so callers can acknowledge only what was stored.
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {"error": "Expected a JSON array of events"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = []
+        valid = []
+        for index, item in enumerate(request.data):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, ThreatEvent(**serializer.validated_data)))
+                results.append({"index": index, "status": "created"})
+            else:
+                results.append(
+                    {"index": index, "status": "error", "errors": serializer.errors}
+                )
+
+        created = ingest_events([event for _, event in valid])
+
+        for (index, _), event in zip(valid, created):
+            results[index]["id"] = event.id
+
+        return Response(
+            {
+                "created": len(created),
+                "failed": len(results) - len(created),
+                "results": results,
+            },
+            status=(
+                status.HTTP_201_CREATED
+                if created or not results
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        GET /api/threat/events/export/?output=ndjson|csv
+        Streams every matching event ordered by timestamp. Accepts the
+        same filters as the list endpoint (see filters.py).
+        (`output` rather than `format`, which DRF reserves for renderers.)
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in FORMATS:
+            return Response(
+                {"error": f"output must be one of: {', '.join(FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            FORMATS[output](queryset), content_type=CONTENT_TYPES[output]
+        )
+        response["Content-Disposition"] = f'attachment; filename="threat_events.{output}"'
+        return response
 
 
 class EventIndicatorMapViewSet(viewsets.ModelViewSet):
     queryset = EventIndicatorMap.objects.all()
     serializer_class = EventIndicatorMapSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ("id",)
 
 
 class TechniqueUsageViewSet(viewsets.ModelViewSet):
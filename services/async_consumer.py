@@ -0,0 +1,241 @@
+import asyncio
+from typing import Optional
+from messageBroker import AsyncSQSQueue
+from consumer import build_payload
+from config import (
+    EVENTS_ENDPOINT,
+    EVENTS_BULK_ENDPOINT,
+    POLL_INTERVAL,
+    MIN_POLL_INTERVAL,
+    RECEIVE_WAIT_TIME,
+    BATCH_SIZE,
+    USE_BULK_INGEST,
+    HTTP_POOL_SIZE,
+    ASYNC_MAX_IN_FLIGHT,
+    ASYNC_MAX_BATCHES,
+)
+
+try:
+    import httpx
+except ImportError:  # optional dependency, only needed for the async path
+    httpx = None
+
+
+class AsyncThreatEventConsumer:
+    """
+    Asyncio consumer: receive -> transform -> POST -> delete, pipelined.
+
+    The receive loop keeps pulling batches while earlier ones are still
+    being posted, bounded by max_batches outstanding batches and
+    max_in_flight concurrent HTTP requests. Delete/retry semantics match
+    ThreatEventConsumer: only messages the API accepted are deleted.
+    """
+
+    def __init__(
+        self,
+        queue: AsyncSQSQueue,
+        api_endpoint: str = EVENTS_ENDPOINT,
+        poll_interval: float = POLL_INTERVAL,
+        batch_size: int = BATCH_SIZE,
+        bulk_endpoint: str = EVENTS_BULK_ENDPOINT,
+        use_bulk: bool = USE_BULK_INGEST,
+        pool_size: int = HTTP_POOL_SIZE,
+        max_in_flight: int = ASYNC_MAX_IN_FLIGHT,
+        max_batches: int = ASYNC_MAX_BATCHES,
+        wait_time_seconds: float = RECEIVE_WAIT_TIME,
+        min_poll_interval: float = MIN_POLL_INTERVAL,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+    ):
+        if httpx is None:
+            raise RuntimeError("AsyncThreatEventConsumer requires httpx")
+
+        self.queue = queue
+        self.api_endpoint = api_endpoint
+        self.bulk_endpoint = bulk_endpoint
+        self.use_bulk = use_bulk
+        self.poll_interval = poll_interval
+        self.min_poll_interval = min(min_poll_interval, poll_interval)
+        self.wait_time_seconds = wait_time_seconds
+        self.batch_size = batch_size
+        self.pool_size = pool_size
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_batches = max(1, max_batches)
+        self._running = False
+        self._client: Optional["httpx.AsyncClient"] = None
+        # None sends real requests; tests pass an httpx.MockTransport
+        self._transport = transport
+
+        # Stats
+        self.processed_count = 0
+        self.failed_count = 0
+
+    async def _post(self, url: str, payload, timeout: float):
+        async with self._requests:
+            return await self._client.post(url, json=payload, timeout=timeout)
+
+    async def process_message(self, message: dict) -> bool:
+        """
+        Process a single message.
+
+        Returns:
+            True if successful, False if failed
+        """
+        try:
+            payload = build_payload(message)
+            response = await self._post(self.api_endpoint, payload, timeout=10)
+
+            if response.status_code in (200, 201):
+                return True
+            print(f"[AsyncConsumer] API error {response.status_code}: {response.text[:100]}")
+            return False
+
+        except ValueError as e:
+            print(f"[AsyncConsumer] Invalid message: {e}")
+            return False
+        except httpx.HTTPError as e:
+            print(f"[AsyncConsumer] Request failed: {e}")
+            return False
+        except Exception as e:
+            print(f"[AsyncConsumer] Unexpected error: {e}")
+            return False
+
+    async def process_messages_bulk(self, messages: list[dict]) -> list[bool]:
+        """
+        Process a list of messages with one call to the bulk ingest endpoint.
+
+        Returns:
+            One success flag per message, in order
+        """
+        outcomes = [False] * len(messages)
+        payloads = []
+        positions = []
+
+        for i, msg in enumerate(messages):
+            try:
+                payloads.append(build_payload(msg))
+                positions.append(i)
+            except ValueError as e:
+                print(f"[AsyncConsumer] Invalid message: {e}")
+
+        if not payloads:
+            return outcomes
+
+        try:
+            response = await self._post(self.bulk_endpoint, payloads, timeout=30)
+
+            if response.status_code not in (200, 201, 400):
+                print(f"[AsyncConsumer] API error {response.status_code}: {response.text[:100]}")
+                return outcomes
+
+            for item in response.json().get("results", []):
+                if item.get("status") == "created":
+                    outcomes[positions[item["index"]]] = True
+                else:
+                    print(f"[AsyncConsumer] Rejected event: {item.get('errors')}")
+
+        except httpx.HTTPError as e:
+            print(f"[AsyncConsumer] Request failed: {e}")
+        except Exception as e:
+            print(f"[AsyncConsumer] Unexpected error: {e}")
+
+        return outcomes
+
+    async def handle_batch(self, messages: list[dict]) -> dict:
+        """
+        Post one received batch and delete the messages that succeeded.
+
+        Returns:
+            Dict with processed/failed counts
+        """
+        if self.use_bulk:
+            outcomes = await self.process_messages_bulk(messages)
+        else:
+            outcomes = await asyncio.gather(
+                *(self.process_message(msg) for msg in messages)
+            )
+
+        done = [msg["ReceiptHandle"] for msg, ok in zip(messages, outcomes) if ok]
+        if done:
+            await self.queue.delete_message_batch(done)
+
+        processed = len(done)
+        failed = len(messages) - processed
+        self.processed_count += processed
+        self.failed_count += failed
+
+        return {"processed": processed, "failed": failed}
+
+    async def _run_batch(self, messages: list[dict]):
+        try:
+            result = await self.handle_batch(messages)
+            print(
+                f"[AsyncConsumer] Batch: {result['processed']} ok, {result['failed']} failed"
+            )
+        finally:
+            self._batches.release()
+
+    async def start(self):
+        """
+        Run the receive loop until stop() is called, then wait for the
+        batches already received to finish.
+        """
+        self._running = True
+        self._requests = asyncio.Semaphore(self.max_in_flight)
+        self._batches = asyncio.Semaphore(self.max_batches)
+        tasks: set[asyncio.Task] = set()
+        backoff = 0.0
+
+        limits = httpx.Limits(
+            max_connections=self.pool_size, max_keepalive_connections=self.pool_size
+        )
+        endpoint = self.bulk_endpoint if self.use_bulk else self.api_endpoint
+        print(
+            f"[AsyncConsumer] Starting... {self.max_batches} batch(es), "
+            f"{self.max_in_flight} request(s) in flight"
+        )
+        print(f"[AsyncConsumer] Posting to: {endpoint}")
+
+        async with httpx.AsyncClient(
+            limits=limits,
+            headers={"Content-Type": "application/json"},
+            transport=self._transport,
+        ) as client:
+            self._client = client
+            try:
+                while self._running:
+                    await self._batches.acquire()
+                    messages = await self.queue.receive_message(
+                        max_messages=self.batch_size,
+                        wait_time_seconds=self.wait_time_seconds,
+                    )
+
+                    if messages:
+                        backoff = 0.0
+                        task = asyncio.create_task(self._run_batch(messages))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                        continue
+
+                    self._batches.release()
+                    backoff = min(
+                        max(backoff * 2, self.min_poll_interval), self.poll_interval
+                    )
+                    await asyncio.sleep(backoff)
+            finally:
+                if tasks:
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                self._client = None
+
+        print(
+            f"[AsyncConsumer] Stopped. Total: {self.processed_count} processed, {self.failed_count} failed"
+        )
+
+    def stop(self):
+        self._running = False
+
+    async def get_stats(self) -> dict:
+        return {
+            "processed": self.processed_count,
+            "failed": self.failed_count,
+            "queue_size": await self.queue.get_queue_size(),
+        }
@@ -1,6 +1,10 @@
+import os
+from pathlib import Path
+
 # Django API settings
-API_BASE_URL = "http://127.0.0.1:8000"
+API_BASE_URL = os.environ.get("SADTIME_API_URL", "http://127.0.0.1:8000")
 EVENTS_ENDPOINT = f"{API_BASE_URL}/api/threat/events/"
+EVENTS_BULK_ENDPOINT = f"{API_BASE_URL}/api/threat/events/bulk/"
 
 # Queue/Topic names
 TOPIC_NAME = "threat-events"
@@ -8,9 +12,50 @@ QUEUE_NAME = "threat-events-queue"
 DLQ_NAME = "threat-events-dlq"
 
 # Queue settings
+# "sqlite" (multi-process), "segments" (SQLite index + memory-mapped body
+# segments, multi-process), "log" (append-only segments) or "memory"
+QUEUE_BACKEND = os.environ.get("SADTIME_QUEUE_BACKEND", "sqlite")
+# SQLite file behind the topic, queue and DLQ; "segments" keeps the bodies
+# in <stem>_segments/ next to it
+QUEUE_DB_PATH = Path(
+    os.environ.get("SADTIME_QUEUE_DB", Path(__file__).parent / "queue.db")
+)
+QUEUE_LOG_DIR = Path(
+    os.environ.get("SADTIME_QUEUE_LOG_DIR", Path(__file__).parent / "queue_log")
+)  # segment directory for the "log" backend
 VISIBILITY_TIMEOUT = 30  # seconds
 MAX_RECEIVE_COUNT = 3  # retries before DLQ
+# Event field giving a message's priority (higher is delivered first), and
+# the one whose values form message groups that receive_message serves in
+# turn; None disables either
+QUEUE_PRIORITY_FIELD = "confidence"
+QUEUE_GROUP_FIELD = "source"
+# Event fields published as message attributes, which subscription filter
+# policies match against without parsing the body
+MESSAGE_ATTRIBUTE_FIELDS = ("indicator_type", "source", "related_technique", "confidence")
+QUEUE_RETENTION_PERIOD = 4 * 24 * 3600  # seconds, SQS's default
+DLQ_RETENTION_PERIOD = 14 * 24 * 3600  # seconds, SQS's maximum
+
+# Queue maintenance (retention expiry and space reclamation)
+MAINTENANCE_INTERVAL = 60  # seconds between runs
+MAINTENANCE_BATCH_SIZE = 1000  # messages expired per write
+MAINTENANCE_MAX_BATCHES = 10  # batches per queue per run
+MAINTENANCE_VACUUM_PAGES = 2000  # free pages returned to the filesystem per run
 
 # Consumer settings
-POLL_INTERVAL = 2  # seconds between polls
+POLL_INTERVAL = 2  # max idle backoff between polls (seconds)
+MIN_POLL_INTERVAL = 0.1  # first idle backoff step (seconds)
+RECEIVE_WAIT_TIME = 5  # long-poll wait per receive (seconds)
 BATCH_SIZE = 10  # messages per poll
+USE_BULK_INGEST = True  # one API call per batch instead of per message
+HTTP_POOL_SIZE = 10  # keep-alive connections to the API
+MAX_IN_FLIGHT = 10  # concurrent POSTs per batch (per-message mode)
+
+# Consumer pool settings (run_consumer.py --workers N)
+CONSUMER_WORKERS = 1
+WORKER_RESTART_DELAY = 1  # seconds before restarting a crashed worker
+WORKER_SHUTDOWN_TIMEOUT = 30  # seconds to finish in-flight batches on SIGTERM
+
+# Async consumer settings (run_async_consumer.py)
+ASYNC_MAX_IN_FLIGHT = 200  # concurrent POSTs across all batches
+ASYNC_MAX_BATCHES = 100  # received batches being processed at once
@@ -1,8 +1,53 @@
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 import requests
+from requests.adapters import HTTPAdapter
 from messageBroker import SQSQueue
-from config import EVENTS_ENDPOINT, POLL_INTERVAL, BATCH_SIZE
+from normalize import normalize_indicator
+from config import (
+    EVENTS_ENDPOINT,
+    EVENTS_BULK_ENDPOINT,
+    POLL_INTERVAL,
+    MIN_POLL_INTERVAL,
+    RECEIVE_WAIT_TIME,
+    BATCH_SIZE,
+    USE_BULK_INGEST,
+    HTTP_POOL_SIZE,
+    MAX_IN_FLIGHT,
+)
+
+
+def build_payload(message: dict) -> dict:
+    """
+    Transform a queue message into the API payload, normalizing the indicator.
+
+    Raises:
+        ValueError if the message body is not a JSON object
+        (json.JSONDecodeError, a ValueError, if it is not valid JSON)
+    """
+    body = json.loads(message["Body"])
+    if not isinstance(body, dict):
+        raise ValueError(f"Expected a JSON object, got {type(body).__name__}")
+
+    indicator = body.get("indicator")
+    if isinstance(indicator, str):
+        try:
+            indicator = normalize_indicator(indicator, body.get("indicator_type"))
+        except ValueError:
+            # Sent as-is; the API rejects it with a per-item error
+            pass
+
+    return {
+        "timestamp": body.get("timestamp"),
+        "source": body.get("source", "unknown"),
+        "raw_indicator": indicator,
+        "indicator_type": body.get("indicator_type"),
+        "related_technique": body.get("related_technique"),
+        "confidence": body.get("confidence"),
+        "metadata_json": body.get("metadata", {}),
+    }
 
 
 class ThreatEventConsumer:
@@ -16,17 +61,43 @@ class ThreatEventConsumer:
         api_endpoint: str = EVENTS_ENDPOINT,
         poll_interval: float = POLL_INTERVAL,
         batch_size: int = BATCH_SIZE,
+        bulk_endpoint: str = EVENTS_BULK_ENDPOINT,
+        use_bulk: bool = USE_BULK_INGEST,
+        pool_size: int = HTTP_POOL_SIZE,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        wait_time_seconds: float = RECEIVE_WAIT_TIME,
+        min_poll_interval: float = MIN_POLL_INTERVAL,
+        on_batch: Optional[Callable[[dict], None]] = None,
     ):
         self.queue = queue
         self.api_endpoint = api_endpoint
+        self.bulk_endpoint = bulk_endpoint
+        self.use_bulk = use_bulk
         self.poll_interval = poll_interval
+        self.min_poll_interval = min(min_poll_interval, poll_interval)
+        self.wait_time_seconds = wait_time_seconds
         self.batch_size = batch_size
+        self.on_batch = on_batch
+        self.max_in_flight = max(1, max_in_flight)
         self._running = False
 
+        # Keep-alive connections reused across messages and batches
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight, thread_name_prefix="consumer-post"
+        )
+
         # Stats
         self.processed_count = 0
         self.failed_count = 0
 
+    def build_payload(self, message: dict) -> dict:
+        return build_payload(message)
+
     def process_message(self, message: dict) -> bool:
         """
         Process a single message.
@@ -35,24 +106,9 @@ class ThreatEventConsumer:
             True if successful, False if failed
         """
         try:
-            body = json.loads(message["Body"])
-
-            payload = {
-                "timestamp": body.get("timestamp"),
-                "source": body.get("source", "unknown"),
-                "raw_indicator": body.get("indicator"),
-                "indicator_type": body.get("indicator_type"),
-                "related_technique": body.get("related_technique"),
-                "confidence": body.get("confidence"),
-                "metadata_json": body.get("metadata", {}),
-            }
-
-            response = requests.post(
-                self.api_endpoint,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=10,
-            )
+            payload = self.build_payload(message)
+
+            response = self.session.post(self.api_endpoint, json=payload, timeout=10)
 
             if response.status_code in (200, 201):
                 print(f"[Consumer] Created event: {payload['raw_indicator']}")
@@ -63,8 +119,8 @@ class ThreatEventConsumer:
                 )
                 return False
 
-        except json.JSONDecodeError as e:
-            print(f"[Consumer] Invalid JSON: {e}")
+        except ValueError as e:
+            print(f"[Consumer] Invalid message: {e}")
             return False
         except requests.RequestException as e:
             print(f"[Consumer] Request failed: {e}")
@@ -73,6 +129,50 @@ class ThreatEventConsumer:
             print(f"[Consumer] Unexpected error: {e}")
             return False
 
+    def process_messages_bulk(self, messages: list[dict]) -> list[bool]:
+        """
+        Process a list of messages with one call to the bulk ingest endpoint.
+
+        Returns:
+            One success flag per message, in order
+        """
+        outcomes = [False] * len(messages)
+        payloads = []
+        positions = []
+
+        for i, msg in enumerate(messages):
+            try:
+                payloads.append(self.build_payload(msg))
+                positions.append(i)
+            except ValueError as e:
+                # Left unacknowledged, so it reaches the DLQ after max_receive_count
+                print(f"[Consumer] Invalid message: {e}")
+
+        if not payloads:
+            return outcomes
+
+        try:
+            response = self.session.post(self.bulk_endpoint, json=payloads, timeout=30)
+
+            if response.status_code not in (200, 201, 400):
+                print(
+                    f"[Consumer] API error {response.status_code}: {response.text[:100]}"
+                )
+                return outcomes
+
+            for item in response.json().get("results", []):
+                if item.get("status") == "created":
+                    outcomes[positions[item["index"]]] = True
+                else:
+                    print(f"[Consumer] Rejected event: {item.get('errors')}")
+
+        except requests.RequestException as e:
+            print(f"[Consumer] Request failed: {e}")
+        except Exception as e:
+            print(f"[Consumer] Unexpected error: {e}")
+
+        return outcomes
+
     def process_batch(self) -> dict:
         """
         Process one batch of messages.
@@ -80,24 +180,29 @@ class ThreatEventConsumer:
         Returns:
             Dict with processed/failed counts
         """
-        messages = self.queue.receive_message(max_messages=self.batch_size)
+        messages = self.queue.receive_message(
+            max_messages=self.batch_size, wait_time_seconds=self.wait_time_seconds
+        )
 
         if not messages:
             return {"processed": 0, "failed": 0}
 
-        processed = 0
-        failed = 0
+        if self.use_bulk:
+            outcomes = self.process_messages_bulk(messages)
+        elif self.max_in_flight > 1 and len(messages) > 1:
+            # Post concurrently; map() keeps results in message order
+            outcomes = list(self._executor.map(self.process_message, messages))
+        else:
+            outcomes = [self.process_message(msg) for msg in messages]
 
-        for msg in messages:
-            success = self.process_message(msg)
+        done = [msg["ReceiptHandle"] for msg, ok in zip(messages, outcomes) if ok]
+        if done:
+            self.queue.delete_message_batch(done)
 
-            if success:
-                self.queue.delete_message(msg["ReceiptHandle"])
-                processed += 1
-                self.processed_count += 1
-            else:
-                failed += 1
-                self.failed_count += 1
+        processed = len(done)
+        failed = len(messages) - processed
+        self.processed_count += processed
+        self.failed_count += failed
 
         return {"processed": processed, "failed": failed}
 
@@ -105,31 +210,55 @@ class ThreatEventConsumer:
         """
         Start the consumer loop. Blocks forever.
         Use Ctrl+C to stop.
+
+        A non-empty batch is followed immediately by the next (long-polling)
+        receive. The loop only sleeps when the queue came back empty,
+        doubling the pause from min_poll_interval up to poll_interval.
         """
         self._running = True
-        print(f"[Consumer] Starting... polling every {self.poll_interval}s")
-        print(f"[Consumer] Posting to: {self.api_endpoint}")
+        backoff = 0.0
+        print(
+            f"[Consumer] Starting... long-polling {self.wait_time_seconds}s, "
+            f"idle backoff up to {self.poll_interval}s"
+        )
+        endpoint = self.bulk_endpoint if self.use_bulk else self.api_endpoint
+        print(f"[Consumer] Posting to: {endpoint}")
 
         try:
             while self._running:
                 result = self.process_batch()
+                handled = result["processed"] + result["failed"]
 
-                if result["processed"] or result["failed"]:
+                if handled:
                     print(
                         f"[Consumer] Batch: {result['processed']} ok, {result['failed']} failed"
                     )
+                    if self.on_batch:
+                        self.on_batch(result)
+                    backoff = 0.0
+                    continue
 
-                time.sleep(self.poll_interval)
+                backoff = min(
+                    max(backoff * 2, self.min_poll_interval), self.poll_interval
+                )
+                time.sleep(backoff)
 
         except KeyboardInterrupt:
             print(
                 f"\n[Consumer] Stopped. Total: {self.processed_count} processed, {self.failed_count} failed"
             )
             self._running = False
+        finally:
+            self.close()
 
     def stop(self):
         self._running = False
 
+    def close(self):
+        """Release the HTTP connection pool and dispatch threads."""
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
     def get_stats(self) -> dict:
         return {
             "processed": self.processed_count,
@@ -0,0 +1,161 @@
+import signal
+import time
+import multiprocessing
+from multiprocessing.sharedctypes import Synchronized
+from producer import ThreatEventProducer
+from consumer import ThreatEventConsumer
+from messageBroker import BACKENDS
+from config import QUEUE_BACKEND, WORKER_RESTART_DELAY, WORKER_SHUTDOWN_TIMEOUT
+
+
+def _run_worker(
+    worker_id: int,
+    processed: Synchronized,
+    failed: Synchronized,
+    consumer_kwargs: dict,
+):
+    """
+    Entry point of a worker process. Runs one consumer until SIGTERM,
+    which lets the current batch finish before the loop exits.
+    """
+    # Ctrl+C reaches the whole process group; the supervisor decides
+    # when workers stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    def record(result: dict):
+        with processed.get_lock():
+            processed.value += result["processed"]
+        with failed.get_lock():
+            failed.value += result["failed"]
+
+    queue = ThreatEventProducer().get_queue()
+    consumer = ThreatEventConsumer(queue, on_batch=record, **consumer_kwargs)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: consumer.stop())
+
+    print(f"[Worker {worker_id}] Started")
+    consumer.start()
+    print(f"[Worker {worker_id}] Stopped")
+
+
+class ConsumerPool:
+    """
+    Supervises N consumer worker processes on the same queue.
+    - Restarts workers that exit unexpectedly
+    - SIGTERM/SIGINT: workers finish their in-flight batch, then exit
+    - Aggregates processed/failed counts across workers
+    - Runs queue maintenance (retention, vacuum) from the supervisor loop,
+      so no thread is alive in the supervisor when it forks a worker
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        restart_delay: float = WORKER_RESTART_DELAY,
+        shutdown_timeout: float = WORKER_SHUTDOWN_TIMEOUT,
+        **consumer_kwargs,
+    ):
+        if not BACKENDS[QUEUE_BACKEND].multiprocess:
+            raise ValueError(
+                f"The {QUEUE_BACKEND!r} queue backend is single-process; "
+                "use the sqlite backend for a consumer pool"
+            )
+        self.workers = workers
+        self.restart_delay = restart_delay
+        self.shutdown_timeout = shutdown_timeout
+        self.consumer_kwargs = consumer_kwargs
+        self._stopping = False
+
+        # Per-slot counters survive worker restarts
+        self._processed = [multiprocessing.Value("q", 0) for _ in range(workers)]
+        self._failed = [multiprocessing.Value("q", 0) for _ in range(workers)]
+        self._processes: list[multiprocessing.Process | None] = [None] * workers
+        self.restart_count = 0
+
+    def _spawn(self, slot: int):
+        process = multiprocessing.Process(
+            target=_run_worker,
+            args=(
+                slot,
+                self._processed[slot],
+                self._failed[slot],
+                self.consumer_kwargs,
+            ),
+            name=f"consumer-worker-{slot}",
+        )
+        process.start()
+        self._processes[slot] = process
+
+    def _handle_signal(self, signum, frame):
+        self._stopping = True
+
+    def start(self):
+        """
+        Start all workers and supervise them. Blocks until SIGTERM/SIGINT.
+        """
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+        maintenance = ThreatEventProducer().get_maintenance()
+
+        print(f"[Pool] Starting {self.workers} worker(s)")
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        while not self._stopping:
+            try:
+                maintenance.run_if_due()
+            except Exception as e:
+                print(f"[Pool] Queue maintenance failed: {e}")
+            for slot, process in enumerate(self._processes):
+                if process.is_alive() or self._stopping:
+                    continue
+                print(
+                    f"[Pool] Worker {slot} exited with code {process.exitcode}, restarting"
+                )
+                time.sleep(self.restart_delay)
+                if not self._stopping:
+                    self.restart_count += 1
+                    self._spawn(slot)
+            time.sleep(0.5)
+
+        self.shutdown()
+
+    def shutdown(self):
+        """Ask workers to finish their batch, then wait for them."""
+        self._stopping = True
+        print("[Pool] Shutting down, waiting for in-flight batches...")
+
+        for process in self._processes:
+            if process is not None and process.is_alive():
+                process.terminate()  # SIGTERM
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in self._processes:
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f"[Pool] {process.name} did not stop in time, killing")
+                process.kill()
+                process.join()
+
+        stats = self.get_stats()
+        print(
+            f"[Pool] Stopped. Total: {stats['processed']} processed, {stats['failed']} failed"
+        )
+
+    def get_stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for p in self._processes if p is not None and p.is_alive()),
+            "restarts": self.restart_count,
+            "processed": sum(v.value for v in self._processed),
+            "failed": sum(v.value for v in self._failed),
+            "per_worker": [
+                {"processed": p.value, "failed": f.value}
+                for p, f in zip(self._processed, self._failed)
+            ],
+            "queue_size": ThreatEventProducer().get_queue().get_queue_size(),
+            "maintenance": ThreatEventProducer().get_maintenance().get_stats(),
+        }
@@ -1,5 +1,32 @@
 from .sns_topic import SNSTopic
+from .filter_policy import compile_filter_policy
 from .sqs_queue import SQSQueue
 from .dlq import create_dlq
+from .maintenance import QueueMaintenance
+from .async_broker import AsyncSNSTopic, AsyncSQSQueue
+from .backends import (
+    BACKENDS,
+    MemoryBackend,
+    QueueBackend,
+    SegmentLogBackend,
+    SQLiteBackend,
+    SQLiteSegmentBackend,
+    create_backend,
+)
 
-__all__ = ["SNSTopic", "SQSQueue", "create_dlq"]
+__all__ = [
+    "SNSTopic",
+    "compile_filter_policy",
+    "SQSQueue",
+    "create_dlq",
+    "QueueMaintenance",
+    "AsyncSNSTopic",
+    "AsyncSQSQueue",
+    "BACKENDS",
+    "QueueBackend",
+    "MemoryBackend",
+    "SQLiteBackend",
+    "SegmentLogBackend",
+    "SQLiteSegmentBackend",
+    "create_backend",
+]
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+from .filter_policy import Matcher, compile_filter_policy, filter_batch
+from .sqs_queue import SQSQueue, LONG_POLL_INTERVAL
+
+
+class AsyncSQSQueue:
+    """
+    Asyncio front end for an SQSQueue.
+    All sqlite work runs on one dedicated thread, which owns the queue's
+    persistent connection, so the event loop never blocks on disk.
+    """
+
+    def __init__(self, queue: SQSQueue):
+        self.queue = queue
+        self.name = queue.name
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"sqs-{queue.name}"
+        )
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(func, *args, **kwargs)
+        )
+
+    async def send_message(
+        self, body: str, priority: int = 0, group: Optional[str] = None
+    ) -> str:
+        return await self._run(self.queue.send_message, body, priority, group)
+
+    async def send_message_batch(
+        self,
+        bodies: list[str],
+        priorities: Optional[list[int]] = None,
+        groups: Optional[list[Optional[str]]] = None,
+    ) -> list[str]:
+        return await self._run(self.queue.send_message_batch, bodies, priorities, groups)
+
+    async def receive_message(
+        self, max_messages: int = 1, wait_time_seconds: float = 0, raw: bool = False
+    ) -> list[dict]:
+        """
+        Receive messages (raw as in SQSQueue.receive_message). Long polls
+        wait on the event loop rather than on the sqlite thread, so other
+        queue calls are not held up meanwhile.
+        """
+        deadline = time.monotonic() + wait_time_seconds
+
+        while True:
+            received = await self._run(self.queue.receive_message, max_messages, raw=raw)
+            remaining = deadline - time.monotonic()
+            if received or remaining <= 0:
+                return received
+            await asyncio.sleep(min(LONG_POLL_INTERVAL, remaining))
+
+    async def delete_message(self, receipt_handle: str) -> bool:
+        return await self._run(self.queue.delete_message, receipt_handle)
+
+    async def delete_message_batch(self, receipt_handles: list[str]) -> dict:
+        return await self._run(self.queue.delete_message_batch, receipt_handles)
+
+    async def get_queue_size(self) -> dict:
+        return await self._run(self.queue.get_queue_size)
+
+    async def purge(self):
+        await self._run(self.queue.purge)
+
+    async def close(self):
+        """Close the sqlite connection on its own thread and stop the thread."""
+        await self._run(self.queue.close)
+        self._executor.shutdown(wait=True)
+
+
+class AsyncSNSTopic:
+    """
+    Asyncio mock SNS topic. Fans out concurrently to all subscribed queues
+    whose filter policy matches (see SNSTopic).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._subscriptions: dict[AsyncSQSQueue, Optional[Matcher]] = {}
+
+    def subscribe(self, queue: AsyncSQSQueue, filter_policy: Optional[dict] = None):
+        """Subscribe an async SQS queue to this topic, optionally filtered."""
+        matcher = compile_filter_policy(filter_policy)
+        if queue not in self._subscriptions:
+            print(f"[SNS:{self.name}] Queue '{queue.name}' subscribed")
+        self._subscriptions[queue] = matcher
+
+    def unsubscribe(self, queue: AsyncSQSQueue):
+        """Unsubscribe an async SQS queue from this topic."""
+        if queue in self._subscriptions:
+            del self._subscriptions[queue]
+            print(f"[SNS:{self.name}] Queue '{queue.name}' unsubscribed")
+
+    async def publish(
+        self,
+        message: str,
+        priority: int = 0,
+        group: Optional[str] = None,
+        attributes: Optional[dict] = None,
+    ) -> int:
+        """
+        Publish a message to the subscribers whose filter policy matches.
+        Returns number of queues that received the message.
+        """
+        attributes = attributes or {}
+        queues = [
+            queue
+            for queue, matches in self._subscriptions.items()
+            if matches is None or matches(attributes)
+        ]
+        await asyncio.gather(*(q.send_message(message, priority, group) for q in queues))
+        return len(queues)
+
+    async def publish_batch(
+        self,
+        messages: list[str],
+        priorities: Optional[list[int]] = None,
+        groups: Optional[list[Optional[str]]] = None,
+        attributes: Optional[list[dict]] = None,
+    ) -> int:
+        """
+        Publish a list of messages to all subscribers, one write per queue
+        holding the messages its filter policy matches.
+        Returns number of queues that received any of the messages.
+        """
+        if not messages:
+            return 0
+
+        writes = []
+        for queue, matches in self._subscriptions.items():
+            batch = filter_batch(matches, messages, priorities, groups, attributes)
+            if batch is not None:
+                writes.append(queue.send_message_batch(*batch))
+        await asyncio.gather(*writes)
+        return len(writes)
+
+    def get_subscriber_count(self) -> int:
+        return len(self._subscriptions)
@@ -0,0 +1,43 @@
+from pathlib import Path
+from typing import Optional
+
+from .base import ClaimedMessage, DeadLetter, QueueBackend
+from .memory import MemoryBackend
+from .segment_log import DEFAULT_LOG_DIR, SegmentLogBackend
+from .segments import SQLiteSegmentBackend
+from .sqlite import DEFAULT_DB_PATH, SQLiteBackend
+
+BACKENDS = {
+    "memory": MemoryBackend,
+    "sqlite": SQLiteBackend,
+    "log": SegmentLogBackend,
+    "segments": SQLiteSegmentBackend,
+}
+
+
+def create_backend(kind: str, path: Optional[Path] = None, **options) -> QueueBackend:
+    """
+    Build a queue backend by name: "memory", "sqlite", "log" or "segments".
+    `path` is the SQLite file (sqlite, segments) or the log directory (log);
+    memory ignores it.
+    """
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown queue backend {kind!r}, expected one of {list(BACKENDS)}")
+    if kind == "memory":
+        return MemoryBackend(**options)
+    if path is None:
+        path = DEFAULT_LOG_DIR if kind == "log" else DEFAULT_DB_PATH
+    return BACKENDS[kind](path, **options)
+
+
+__all__ = [
+    "BACKENDS",
+    "ClaimedMessage",
+    "DeadLetter",
+    "QueueBackend",
+    "MemoryBackend",
+    "SQLiteBackend",
+    "SegmentLogBackend",
+    "SQLiteSegmentBackend",
+    "create_backend",
+]
@@ -0,0 +1,105 @@
+from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional, Union
+
+
+class ClaimedMessage(NamedTuple):
+    id: str
+    body: Union[str, bytes, memoryview]  # UTF-8 bytes or a view from "segments"
+    receive_count: int
+    receipt_handle: str
+
+
+class DeadLetter(NamedTuple):
+    id: str
+    body: Union[str, bytes, memoryview]
+
+
+class QueueBackend(ABC):
+    """
+    Storage behind SQSQueue. One backend instance can hold many named
+    queues (a queue and its DLQ usually share one).
+
+    SQSQueue owns the queue semantics (long polling, DLQ forwarding, the
+    SQS-shaped message dicts); a backend only stores messages and claims
+    them atomically. Implementations must guarantee that:
+    - claim() hands each visible message to at most one caller
+    - claim() serves message groups in turn, one message per group, and
+      within a group returns the highest priority first, then send order
+      (so a queue without priorities or groups is FIFO)
+    - a message claimed max_receive_count times is returned as a dead letter
+      by the next claim() instead of being claimed again, and moved to the
+      dead_letter_queue in the same atomic step when one is named
+    - delete() only matches the receipt handle of the latest claim
+    """
+
+    # Whether several processes may open the same storage at once
+    multiprocess = False
+
+    @abstractmethod
+    def send(
+        self,
+        queue_name: str,
+        bodies: list[str],
+        priorities: Optional[list[int]] = None,
+        groups: Optional[list[Optional[str]]] = None,
+    ) -> list[str]:
+        """
+        Append messages, with an optional priority (higher is delivered
+        first, default 0) and message group (default: none) for each.
+        Returns their ids.
+        """
+
+    @abstractmethod
+    def claim(
+        self,
+        queue_name: str,
+        max_messages: int,
+        now: float,
+        visibility_timeout: float,
+        max_receive_count: int,
+        dead_letter_queue: Optional[str] = None,
+    ) -> tuple[list[ClaimedMessage], list[DeadLetter]]:
+        """
+        Make up to max_messages visible messages invisible until
+        now + visibility_timeout, and remove exhausted ones. With
+        dead_letter_queue set, exhausted messages are moved to that queue
+        of this backend instead, as part of the same claim, so a crash can
+        never lose them in between.
+
+        Returns:
+            (claimed messages in delivery order, removed dead letters)
+        """
+
+    @abstractmethod
+    def delete(self, queue_name: str, receipt_handles: list[str]) -> set[str]:
+        """Delete claimed messages. Returns the handles that matched."""
+
+    @abstractmethod
+    def counts(self, queue_name: str, now: float) -> tuple[int, int]:
+        """Returns (visible, in_flight) message counts."""
+
+    @abstractmethod
+    def expire(self, queue_name: str, sent_before: float, limit: int) -> int:
+        """
+        Delete up to `limit` of the oldest messages sent before
+        `sent_before`, claimed or not. Returns how many were deleted.
+        """
+
+    @abstractmethod
+    def purge(self, queue_name: str):
+        """Delete every message in the queue."""
+
+    def reclaim(self, max_pages: int) -> int:
+        """Return free space to the filesystem. Returns pages released."""
+        return 0
+
+    def storage_bytes(self) -> int:
+        """Disk space currently used by the backend's files."""
+        return 0
+
+    def close(self):
+        """
+        Release storage handles. The scope is the backend's: the SQLite
+        backends close the calling thread's connection, the log backend
+        closes every file.
+        """
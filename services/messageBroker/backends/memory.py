@@ -0,0 +1,284 @@
+import heapq
+import itertools
+from collections import deque
+import threading
+import time
+import uuid
+from typing import Any, Optional
+
+from .base import ClaimedMessage, DeadLetter, QueueBackend
+
+
+class _Message:
+    __slots__ = (
+        "id",
+        "seq",
+        "payload",
+        "sent_at",
+        "priority",
+        "group",
+        "receive_count",
+        "visible_after",
+        "receipt_handle",
+        "in_flight",
+    )
+
+    def __init__(
+        self,
+        msg_id: str,
+        seq: int,
+        payload: Any,
+        sent_at: float,
+        priority: int = 0,
+        group: str = "",
+    ):
+        self.id = msg_id
+        self.seq = seq
+        self.payload = payload
+        self.sent_at = sent_at
+        self.priority = priority
+        self.group = group
+        self.receive_count = 0
+        self.visible_after = 0.0
+        self.receipt_handle = None
+        self.in_flight = False
+
+
+class _QueueState:
+    """
+    One queue's messages. Each message group has a heap of its visible
+    messages, highest priority then lowest send sequence first; groups
+    with visible messages take turns in `rotation`. Claimed messages sit in
+    a heap ordered by visibility deadline and move back when it passes;
+    `in_flight_count` counts them. Heap entries are not removed on delete
+    or re-claim; stale ones are skipped when they surface.
+    """
+
+    def __init__(self):
+        self.messages: dict[str, _Message] = {}
+        self.handles: dict[str, _Message] = {}
+        self.ready: dict[str, list[tuple[int, int, str]]] = {}
+        self.rotation: deque[str] = deque()
+        self.in_flight: list[tuple[float, int, str, str]] = []
+        self.in_flight_count = 0
+
+    def make_ready(self, message: _Message):
+        heap = self.ready.get(message.group)
+        if heap is None:
+            heap = self.ready[message.group] = []
+            self.rotation.append(message.group)
+        heapq.heappush(heap, (-message.priority, message.seq, message.id))
+
+    def release_expired(self, now: float):
+        while self.in_flight and self.in_flight[0][0] <= now:
+            _, seq, msg_id, handle = heapq.heappop(self.in_flight)
+            message = self.messages.get(msg_id)
+            if message is not None and message.receipt_handle == handle:
+                message.in_flight = False
+                self.in_flight_count -= 1
+                self.make_ready(message)
+
+    def next_ready(self) -> Optional[_Message]:
+        """Pop the head of the next group in turn; None when nothing is visible."""
+        while self.rotation:
+            group = self.rotation.popleft()
+            heap = self.ready[group]
+            message = None
+            while heap and message is None:
+                message = self.messages.get(heapq.heappop(heap)[2])
+            if heap:
+                self.rotation.append(group)
+            else:
+                del self.ready[group]
+            if message is not None:
+                return message
+        return None
+
+
+class MemoryBackend(QueueBackend):
+    """
+    Queue storage in process memory, for single-process tests and
+    benchmarks. Each operation costs O(log n) per message it touches
+    (counts() is O(1) plus the messages whose visibility timeout has
+    passed), under one short-held lock; nothing survives the process.
+
+    Subclasses can keep message bodies elsewhere by overriding _store,
+    _load and _forget, and persist receive counts through _claimed; the
+    queue bookkeeping stays here.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues: dict[str, _QueueState] = {}
+        self._seq = itertools.count()
+
+    def _queue(self, queue_name: str) -> _QueueState:
+        state = self._queues.get(queue_name)
+        if state is None:
+            state = self._queues.setdefault(queue_name, _QueueState())
+        return state
+
+    # Storage hooks
+
+    def _store(
+        self,
+        queue_name: str,
+        msg_ids: list[str],
+        bodies: list[str],
+        priorities: list[int],
+        groups: list[str],
+    ) -> list:
+        """Persist messages; returns one payload per body to keep in memory."""
+        return bodies
+
+    def _load(self, queue_name: str, payload) -> str:
+        return payload
+
+    def _forget(self, queue_name: str, payloads: list):
+        """Called once the messages holding these payloads are gone."""
+
+    def _claimed(self, queue_name: str, payloads: list):
+        """Called before the messages holding these payloads are handed out."""
+
+    # QueueBackend
+
+    def send(
+        self,
+        queue_name: str,
+        bodies: list[str],
+        priorities: Optional[list[int]] = None,
+        groups: Optional[list[Optional[str]]] = None,
+    ) -> list[str]:
+        msg_ids = [str(uuid.uuid4()) for _ in bodies]
+        priorities = priorities or [0] * len(bodies)
+        groups = [group or "" for group in groups] if groups else [""] * len(bodies)
+        with self._lock:
+            self._append(queue_name, msg_ids, bodies, priorities, groups, time.time())
+        return msg_ids
+
+    def _append(self, queue_name, msg_ids, bodies, priorities, groups, sent_at):
+        """Store and enqueue messages; the caller holds the lock."""
+        state = self._queue(queue_name)
+        payloads = self._store(queue_name, msg_ids, bodies, priorities, groups)
+        for msg_id, payload, priority, group in zip(msg_ids, payloads, priorities, groups):
+            message = _Message(msg_id, next(self._seq), payload, sent_at, priority, group)
+            state.messages[msg_id] = message
+            state.make_ready(message)
+
+    def claim(
+        self,
+        queue_name,
+        max_messages,
+        now,
+        visibility_timeout,
+        max_receive_count,
+        dead_letter_queue=None,
+    ):
+        claim_token = uuid.uuid4().hex
+        claimed = []
+        dead = []
+        with self._lock:
+            state = self._queue(queue_name)
+            state.release_expired(now)
+
+            while len(claimed) < max_messages:
+                message = state.next_ready()
+                if message is None:
+                    break
+                if message.receive_count >= max_receive_count:
+                    self._remove(state, message)
+                    dead.append(message)
+                    continue
+
+                if message.receipt_handle is not None:
+                    state.handles.pop(message.receipt_handle, None)
+                message.receive_count += 1
+                message.visible_after = now + visibility_timeout
+                message.receipt_handle = f"{claim_token}:{message.id}"
+                message.in_flight = True
+                state.in_flight_count += 1
+                state.handles[message.receipt_handle] = message
+                heapq.heappush(
+                    state.in_flight,
+                    (message.visible_after, message.seq, message.id, message.receipt_handle),
+                )
+                claimed.append(message)
+
+            if claimed:
+                self._claimed(queue_name, [m.payload for m in claimed])
+            result = (
+                [
+                    ClaimedMessage(
+                        m.id,
+                        self._load(queue_name, m.payload),
+                        m.receive_count,
+                        m.receipt_handle,
+                    )
+                    for m in claimed
+                ],
+                [DeadLetter(m.id, self._load(queue_name, m.payload)) for m in dead],
+            )
+            if dead:
+                if dead_letter_queue is not None:
+                    # Stored in the dead letter queue before they are
+                    # forgotten here, so a crash can duplicate, never lose
+                    self._append(
+                        dead_letter_queue,
+                        [m.id for m in dead],
+                        [letter.body for letter in result[1]],
+                        [m.priority for m in dead],
+                        [m.group for m in dead],
+                        now,
+                    )
+                self._forget(queue_name, [m.payload for m in dead])
+        return result
+
+    def _remove(self, state: _QueueState, message: _Message):
+        del state.messages[message.id]
+        if message.in_flight:
+            state.in_flight_count -= 1
+        if message.receipt_handle is not None:
+            state.handles.pop(message.receipt_handle, None)
+
+    def delete(self, queue_name: str, receipt_handles: list[str]) -> set[str]:
+        deleted = set()
+        removed = []
+        with self._lock:
+            state = self._queue(queue_name)
+            for handle in receipt_handles:
+                message = state.handles.get(handle)
+                if message is not None:
+                    self._remove(state, message)
+                    deleted.add(handle)
+                    removed.append(message.payload)
+            if removed:
+                self._forget(queue_name, removed)
+        return deleted
+
+    def counts(self, queue_name: str, now: float) -> tuple[int, int]:
+        with self._lock:
+            state = self._queue(queue_name)
+            state.release_expired(now)
+            in_flight = state.in_flight_count
+            return len(state.messages) - in_flight, in_flight
+
+    def expire(self, queue_name: str, sent_before: float, limit: int) -> int:
+        expired = []
+        with self._lock:
+            state = self._queue(queue_name)
+            # messages is in send order, so the oldest come first
+            for message in state.messages.values():
+                if len(expired) >= limit or message.sent_at >= sent_before:
+                    break
+                expired.append(message)
+            for message in expired:
+                self._remove(state, message)
+            if expired:
+                self._forget(queue_name, [m.payload for m in expired])
+        return len(expired)
+
+    def purge(self, queue_name: str):
+        with self._lock:
+            state = self._queues.pop(queue_name, None)
+            if state is not None:
+                self._forget(queue_name, [m.payload for m in state.messages.values()])
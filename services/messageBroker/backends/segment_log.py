@@ -0,0 +1,311 @@
+import os
+import struct
+import threading
+from collections import Counter
+from pathlib import Path
+
+from .memory import MemoryBackend, _Message
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; the directory lock is skipped
+    fcntl = None
+
+DEFAULT_LOG_DIR = Path(__file__).parent.parent.parent / "queue_log"
+
+# A new segment file is started once the active one passes this size
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+
+# Rewrite a queue's ack or receive file once it grows past this many bytes
+ACK_COMPACT_BYTES = 4 * 1024 * 1024
+
+# Segment record: body length, message id (uuid4 text), priority, group
+# key length, then the group key and the body
+RECORD_HEADER = struct.Struct("<I36siH")
+# Ack record: segment number and offset of the deleted message's body.
+# Receive records have the same layout, one per claim of the message.
+ACK_RECORD = struct.Struct("<IQ")
+
+
+def _read_records(path: Path) -> list[tuple[int, int]]:
+    """(segment, offset) records of an ack or receive log, minus a torn tail."""
+    if not path.exists():
+        return []
+    data = path.read_bytes()
+    usable = len(data) - len(data) % ACK_RECORD.size
+    return list(ACK_RECORD.iter_unpack(data[:usable]))
+
+
+class _QueueLog:
+    """Segment files, ack log and receive log of one queue."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.live: dict[int, int] = {}  # segment number -> undeleted messages
+        self.readers: dict[int, int] = {}  # segment number -> read fd
+        self.active = 0
+        self.writer = None
+        self.size = 0
+        self.acks = None
+        self.receives = None
+
+    def segment_path(self, number: int) -> Path:
+        return self.directory / f"{number:010d}.log"
+
+
+class SegmentLogBackend(MemoryBackend):
+    """
+    Queue storage as append-only segment files, for high write rates.
+
+    Bodies are appended to the active segment of each queue (one buffered
+    write per send batch) and read back by (segment, offset). Deletes are
+    appended to an ack log and every claim to a receive log. Visibility
+    and receipt handles are kept in memory by MemoryBackend, so on restart
+    every unacknowledged message is visible again; its receive count is
+    rebuilt from the receive log, so a message that keeps crashing its
+    consumer still reaches max_receive_count and the DLQ.
+    A segment is deleted as soon as every message in it is acknowledged.
+
+    One process owns a log directory at a time; use the SQLite backend for
+    consumer pools.
+    """
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_LOG_DIR,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        fsync: bool = False,
+    ):
+        super().__init__()
+        self.directory = Path(directory)
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self._logs: dict[str, _QueueLog] = {}
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock_file = open(self.directory / ".lock", "w")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._lock_file.close()
+                raise RuntimeError(
+                    f"Queue log {self.directory} is in use by another process"
+                ) from None
+
+    # Recovery
+
+    def _queue(self, queue_name: str):
+        state = self._queues.get(queue_name)
+        if state is None:
+            state = super()._queue(queue_name)
+            self._recover(queue_name, state)
+        return state
+
+    def _recover(self, queue_name: str, state):
+        """Rebuild a queue from its segments, skipping acknowledged messages."""
+        log = _QueueLog(self.directory / queue_name)
+        log.directory.mkdir(exist_ok=True)
+        self._logs[queue_name] = log
+
+        ack_path = log.directory / "acks.log"
+        receive_path = log.directory / "receives.log"
+        acked = set(_read_records(ack_path))
+        receives = Counter(_read_records(receive_path))
+
+        segments = sorted(int(path.stem) for path in log.directory.glob("*.log") if path.stem.isdigit())
+        for number in segments:
+            path = log.segment_path(number)
+            data = path.read_bytes()
+            # Send times are not logged; the segment's last write stands in,
+            # so recovered messages are never expired early
+            sent_at = path.stat().st_mtime
+            offset = 0
+            live = 0
+            while offset + RECORD_HEADER.size <= len(data):
+                length, raw_id, priority, group_length = RECORD_HEADER.unpack_from(
+                    data, offset
+                )
+                group_start = offset + RECORD_HEADER.size
+                start = group_start + group_length
+                if start + length > len(data):
+                    break  # torn write at the tail
+                if (number, start) not in acked:
+                    msg_id = raw_id.decode("ascii")
+                    message = _Message(
+                        msg_id,
+                        next(self._seq),
+                        (number, start, length),
+                        sent_at,
+                        priority,
+                        data[group_start:start].decode("utf-8"),
+                    )
+                    message.receive_count = receives[(number, start)]
+                    state.messages[msg_id] = message
+                    state.make_ready(message)
+                    live += 1
+                offset = start + length
+
+            if live or number == segments[-1]:
+                log.live[number] = live
+            else:
+                log.segment_path(number).unlink()
+            # Drop a torn tail so new records start on a record boundary
+            if number == segments[-1] and offset < len(data):
+                os.truncate(log.segment_path(number), offset)
+
+        if segments:
+            log.active = segments[-1]
+        self._open_writer(log, log.active)
+        log.acks = open(ack_path, "ab")
+        log.receives = open(receive_path, "ab")
+
+    def _open_writer(self, log: _QueueLog, number: int):
+        previous = None
+        if log.writer is not None:
+            log.writer.close()
+            previous = log.active
+        log.active = number
+        log.live.setdefault(number, 0)
+        log.writer = open(log.segment_path(number), "ab")
+        log.size = log.writer.tell()
+        # _forget keeps the active segment; one fully acknowledged while it
+        # was active goes once the writer has moved on
+        if previous is not None and previous != number and log.live.get(previous) == 0:
+            self._drop_segment(log, previous)
+
+    # Storage hooks
+
+    def _store(
+        self,
+        queue_name: str,
+        msg_ids: list[str],
+        bodies: list[str],
+        priorities: list[int],
+        groups: list[str],
+    ) -> list:
+        log = self._logs[queue_name]
+        if log.size >= self.segment_size:
+            self._open_writer(log, log.active + 1)
+
+        chunks = []
+        payloads = []
+        offset = log.size
+        for msg_id, body, priority, group in zip(msg_ids, bodies, priorities, groups):
+            data = body.encode("utf-8")
+            group_key = group.encode("utf-8")
+            chunks.append(
+                RECORD_HEADER.pack(
+                    len(data), msg_id.encode("ascii"), priority, len(group_key)
+                )
+            )
+            chunks.append(group_key)
+            chunks.append(data)
+            offset += RECORD_HEADER.size + len(group_key)
+            payloads.append((log.active, offset, len(data)))
+            offset += len(data)
+
+        log.writer.write(b"".join(chunks))
+        log.writer.flush()
+        if self.fsync:
+            os.fsync(log.writer.fileno())
+        log.size = offset
+        log.live[log.active] += len(payloads)
+        return payloads
+
+    def _load(self, queue_name: str, payload) -> str:
+        number, offset, length = payload
+        log = self._logs[queue_name]
+        fd = log.readers.get(number)
+        if fd is None:
+            fd = log.readers[number] = os.open(log.segment_path(number), os.O_RDONLY)
+        return os.pread(fd, length, offset).decode("utf-8")
+
+    def _forget(self, queue_name: str, payloads: list):
+        log = self._logs[queue_name]
+        log.acks.write(
+            b"".join(ACK_RECORD.pack(number, offset) for number, offset, _ in payloads)
+        )
+        log.acks.flush()
+
+        for number, _, _ in payloads:
+            log.live[number] -= 1
+            if log.live[number] == 0 and number != log.active:
+                self._drop_segment(log, number)
+
+        if log.acks.tell() > ACK_COMPACT_BYTES:
+            log.acks = self._compact(log, log.acks, "acks.log")
+
+    def _claimed(self, queue_name: str, payloads: list):
+        log = self._logs[queue_name]
+        log.receives.write(
+            b"".join(ACK_RECORD.pack(number, offset) for number, offset, _ in payloads)
+        )
+        log.receives.flush()
+        if self.fsync:
+            os.fsync(log.receives.fileno())
+
+        if log.receives.tell() > ACK_COMPACT_BYTES:
+            log.receives = self._compact(log, log.receives, "receives.log")
+
+    def _drop_segment(self, log: _QueueLog, number: int):
+        del log.live[number]
+        fd = log.readers.pop(number, None)
+        if fd is not None:
+            os.close(fd)
+        log.segment_path(number).unlink()
+
+    def _compact(self, log: _QueueLog, file, name: str):
+        """
+        Rewrite an ack or receive log without entries for dropped segments.
+        Returns the reopened file.
+        """
+        path = log.directory / name
+        file.close()
+        data = path.read_bytes()
+        kept = b"".join(
+            ACK_RECORD.pack(number, offset)
+            for number, offset in ACK_RECORD.iter_unpack(data)
+            if number in log.live
+        )
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(kept)
+        os.replace(tmp, path)
+        return open(path, "ab")
+
+    # QueueBackend
+
+    def storage_bytes(self) -> int:
+        with self._lock:
+            return sum(
+                path.stat().st_size for path in self.directory.rglob("*") if path.is_file()
+            )
+
+    def purge(self, queue_name: str):
+        with self._lock:
+            self._queue(queue_name)
+            self._queues.pop(queue_name)
+            log = self._logs.pop(queue_name)
+            for number in list(log.live):
+                fd = log.readers.pop(number, None)
+                if fd is not None:
+                    os.close(fd)
+                log.segment_path(number).unlink(missing_ok=True)
+            log.writer.close()
+            log.acks.close()
+            log.receives.close()
+            (log.directory / "acks.log").unlink(missing_ok=True)
+            (log.directory / "receives.log").unlink(missing_ok=True)
+
+    def close(self):
+        """Close every file; the backend must not be used afterwards."""
+        with self._lock:
+            for log in self._logs.values():
+                for fd in log.readers.values():
+                    os.close(fd)
+                log.writer.close()
+                log.acks.close()
+                log.receives.close()
+            self._logs.clear()
+            self._queues.clear()
+            self._lock_file.close()
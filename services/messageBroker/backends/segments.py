@@ -0,0 +1,386 @@
+import mmap
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from .base import ClaimedMessage, DeadLetter
+from .sqlite import DEFAULT_DB_PATH, DELETE_CHUNK_SIZE, SQLiteBackend
+
+# Every segment file is pre-sized to this many bytes (sparse until written)
+DEFAULT_SEGMENT_SIZE = 16 * 1024 * 1024
+
+SQL_TAIL = "SELECT number, tail FROM segments ORDER BY number DESC LIMIT 1"
+SQL_NEW_SEGMENT = "INSERT INTO segments (number, live, tail) VALUES (?, 0, 0)"
+SQL_ADVANCE = "UPDATE segments SET live = live + ?, tail = ? WHERE number = ?"
+SQL_RELEASE = "UPDATE segments SET live = live - ? WHERE number = ?"
+# Empty segments other than the one being appended to
+SQL_DROP_EMPTY = """
+    DELETE FROM segments
+    WHERE live <= 0 AND number < (SELECT MAX(number) FROM segments)
+    RETURNING number
+"""
+SQL_INSERT = """
+    INSERT INTO message_refs
+        (id, queue_name, segment, offset, length, priority, group_key)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_DELETE_BATCH = """
+    DELETE FROM message_refs INDEXED BY idx_refs_receipt_handle
+    WHERE queue_name = ? AND receipt_handle IN ({placeholders})
+    RETURNING receipt_handle, segment
+"""
+SQL_COUNT_VISIBLE = (
+    "SELECT COUNT(*) FROM message_refs WHERE queue_name = ? AND visible_after <= ?"
+)
+SQL_COUNT_IN_FLIGHT = (
+    "SELECT COUNT(*) FROM message_refs WHERE queue_name = ? AND visible_after > ?"
+)
+SQL_PURGE = "DELETE FROM message_refs WHERE queue_name = ? RETURNING segment"
+SQL_EXPIRE_RETAINED = """
+    DELETE FROM message_refs
+    WHERE id IN (
+        SELECT id FROM message_refs
+        WHERE queue_name = ? AND created_at < ?
+        ORDER BY created_at, rowid
+        LIMIT ?
+    )
+    RETURNING segment
+"""
+
+
+class SegmentStore:
+    """
+    Fixed-size segment files, memory-mapped (MAP_SHARED) so every process
+    sees the others' appends. Allocation of space is serialized by the
+    caller (the SQLite write lock); this class only maps, writes and
+    slices.
+    """
+
+    def __init__(self, directory: Path, segment_size: int):
+        self.directory = Path(directory)
+        self.segment_size = segment_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._maps: dict[int, mmap.mmap] = {}
+        # Maps of dropped segments still referenced by a memoryview
+        self._retired: list[mmap.mmap] = []
+
+    def path(self, number: int) -> Path:
+        return self.directory / f"{number:010d}.seg"
+
+    def map(self, number: int) -> mmap.mmap:
+        segment = self._maps.get(number)
+        if segment is not None:
+            return segment
+        with self._lock:
+            segment = self._maps.get(number)
+            if segment is None:
+                fd = os.open(self.path(number), os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    if os.fstat(fd).st_size < self.segment_size:
+                        os.ftruncate(fd, self.segment_size)
+                    segment = mmap.mmap(fd, self.segment_size)
+                finally:
+                    os.close(fd)
+                self._maps[number] = segment
+                self._release_retired()
+        return segment
+
+    def write(self, number: int, offset: int, data: bytes):
+        self.map(number)[offset : offset + len(data)] = data
+
+    def view(self, number: int, offset: int, length: int) -> memoryview:
+        """Zero-copy slice of a stored body."""
+        return memoryview(self.map(number))[offset : offset + length]
+
+    def disk_bytes(self) -> int:
+        """Allocated size of the segment files (they are sparse)."""
+        total = 0
+        for path in self.directory.glob("*.seg"):
+            try:
+                total += path.stat().st_blocks * 512
+            except FileNotFoundError:
+                pass  # dropped meanwhile
+        return total
+
+    def flush(self, numbers):
+        for number in numbers:
+            self.map(number).flush()
+
+    def drop(self, numbers):
+        """Unmap and delete segments whose messages are all gone."""
+        with self._lock:
+            for number in numbers:
+                segment = self._maps.pop(number, None)
+                if segment is not None:
+                    self._retired.append(segment)
+                self.path(number).unlink(missing_ok=True)
+            self._release_retired()
+
+    def forget_missing(self):
+        """Unmap segments another process has deleted."""
+        with self._lock:
+            for number in [n for n in self._maps if not self.path(n).exists()]:
+                self._retired.append(self._maps.pop(number))
+            self._release_retired()
+
+    def _release_retired(self):
+        still_used = []
+        for segment in self._retired:
+            try:
+                segment.close()
+            except BufferError:
+                # A caller still holds a memoryview into it; retry later
+                still_used.append(segment)
+        self._retired = still_used
+
+    def close(self):
+        self.drop([])
+        with self._lock:
+            self._retired.extend(self._maps.values())
+            self._maps.clear()
+            self._release_retired()
+
+
+class SQLiteSegmentBackend(SQLiteBackend):
+    """
+    SQLite tracks ids, offsets, visibility and receive counts; message
+    bodies live in memory-mapped fixed-size segment files next to the
+    database.
+
+    Bodies are never copied through SQLite: send writes them straight
+    into the mapped segment and claim returns memoryview slices of it.
+    SQSQueue decodes them into the str Body with a single copy, or hands
+    them out as they are from receive_message(raw=True).
+    Each segment counts its undeleted messages; a segment reaching zero is
+    deleted as a whole, so disk use follows the backlog instead of growing
+    with every message ever sent. Safe across processes like SQLiteBackend,
+    because space is allocated under the SQLite write lock.
+    """
+
+    _table = "message_refs"
+    _claim_returning = "id, segment, offset, length, receive_count, receipt_handle"
+    _dead_letter_returning = "id, segment, offset, length"
+
+    def __init__(
+        self,
+        db_path: Path = DEFAULT_DB_PATH,
+        segment_dir: Optional[Path] = None,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        fsync: bool = False,
+    ):
+        db_path = Path(db_path)
+        self.store = SegmentStore(
+            segment_dir or db_path.with_name(f"{db_path.stem}_segments"), segment_size
+        )
+        self.fsync = fsync
+        self._checks = 0
+        super().__init__(db_path)
+
+    def _init_db(self):
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS message_refs (
+                    id TEXT PRIMARY KEY,
+                    queue_name TEXT NOT NULL,
+                    segment INTEGER NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    group_key TEXT NOT NULL DEFAULT '',
+                    receive_count INTEGER DEFAULT 0,
+                    visible_after REAL DEFAULT 0,
+                    created_at REAL DEFAULT (strftime('%s', 'now')),
+                    receipt_handle TEXT
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS segments (
+                    number INTEGER PRIMARY KEY,
+                    live INTEGER NOT NULL DEFAULT 0,
+                    tail INTEGER NOT NULL DEFAULT 0
+                )
+            """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_refs_visible ON message_refs (queue_name, visible_after)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_refs_order ON message_refs (queue_name, created_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_refs_receives ON message_refs (queue_name, receive_count)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_refs_receipt_handle ON message_refs (receipt_handle)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_refs_claim "
+                "ON message_refs (queue_name, group_key, priority DESC, created_at)"
+            )
+
+    def send(
+        self,
+        queue_name: str,
+        bodies: list,
+        priorities: Optional[list[int]] = None,
+        groups: Optional[list[Optional[str]]] = None,
+    ) -> list[str]:
+        encoded = [
+            body.encode("utf-8") if isinstance(body, str) else bytes(body)
+            for body in bodies
+        ]
+        for data in encoded:
+            if len(data) > self.store.segment_size:
+                raise ValueError(
+                    f"Message of {len(data)} bytes exceeds the segment size "
+                    f"({self.store.segment_size} bytes)"
+                )
+        msg_ids = [str(uuid.uuid4()) for _ in encoded]
+        priorities = priorities or [0] * len(encoded)
+        groups = groups or [None] * len(encoded)
+
+        with self._transaction() as conn:
+            row = conn.execute(SQL_TAIL).fetchone()
+            if row is None:
+                conn.execute(SQL_NEW_SEGMENT, (0,))
+                number, tail = 0, 0
+            else:
+                number, tail = row["number"], row["tail"]
+
+            refs = []
+            added = 0
+            touched = {number}
+            for msg_id, data, priority, group in zip(msg_ids, encoded, priorities, groups):
+                if tail + len(data) > self.store.segment_size:
+                    conn.execute(SQL_ADVANCE, (added, tail, number))
+                    number, tail, added = number + 1, 0, 0
+                    conn.execute(SQL_NEW_SEGMENT, (number,))
+                    touched.add(number)
+                self.store.write(number, tail, data)
+                refs.append(
+                    (msg_id, queue_name, number, tail, len(data), priority, group or "")
+                )
+                tail += len(data)
+                added += 1
+
+            conn.execute(SQL_ADVANCE, (added, tail, number))
+            conn.executemany(SQL_INSERT, refs)
+            if self.fsync:
+                self.store.flush(touched)
+        return msg_ids
+
+    def claim(
+        self,
+        queue_name,
+        max_messages,
+        now,
+        visibility_timeout,
+        max_receive_count,
+        dead_letter_queue=None,
+    ):
+        claim_token = uuid.uuid4().hex
+
+        with self._transaction() as conn:
+            dead_rows = self._dead_letter_rows(
+                conn, queue_name, max_messages, now, max_receive_count, dead_letter_queue
+            )
+            # Copied: their segment may be dropped before the DLQ stores them
+            dead_letters = [
+                DeadLetter(
+                    row["id"],
+                    bytes(self.store.view(row["segment"], row["offset"], row["length"])),
+                )
+                for row in dead_rows
+            ]
+            # Moved messages keep their bodies where they are
+            dropped = (
+                self._release(conn, [row["segment"] for row in dead_rows])
+                if dead_letter_queue is None
+                else []
+            )
+
+            ids = self._claimable_ids(conn, queue_name, max_messages, now, max_receive_count)
+            rows = self._claim_rows(conn, ids, now, visibility_timeout, claim_token)
+
+        self.store.drop(dropped)
+        self._periodic_check()
+
+        return (
+            [
+                ClaimedMessage(
+                    row["id"],
+                    self.store.view(row["segment"], row["offset"], row["length"]),
+                    row["receive_count"],
+                    row["receipt_handle"],
+                )
+                for row in rows
+            ],
+            dead_letters,
+        )
+
+    def _release(self, conn, segments: list[int]) -> list[int]:
+        """Decrement live counts; returns segments that are now empty."""
+        if not segments:
+            return []
+        released: dict[int, int] = {}
+        for number in segments:
+            released[number] = released.get(number, 0) + 1
+        conn.executemany(SQL_RELEASE, [(n, number) for number, n in released.items()])
+        return [row[0] for row in conn.execute(SQL_DROP_EMPTY)]
+
+    def _periodic_check(self):
+        # Other processes drop segments too; unmap those now and then so
+        # their disk space is actually released
+        self._checks += 1
+        if self._checks % 256 == 0:
+            self.store.forget_missing()
+
+    def delete(self, queue_name: str, receipt_handles: list[str]) -> set[str]:
+        deleted = set()
+        segments = []
+        with self._transaction() as conn:
+            for i in range(0, len(receipt_handles), DELETE_CHUNK_SIZE):
+                chunk = receipt_handles[i : i + DELETE_CHUNK_SIZE]
+                sql = SQL_DELETE_BATCH.format(placeholders=", ".join("?" * len(chunk)))
+                for handle, segment in conn.execute(sql, (queue_name, *chunk)):
+                    deleted.add(handle)
+                    segments.append(segment)
+            dropped = self._release(conn, segments)
+        self.store.drop(dropped)
+        return deleted
+
+    def counts(self, queue_name: str, now: float) -> tuple[int, int]:
+        conn = self._connect()
+        visible = conn.execute(SQL_COUNT_VISIBLE, (queue_name, now)).fetchone()[0]
+        in_flight = conn.execute(SQL_COUNT_IN_FLIGHT, (queue_name, now)).fetchone()[0]
+        return visible, in_flight
+
+    def purge(self, queue_name: str):
+        with self._transaction() as conn:
+            segments = [row[0] for row in conn.execute(SQL_PURGE, (queue_name,))]
+            dropped = self._release(conn, segments)
+        self.store.drop(dropped)
+
+    def expire(self, queue_name: str, sent_before: float, limit: int) -> int:
+        with self._transaction() as conn:
+            segments = [
+                row[0]
+                for row in conn.execute(
+                    SQL_EXPIRE_RETAINED, (queue_name, sent_before, limit)
+                )
+            ]
+            dropped = self._release(conn, segments)
+        self.store.drop(dropped)
+        return len(segments)
+
+    def storage_bytes(self) -> int:
+        return super().storage_bytes() + self.store.disk_bytes()
+
+    def segment_count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM segments").fetchone()[0]
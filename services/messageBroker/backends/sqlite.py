@@ -0,0 +1,466 @@
+import bisect
+import itertools
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from .base import ClaimedMessage, DeadLetter, QueueBackend
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent.parent / "queue.db"
+
+# PRAGMA auto_vacuum value for INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Receipt handles per DELETE statement, below SQLite's bound-parameter limit
+DELETE_CHUNK_SIZE = 500
+
+# Applied to every connection. WAL lets readers run alongside the single
+# writer, and NORMAL sync is durable across process crashes in WAL mode.
+# journal_size_limit truncates the WAL file after each checkpoint instead
+# of leaving it at its largest size.
+CONNECTION_PRAGMAS = (
+    # Only takes effect on a new file, and must come before the switch to
+    # WAL; an existing one is converted by enable_incremental_vacuum()
+    "PRAGMA auto_vacuum = INCREMENTAL",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA journal_size_limit = 67108864",
+)
+
+# Statements are kept as constants so sqlite3's statement cache reuses the
+# compiled form on every call of a persistent connection.
+SQL_INSERT = """
+    INSERT INTO messages (id, queue_name, body, priority, group_key)
+    VALUES (?, ?, ?, ?, ?)
+"""
+# Dead-letter the visible messages that have used up their receives. The
+# unary +s keep the planner on idx_queue_receives, which holds only the
+# few exhausted rows in range, even when ANALYZE stats favour idx_queue_order.
+SQL_EXPIRE_EXHAUSTED = """
+    DELETE FROM {table}
+    WHERE id IN (
+        SELECT id FROM {table}
+        WHERE queue_name = ? AND receive_count >= ? AND +visible_after <= ?
+        ORDER BY +created_at, +rowid
+        LIMIT ?
+    )
+    RETURNING {returning}
+"""
+# Same selection, but the rows are moved to the dead letter queue as
+# fresh, unclaimed messages, so the move commits together with the claim
+SQL_MOVE_EXHAUSTED = """
+    UPDATE {table}
+    SET queue_name = ?, receive_count = 0, visible_after = 0,
+        receipt_handle = NULL, created_at = ?
+    WHERE id IN (
+        SELECT id FROM {table}
+        WHERE queue_name = ? AND receive_count >= ? AND +visible_after <= ?
+        ORDER BY +created_at, +rowid
+        LIMIT ?
+    )
+    RETURNING {returning}
+"""
+# Claiming serves message groups round robin. The groups present are found
+# with a skip scan of idx_queue_claim (one index seek per group, however
+# many messages each holds), then each group's head is read from the same
+# index in priority, then send order. The unary +s keep the planner on
+# that index so LIMIT stops at the head instead of sorting every visible
+# row. {table} is messages here and message_refs for the segments backend.
+SQL_GROUPS = """
+    WITH RECURSIVE queue_groups(key) AS (
+        SELECT MIN(group_key) FROM {table} WHERE queue_name = ?1
+        UNION ALL
+        SELECT (
+            SELECT MIN(group_key) FROM {table}
+            WHERE queue_name = ?1 AND group_key > queue_groups.key
+        )
+        FROM queue_groups WHERE queue_groups.key IS NOT NULL
+    )
+    SELECT key FROM queue_groups WHERE key IS NOT NULL
+"""
+SQL_GROUP_HEAD = """
+    SELECT id FROM {table}
+    WHERE queue_name = ? AND group_key = ? AND +visible_after <= ? AND +receive_count < ?
+    ORDER BY priority DESC, created_at, rowid
+    LIMIT ?
+"""
+# The last group served per queue lives in the database, so every process
+# claiming from a queue continues the same rotation
+SQL_GET_GROUP_CURSOR = """
+    SELECT group_key FROM group_cursors WHERE message_table = ? AND queue_name = ?
+"""
+SQL_SET_GROUP_CURSOR = """
+    INSERT INTO group_cursors (message_table, queue_name, group_key) VALUES (?, ?, ?)
+    ON CONFLICT (message_table, queue_name) DO UPDATE SET group_key = excluded.group_key
+"""
+# Each claimed row gets a receipt handle built from this receive's claim
+# token, so a delete that arrives after the message was re-delivered no
+# longer matches.
+SQL_CLAIM = """
+    UPDATE {table}
+    SET visible_after = ?,
+        receive_count = receive_count + 1,
+        receipt_handle = ? || ':' || id
+    WHERE id IN ({placeholders})
+    RETURNING {returning}
+"""
+# Unclaimed rows have no handle, so ANALYZE stats can make
+# idx_receipt_handle look useless and the planner walk the whole queue
+# instead; the index is named explicitly
+SQL_DELETE_BATCH = """
+    DELETE FROM messages INDEXED BY idx_receipt_handle
+    WHERE queue_name = ? AND receipt_handle IN ({placeholders})
+    RETURNING receipt_handle
+"""
+SQL_COUNT_VISIBLE = (
+    "SELECT COUNT(*) FROM messages WHERE queue_name = ? AND visible_after <= ?"
+)
+SQL_COUNT_IN_FLIGHT = (
+    "SELECT COUNT(*) FROM messages WHERE queue_name = ? AND visible_after > ?"
+)
+SQL_PURGE = "DELETE FROM messages WHERE queue_name = ?"
+# Retention: drop the oldest messages past their retention period, a
+# bounded batch at a time so the write lock is held briefly
+SQL_EXPIRE_RETAINED = """
+    DELETE FROM messages
+    WHERE id IN (
+        SELECT id FROM messages
+        WHERE queue_name = ? AND created_at < ?
+        ORDER BY created_at, rowid
+        LIMIT ?
+    )
+"""
+
+
+class SQLiteBackend(QueueBackend):
+    """
+    Queue storage in one SQLite file, shared safely between processes.
+
+    Each thread keeps one persistent connection, opened lazily and
+    reopened after a fork so worker processes never share a handle.
+    """
+
+    multiprocess = True
+
+    # Table holding the claimable rows, and the columns a claim returns
+    _table = "messages"
+    _claim_returning = "id, body, receive_count, receipt_handle"
+    _dead_letter_returning = "id, body"
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_db()
+        self._init_group_cursors()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=5.0,
+            isolation_level=None,  # explicit transactions via _transaction()
+            cached_statements=64,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Run a write transaction. BEGIN IMMEDIATE takes the write lock up
+        front so concurrent writers wait on busy_timeout instead of failing
+        on a read-to-write lock upgrade.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        """Close the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+    def incremental_vacuum_enabled(self) -> bool:
+        conn = self._connect()
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL
+
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        Convert a file created without auto_vacuum = INCREMENTAL (files
+        this backend creates have it from the start), so reclaim() can
+        hand free pages back to the filesystem. The VACUUM this takes
+        rewrites the whole file under the write lock, so it is run on
+        request (scripts/vacuum_queue.py), never on open.
+
+        Returns:
+            True if the file was converted, False if it already was
+        """
+        if self.incremental_vacuum_enabled():
+            return False
+        conn = self._connect()
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        # The rewritten file is in the WAL until a checkpoint copies it back
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return True
+
+    def _init_db(self):
+        """Create tables if they don't exist."""
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS messages (
+                    id TEXT PRIMARY KEY,
+                    queue_name TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    receive_count INTEGER DEFAULT 0,
+                    visible_after REAL DEFAULT 0,
+                    created_at REAL DEFAULT (strftime('%s', 'now'))
+                )
+            """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(messages)")}
+            if "receipt_handle" not in columns:
+                conn.execute("ALTER TABLE messages ADD COLUMN receipt_handle TEXT")
+            if "priority" not in columns:
+                conn.execute(
+                    "ALTER TABLE messages ADD COLUMN priority INTEGER NOT NULL DEFAULT 0"
+                )
+            if "group_key" not in columns:
+                conn.execute(
+                    "ALTER TABLE messages ADD COLUMN group_key TEXT NOT NULL DEFAULT ''"
+                )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_queue_visible ON messages (queue_name, visible_after)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_queue_order ON messages (queue_name, created_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_queue_receives ON messages (queue_name, receive_count)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_receipt_handle ON messages (receipt_handle)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_queue_claim "
+                "ON messages (queue_name, group_key, priority DESC, created_at)"
+            )
+
+    def _init_group_cursors(self):
+        """Create the table of last-served groups, shared by every table."""
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS group_cursors (
+                    message_table TEXT NOT NULL,
+                    queue_name TEXT NOT NULL,
+                    group_key TEXT NOT NULL,
+                    PRIMARY KEY (message_table, queue_name)
+                )
+            """
+            )
+
+    def send(
+        self,
+        queue_name: str,
+        bodies: list[str],
+        priorities: Optional[list[int]] = None,
+        groups: Optional[list[Optional[str]]] = None,
+    ) -> list[str]:
+        msg_ids = [str(uuid.uuid4()) for _ in bodies]
+        rows = [
+            (msg_id, queue_name, body, priority, group or "")
+            for msg_id, body, priority, group in zip(
+                msg_ids,
+                bodies,
+                priorities or [0] * len(bodies),
+                groups or [None] * len(bodies),
+            )
+        ]
+        if len(rows) == 1:
+            # Autocommit; no explicit transaction needed for one row
+            self._connect().execute(SQL_INSERT, rows[0])
+        else:
+            with self._transaction() as conn:
+                conn.executemany(SQL_INSERT, rows)
+        return msg_ids
+
+    def _claimable_ids(self, conn, queue_name, max_messages, now, max_receive_count):
+        """
+        Ids to claim, in delivery order: one message per group in turn,
+        starting after the group served last by any process, each group's
+        highest priority first and then oldest first. Groups are read until
+        max_messages of them had visible messages; the rest get their turn
+        on the next claim. Runs inside the claim's write transaction, which
+        also serializes the cursor update.
+        """
+        groups = [
+            row[0]
+            for row in conn.execute(SQL_GROUPS.format(table=self._table), (queue_name,))
+        ]
+        cursor = conn.execute(SQL_GET_GROUP_CURSOR, (self._table, queue_name)).fetchone()
+        if cursor is not None:
+            start = bisect.bisect_right(groups, cursor[0])
+            groups = groups[start:] + groups[:start]
+
+        head_sql = SQL_GROUP_HEAD.format(table=self._table)
+        served = []
+        heads = []
+        for group in groups:
+            head = [
+                row[0]
+                for row in conn.execute(
+                    head_sql, (queue_name, group, now, max_receive_count, max_messages)
+                )
+            ]
+            if head:
+                served.append(group)
+                heads.append(head)
+                if len(heads) == max_messages:
+                    break
+
+        ids = []
+        last_group = None
+        for turn in itertools.zip_longest(*heads):
+            for group, msg_id in zip(served, turn):
+                if msg_id is not None and len(ids) < max_messages:
+                    ids.append(msg_id)
+                    last_group = group
+        if last_group is not None:
+            conn.execute(SQL_SET_GROUP_CURSOR, (self._table, queue_name, last_group))
+        return ids
+
+    def _claim_rows(self, conn, ids, now, visibility_timeout, claim_token):
+        """Mark ids claimed; returns their rows in the order of ids."""
+        if not ids:
+            return []
+        sql = SQL_CLAIM.format(
+            table=self._table,
+            placeholders=", ".join("?" * len(ids)),
+            returning=self._claim_returning,
+        )
+        rows = {
+            row["id"]: row
+            for row in conn.execute(sql, (now + visibility_timeout, claim_token, *ids))
+        }
+        # RETURNING does not guarantee order
+        return [rows[msg_id] for msg_id in ids]
+
+    def _dead_letter_rows(
+        self, conn, queue_name, max_messages, now, max_receive_count, dead_letter_queue
+    ):
+        """Remove exhausted messages, or move them to dead_letter_queue."""
+        params = (queue_name, max_receive_count, now, max_messages)
+        if dead_letter_queue is None:
+            sql = SQL_EXPIRE_EXHAUSTED
+        else:
+            sql = SQL_MOVE_EXHAUSTED
+            params = (dead_letter_queue, now, *params)
+        sql = sql.format(table=self._table, returning=self._dead_letter_returning)
+        return conn.execute(sql, params).fetchall()
+
+    def claim(
+        self,
+        queue_name,
+        max_messages,
+        now,
+        visibility_timeout,
+        max_receive_count,
+        dead_letter_queue=None,
+    ):
+        """
+        Claiming runs under the write lock (BEGIN IMMEDIATE), so two
+        consumers can never be handed the same message.
+        """
+        claim_token = uuid.uuid4().hex
+
+        with self._transaction() as conn:
+            dead_letters = self._dead_letter_rows(
+                conn, queue_name, max_messages, now, max_receive_count, dead_letter_queue
+            )
+
+            ids = self._claimable_ids(conn, queue_name, max_messages, now, max_receive_count)
+            rows = self._claim_rows(conn, ids, now, visibility_timeout, claim_token)
+
+        return (
+            [
+                ClaimedMessage(
+                    row["id"], row["body"], row["receive_count"], row["receipt_handle"]
+                )
+                for row in rows
+            ],
+            [DeadLetter(row["id"], row["body"]) for row in dead_letters],
+        )
+
+    def delete(self, queue_name: str, receipt_handles: list[str]) -> set[str]:
+        deleted = set()
+        with self._transaction() as conn:
+            for i in range(0, len(receipt_handles), DELETE_CHUNK_SIZE):
+                chunk = receipt_handles[i : i + DELETE_CHUNK_SIZE]
+                sql = SQL_DELETE_BATCH.format(placeholders=", ".join("?" * len(chunk)))
+                deleted.update(row[0] for row in conn.execute(sql, (queue_name, *chunk)))
+        return deleted
+
+    def counts(self, queue_name: str, now: float) -> tuple[int, int]:
+        conn = self._connect()
+        visible = conn.execute(SQL_COUNT_VISIBLE, (queue_name, now)).fetchone()[0]
+        in_flight = conn.execute(SQL_COUNT_IN_FLIGHT, (queue_name, now)).fetchone()[0]
+        return visible, in_flight
+
+    def purge(self, queue_name: str):
+        self._connect().execute(SQL_PURGE, (queue_name,))
+
+    def expire(self, queue_name: str, sent_before: float, limit: int) -> int:
+        cursor = self._connect().execute(
+            SQL_EXPIRE_RETAINED, (queue_name, sent_before, limit)
+        )
+        return cursor.rowcount
+
+    def reclaim(self, max_pages: int) -> int:
+        """
+        Release up to max_pages free pages (left by deletes and purges) with
+        an incremental vacuum, then checkpoint so the shrink reaches the
+        main file.
+        """
+        conn = self._connect()
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # Without incremental auto_vacuum the pragma below does nothing;
+        # see enable_incremental_vacuum()
+        if not free or not self.incremental_vacuum_enabled():
+            return 0
+        # incremental_vacuum frees one page per step, and execute() only
+        # steps a statement without result rows once; executescript runs it
+        # to completion
+        conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)})")
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+        return free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def storage_bytes(self) -> int:
+        return sum(
+            path.stat().st_size
+            for path in (Path(self.db_path), Path(f"{self.db_path}-wal"))
+            if path.exists()
+        )
@@ -1,14 +1,30 @@
-from .sqs_queue import SQSQueue
+from pathlib import Path
+from typing import Optional
 
+from config import DLQ_RETENTION_PERIOD
 
-def create_dlq(name: str = "threat-events-dlq") -> SQSQueue:
+from .backends import QueueBackend
+from .sqs_queue import DEFAULT_DB_PATH, SQSQueue
+
+
+def create_dlq(
+    name: str = "threat-events-dlq",
+    db_path: Path = DEFAULT_DB_PATH,
+    backend: Optional[QueueBackend] = None,
+    retention_period: Optional[float] = DLQ_RETENTION_PERIOD,
+) -> SQSQueue:
     """
     Create a dead letter queue.
-    DLQs have no DLQ of their own and higher visibility timeout.
+    DLQs have no DLQ of their own and higher visibility timeout; since
+    nothing deletes from them routinely, they rely on retention to stay
+    bounded.
     """
     return SQSQueue(
         name=name,
         visibility_timeout=300,  # 5 minutes
         max_receive_count=999,  # Effectively no limit
         dead_letter_queue=None,
+        db_path=db_path,
+        backend=backend,
+        retention_period=retention_period,
     )
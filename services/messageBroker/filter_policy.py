@@ -0,0 +1,190 @@
+"""
+SNS-style subscription filter policies over message attributes.
+
+A policy maps attribute names to a list of allowed values; a message
+matches when every named attribute matches at least one entry. Entries
+are exact strings or numbers, or one-key dicts:
+
+    {"prefix": "T1059"}            string starts with
+    {"suffix": ".ru"}              string ends with
+    {"anything-but": [...]}        not one of these values (or a
+                                   {"prefix": ...} dict)
+    {"numeric": [">=", 80]}        comparisons, up to two: [">", 0, "<=", 5]
+    {"exists": True}               attribute present (False: absent)
+
+An attribute whose value is a list matches if any element does.
+compile_filter_policy turns a policy into one plain function once, at
+subscribe time; publishing only calls it.
+"""
+
+import operator
+from typing import Any, Callable, Optional
+
+Attributes = dict[str, Any]
+Matcher = Callable[[Attributes], bool]
+
+NUMERIC_OPERATORS = {
+    "=": operator.eq,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _compile_numeric(spec: list) -> Callable[[Any], bool]:
+    if not spec or len(spec) % 2 or len(spec) > 4:
+        raise ValueError(f"numeric takes one or two operator/value pairs, got {spec!r}")
+    checks = []
+    for op, bound in zip(spec[::2], spec[1::2]):
+        if op not in NUMERIC_OPERATORS or not _is_number(bound):
+            raise ValueError(f"Invalid numeric condition {op!r} {bound!r}")
+        checks.append((NUMERIC_OPERATORS[op], bound))
+    if len(checks) == 1:
+        ((compare, bound),) = checks
+        return lambda value: _is_number(value) and compare(value, bound)
+    (low, low_bound), (high, high_bound) = checks
+    return lambda value: (
+        _is_number(value) and low(value, low_bound) and high(value, high_bound)
+    )
+
+
+def _compile_anything_but(spec) -> Callable[[Any], bool]:
+    if isinstance(spec, dict):
+        if set(spec) != {"prefix"}:
+            raise ValueError(f"anything-but only nests prefix, got {spec!r}")
+        prefix = spec["prefix"]
+        return lambda value: not (isinstance(value, str) and value.startswith(prefix))
+    excluded = frozenset(spec if isinstance(spec, list) else [spec])
+    return lambda value: value not in excluded
+
+
+def _compile_attribute(name: str, rules: list) -> Matcher:
+    """
+    One attribute's rules as a single function. Exact values become one
+    set lookup and all prefixes (suffixes) one str.startswith (endswith)
+    call, so matching costs about the same however many rules there are.
+    """
+    if not isinstance(rules, list) or not rules:
+        raise ValueError(f"Filter for {name!r} must be a non-empty list")
+
+    exact = set()
+    prefixes = []
+    suffixes = []
+    predicates = []
+    match_present = False  # {"exists": true}
+    match_absent = False  # {"exists": false}
+    for rule in rules:
+        if isinstance(rule, (str, int, float)) and not isinstance(rule, bool):
+            exact.add(rule)
+            continue
+        if not isinstance(rule, dict) or len(rule) != 1:
+            raise ValueError(f"Filter rule must be a value or a one-key dict, got {rule!r}")
+        ((kind, spec),) = rule.items()
+
+        if kind == "prefix" and isinstance(spec, str):
+            prefixes.append(spec)
+        elif kind == "suffix" and isinstance(spec, str):
+            suffixes.append(spec)
+        elif kind == "anything-but":
+            predicates.append(_compile_anything_but(spec))
+        elif kind == "numeric":
+            predicates.append(_compile_numeric(spec))
+        elif kind == "exists" and isinstance(spec, bool):
+            match_present = match_present or spec
+            match_absent = match_absent or not spec
+        else:
+            raise ValueError(f"Invalid filter rule {rule!r}")
+
+    if prefixes:
+        starts = tuple(prefixes)
+        predicates.append(lambda value: isinstance(value, str) and value.startswith(starts))
+    if suffixes:
+        ends = tuple(suffixes)
+        predicates.append(lambda value: isinstance(value, str) and value.endswith(ends))
+    exact = frozenset(exact)
+
+    def value_matches(value) -> bool:
+        # 1 == 1.0 hash alike, so numeric exact values compare numerically
+        try:
+            if value in exact:
+                return True
+        except TypeError:  # unhashable attribute value
+            pass
+        for predicate in predicates:
+            if predicate(value):
+                return True
+        return False
+
+    def matches(attributes: Attributes) -> bool:
+        value = attributes.get(name)
+        if value is None:
+            return match_absent
+        if match_present:
+            return True
+        if value.__class__ is list:
+            for item in value:
+                if value_matches(item):
+                    return True
+            return False
+        return value_matches(value)
+
+    return matches
+
+
+def compile_filter_policy(policy: Optional[dict]) -> Optional[Matcher]:
+    """
+    Compile a filter policy into a function of a message's attributes.
+    Returns None for no policy (everything matches).
+
+    Raises:
+        ValueError if the policy is malformed
+    """
+    if not policy:
+        return None
+    if not isinstance(policy, dict):
+        raise ValueError(f"Filter policy must be a dict, got {type(policy).__name__}")
+
+    matchers = tuple(_compile_attribute(name, rules) for name, rules in policy.items())
+    if len(matchers) == 1:
+        return matchers[0]
+
+    def matches(attributes: Attributes) -> bool:
+        for match in matchers:
+            if not match(attributes):
+                return False
+        return True
+
+    return matches
+
+
+def filter_batch(
+    matches: Optional[Matcher],
+    messages: list[str],
+    priorities: Optional[list[int]],
+    groups: Optional[list[Optional[str]]],
+    attributes: Optional[list[Attributes]],
+) -> Optional[tuple[list[str], Optional[list[int]], Optional[list[Optional[str]]]]]:
+    """
+    The (messages, priorities, groups) of a publish batch that one
+    subscription receives, or None if it receives none of them.
+    """
+    if matches is None:
+        return messages, priorities, groups
+
+    selected = [
+        i for i, attrs in enumerate(attributes or [{}] * len(messages)) if matches(attrs)
+    ]
+    if not selected:
+        return None
+    if len(selected) == len(messages):
+        return messages, priorities, groups
+    return (
+        [messages[i] for i in selected],
+        None if priorities is None else [priorities[i] for i in selected],
+        None if groups is None else [groups[i] for i in selected],
+    )
@@ -0,0 +1,126 @@
+import threading
+import time
+from typing import Optional
+
+from .sqs_queue import SQSQueue
+
+
+class QueueMaintenance:
+    """
+    Periodic housekeeping for a set of queues: expires messages past each
+    queue's retention period, then returns freed space to the filesystem.
+
+    Expiry runs in batches of batch_size, at most max_batches per queue per
+    run, so one run never holds the write lock for long; a backlog of
+    expired messages is worked off over several runs. Each backend (queues
+    usually share one) is reclaimed once per run, vacuum_pages at a time.
+
+    Use start() for a background thread, or call run_if_due() from an
+    existing loop where a thread is unwelcome (e.g. before forking).
+    """
+
+    def __init__(
+        self,
+        queues: list[SQSQueue],
+        interval: float = 60,
+        batch_size: int = 1000,
+        max_batches: int = 10,
+        vacuum_pages: int = 2000,
+    ):
+        self.queues = queues
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.vacuum_pages = vacuum_pages
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_run = 0.0
+        self._runs = 0
+        self._last_duration = 0.0
+        self._max_duration = 0.0
+        self._expired = {queue.name: 0 for queue in queues}
+        self._reclaimed_pages = 0
+
+    def run_once(self) -> dict:
+        """Run one maintenance pass. Returns what it did."""
+        started = time.perf_counter()
+
+        expired = {}
+        for queue in self.queues:
+            total = 0
+            for _ in range(self.max_batches):
+                count = queue.expire_messages(self.batch_size)
+                total += count
+                if count < self.batch_size:
+                    break
+            expired[queue.name] = total
+
+        backends = {id(queue.backend): queue.backend for queue in self.queues}
+        reclaimed = sum(backend.reclaim(self.vacuum_pages) for backend in backends.values())
+
+        duration = time.perf_counter() - started
+        with self._lock:
+            self._runs += 1
+            self._last_duration = duration
+            self._max_duration = max(self._max_duration, duration)
+            for name, count in expired.items():
+                self._expired[name] += count
+            self._reclaimed_pages += reclaimed
+
+        if any(expired.values()) or reclaimed:
+            print(
+                f"[Maintenance] Expired {sum(expired.values())} message(s), "
+                f"reclaimed {reclaimed} page(s) in {duration * 1000:.1f}ms"
+            )
+        return {"expired": expired, "reclaimed_pages": reclaimed, "duration": duration}
+
+    def run_if_due(self) -> Optional[dict]:
+        """Run a pass if interval seconds have passed since the last one."""
+        now = time.monotonic()
+        if now < self._next_run:
+            return None
+        self._next_run = now + self.interval
+        return self.run_once()
+
+    def start(self):
+        """Run maintenance every interval seconds on a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="queue-maintenance", daemon=True
+        )
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                # A busy database or full disk must not end maintenance
+                print(f"[Maintenance] Run failed: {e}")
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def get_stats(self) -> dict:
+        backends = {id(queue.backend): queue.backend for queue in self.queues}
+        with self._lock:
+            stats = {
+                "runs": self._runs,
+                "last_duration": self._last_duration,
+                "max_duration": self._max_duration,
+                "expired": dict(self._expired),
+                "reclaimed_pages": self._reclaimed_pages,
+            }
+        stats["queues"] = {queue.name: queue.get_queue_size() for queue in self.queues}
+        stats["storage_bytes"] = sum(
+            backend.storage_bytes() for backend in backends.values()
+        )
+        return stats
@@ -1,40 +1,109 @@
-from .sqs_queue import SQSQueue
+from typing import Optional, Protocol
+
+from .filter_policy import Matcher, compile_filter_policy, filter_batch
+
+
+class Subscriber(Protocol):
+    """Anything that accepts messages like an SQSQueue, whatever its backend."""
+
+    name: str
+
+    def send_message(
+        self, body: str, priority: int = 0, group: Optional[str] = None
+    ) -> str: ...
+
+    def send_message_batch(
+        self,
+        bodies: list[str],
+        priorities: Optional[list[int]] = None,
+        groups: Optional[list[Optional[str]]] = None,
+    ) -> list[str]: ...
 
 
 class SNSTopic:
     """
     Mock SNS topic with:
-    - Subscriber registry (SQS queues)
-    - Broadcast to all subscribers
+    - Subscriber registry (SQS queues on any backend)
+    - Broadcast to all subscribers, or to those whose filter policy
+      matches the message attributes
     """
 
     def __init__(self, name: str):
         self.name = name
-        self._subscribers: list[SQSQueue] = []
+        # Subscriber -> compiled filter policy (None delivers everything)
+        self._subscriptions: dict[Subscriber, Optional[Matcher]] = {}
+
+    def subscribe(self, queue: Subscriber, filter_policy: Optional[dict] = None):
+        """
+        Subscribe an SQS queue to this topic. With a filter_policy (see
+        filter_policy.py) the queue only receives messages whose attributes
+        match it. Subscribing again replaces the policy.
 
-    def subscribe(self, queue: SQSQueue):
-        """Subscribe an SQS queue to this topic."""
-        if queue not in self._subscribers:
-            self._subscribers.append(queue)
+        Raises:
+            ValueError if the filter policy is malformed
+        """
+        matcher = compile_filter_policy(filter_policy)
+        if queue not in self._subscriptions:
             print(f"[SNS:{self.name}] Queue '{queue.name}' subscribed")
+        self._subscriptions[queue] = matcher
 
-    def unsubscribe(self, queue: SQSQueue):
+    def unsubscribe(self, queue: Subscriber):
         """Unsubscribe an SQS queue from this topic."""
-        if queue in self._subscribers:
-            self._subscribers.remove(queue)
+        if queue in self._subscriptions:
+            del self._subscriptions[queue]
             print(f"[SNS:{self.name}] Queue '{queue.name}' unsubscribed")
 
-    def publish(self, message: str) -> int:
+    def publish(
+        self,
+        message: str,
+        priority: int = 0,
+        group: Optional[str] = None,
+        attributes: Optional[dict] = None,
+    ) -> int:
         """
-        Publish a message to all subscribers.
+        Publish a message to every subscriber whose filter policy matches
+        its attributes, with the priority and message group each queue
+        should deliver it by. Attributes travel beside the body, so
+        filtering never parses it.
         Returns number of queues that received the message.
         """
+        attributes = attributes or {}
         count = 0
-        for queue in self._subscribers:
-            queue.send_message(message)
+        for queue, matches in self._subscriptions.items():
+            if matches is not None and not matches(attributes):
+                continue
+            queue.send_message(message, priority, group)
             count += 1
         print(f"[SNS:{self.name}] Published to {count} subscriber(s)")
         return count
 
+    def publish_batch(
+        self,
+        messages: list[str],
+        priorities: Optional[list[int]] = None,
+        groups: Optional[list[Optional[str]]] = None,
+        attributes: Optional[list[dict]] = None,
+    ) -> int:
+        """
+        Publish a list of messages to all subscribers.
+        Each subscriber receives the messages its filter policy matches in
+        a single write. priorities, groups and attributes, if given, hold
+        one entry per message.
+        Returns number of queues that received any of the messages.
+        """
+        if not messages:
+            return 0
+
+        count = 0
+        for queue, matches in self._subscriptions.items():
+            batch = filter_batch(matches, messages, priorities, groups, attributes)
+            if batch is not None:
+                queue.send_message_batch(*batch)
+                count += 1
+        print(
+            f"[SNS:{self.name}] Published {len(messages)} message(s) to {count} subscriber(s)"
+        )
+        return count
+
     def get_subscriber_count(self) -> int:
-        return len(self._subscribers)
+        return len(self._subscriptions)
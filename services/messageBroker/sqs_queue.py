@@ -1,17 +1,42 @@
 import time
-import threading
-import uuid
-import sqlite3
 from typing import Optional
 from pathlib import Path
 
+from .backends import DEFAULT_DB_PATH, QueueBackend, SQLiteBackend
 
-DEFAULT_DB_PATH = Path(__file__).parent.parent / "queue.db"
+# How often a long poll re-checks the queue while waiting for messages
+LONG_POLL_INTERVAL = 0.05  # seconds
+
+
+def _text(body) -> str:
+    # The segments backend hands out UTF-8 views of its mapped files
+    return body if isinstance(body, str) else str(body, "utf-8")
 
 
 class SQSQueue:
     """
-    Mock SQS queue backed by SQLite for cross-process persistence.
+    Mock SQS queue on top of a pluggable storage backend (see backends/).
+
+    Defaults to SQLiteBackend at db_path, which persists across processes.
+    A queue and its DLQ should share one backend instance: the backend then
+    moves dead letters to the DLQ atomically with the claim that finds
+    them. With a DLQ on another backend they are sent on after the claim
+    commits, and a crash in between loses them.
+
+    Messages can carry a priority (higher first, default 0) and a message
+    group, e.g. the feed they came from. receive_message serves groups in
+    turn, so one busy group cannot starve the others, and within a group
+    hands out the highest priority first, then the oldest. Without either
+    the queue is plain FIFO.
+
+    Body is a str, whatever the backend stores. Callers that can work on
+    bytes pass raw=True to receive_message to get the stored body without
+    the decode: with the "segments" backend that is a memoryview into the
+    mapped segment file, so the body is never copied.
+
+    retention_period works like SQS's MessageRetentionPeriod: messages
+    older than that many seconds are deleted by expire_messages(), which a
+    QueueMaintenance task calls periodically. None keeps them forever.
     """
 
     def __init__(
@@ -21,127 +46,138 @@ class SQSQueue:
         max_receive_count: int = 3,
         dead_letter_queue: Optional["SQSQueue"] = None,
         db_path: Path = DEFAULT_DB_PATH,
+        backend: Optional[QueueBackend] = None,
+        retention_period: Optional[float] = None,
     ):
         self.name = name
         self.visibility_timeout = visibility_timeout
         self.max_receive_count = max_receive_count
         self.dead_letter_queue = dead_letter_queue
         self.db_path = db_path
-        self._lock = threading.Lock()
-        self._init_db()
-
-    def _init_db(self):
-        """Create tables if they don't exist."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS messages (
-                    id TEXT PRIMARY KEY,
-                    queue_name TEXT NOT NULL,
-                    body TEXT NOT NULL,
-                    receive_count INTEGER DEFAULT 0,
-                    visible_after REAL DEFAULT 0,
-                    created_at REAL DEFAULT (strftime('%s', 'now'))
-                )
-            """
-            )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_queue_visible ON messages (queue_name, visible_after)"
-            )
-
-    def send_message(self, body: str) -> str:
+        self.backend = backend if backend is not None else SQLiteBackend(db_path)
+        self.retention_period = retention_period
+
+    def close(self):
+        """
+        Close the backend's storage handles. The backend is shared by every
+        queue built on it (usually a queue and its DLQ), so this affects
+        all of them: "sqlite" and "segments" close the calling thread's
+        connection, "log" closes every file and must not be used again,
+        "memory" has nothing to release.
+        """
+        self.backend.close()
+
+    def send_message(
+        self, body: str, priority: int = 0, group: Optional[str] = None
+    ) -> str:
         """Add a message to the queue."""
-        msg_id = str(uuid.uuid4())
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "INSERT INTO messages (id, queue_name, body) VALUES (?, ?, ?)",
-                (msg_id, self.name, body),
-            )
-        return msg_id
-
-    def receive_message(self, max_messages: int = 1) -> list[dict]:
-        """Receive messages, marking them invisible."""
-        now = time.time()
-        received = []
-
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-
-            # Get visible messages
-            rows = conn.execute(
-                """
-                SELECT id, body, receive_count 
-                FROM messages 
-                WHERE queue_name = ? AND visible_after <= ?
-                ORDER BY created_at
-                LIMIT ?
-            """,
-                (self.name, now, max_messages),
-            ).fetchall()
-
-            for row in rows:
-                new_receive_count = row["receive_count"] + 1
-                receipt_handle = str(uuid.uuid4())
-                visible_after = now + self.visibility_timeout
-
-                # Check if max retries exceeded
-                if new_receive_count > self.max_receive_count:
-                    # Move to DLQ
-                    if self.dead_letter_queue:
-                        self.dead_letter_queue.send_message(row["body"])
-                        print(f"[SQS:{self.name}] Message {row['id']} moved to DLQ")
-                    conn.execute("DELETE FROM messages WHERE id = ?", (row["id"],))
-                    continue
-
-                # Update visibility and receive count
-                conn.execute(
-                    """
-                    UPDATE messages 
-                    SET visible_after = ?, receive_count = ?
-                    WHERE id = ?
-                """,
-                    (visible_after, new_receive_count, row["id"]),
-                )
-
-                received.append(
-                    {
-                        "MessageId": row["id"],
-                        "Body": row["body"],
-                        "ReceiptHandle": row["id"],  # Use message ID as receipt handle
-                        "ApproximateReceiveCount": new_receive_count,
-                    }
-                )
-
-        return received
+        return self.backend.send(self.name, [body], [priority], [group])[0]
+
+    def send_message_batch(
+        self,
+        bodies: list[str],
+        priorities: Optional[list[int]] = None,
+        groups: Optional[list[Optional[str]]] = None,
+    ) -> list[str]:
+        """
+        Add several messages in one write. priorities and groups, if
+        given, hold one entry per body. Returns their IDs.
+        """
+        return self.backend.send(self.name, bodies, priorities, groups)
+
+    def receive_message(
+        self, max_messages: int = 1, wait_time_seconds: float = 0, raw: bool = False
+    ) -> list[dict]:
+        """
+        Receive messages, marking them invisible.
+
+        With wait_time_seconds > 0 this long-polls like SQS WaitTimeSeconds:
+        it returns as soon as any message is available, or an empty list
+        once the wait time has elapsed.
+
+        With raw=True, Body is the backend's body as stored: a memoryview
+        of UTF-8 bytes for "segments", a str for the other backends.
+        """
+        deadline = time.monotonic() + wait_time_seconds
+
+        while True:
+            received = self._receive(max_messages, raw)
+            remaining = deadline - time.monotonic()
+            if received or remaining <= 0:
+                return received
+            time.sleep(min(LONG_POLL_INTERVAL, remaining))
+
+    def _receive(self, max_messages: int, raw: bool = False) -> list[dict]:
+        """Single receive attempt, no waiting."""
+        dlq = self.dead_letter_queue
+        shared_dlq = dlq is not None and dlq.backend is self.backend
+        claimed, dead_letters = self.backend.claim(
+            self.name,
+            max_messages,
+            time.time(),
+            self.visibility_timeout,
+            self.max_receive_count,
+            dlq.name if shared_dlq else None,
+        )
+
+        if dead_letters and dlq is not None:
+            if not shared_dlq:
+                dlq.send_message_batch([_text(message.body) for message in dead_letters])
+            for message in dead_letters:
+                print(f"[SQS:{self.name}] Message {message.id} moved to DLQ")
+
+        return [
+            {
+                "MessageId": message.id,
+                "Body": message.body if raw else _text(message.body),
+                "ReceiptHandle": message.receipt_handle,
+                "ApproximateReceiveCount": message.receive_count,
+            }
+            for message in claimed
+        ]
 
     def delete_message(self, receipt_handle: str) -> bool:
-        """Delete a message after successful processing."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "DELETE FROM messages WHERE id = ? AND queue_name = ?",
-                (receipt_handle, self.name),
-            )
-            return cursor.rowcount > 0
+        """
+        Delete a message after successful processing.
+        Returns False for a stale handle, i.e. the message has since been
+        received again by someone else.
+        """
+        return bool(self.backend.delete(self.name, [receipt_handle]))
+
+    def delete_message_batch(self, receipt_handles: list[str]) -> dict:
+        """
+        Delete several messages in one write.
+
+        Returns:
+            Dict with "Successful" and "Failed" lists of receipt handles,
+            like SQS DeleteMessageBatch
+        """
+        deleted = self.backend.delete(self.name, receipt_handles)
+        return {
+            "Successful": [h for h in receipt_handles if h in deleted],
+            "Failed": [h for h in receipt_handles if h not in deleted],
+        }
 
     def get_queue_size(self) -> dict:
         """Return queue statistics."""
-        now = time.time()
-        with sqlite3.connect(self.db_path) as conn:
-            visible = conn.execute(
-                "SELECT COUNT(*) FROM messages WHERE queue_name = ? AND visible_after <= ?",
-                (self.name, now),
-            ).fetchone()[0]
-            in_flight = conn.execute(
-                "SELECT COUNT(*) FROM messages WHERE queue_name = ? AND visible_after > ?",
-                (self.name, now),
-            ).fetchone()[0]
+        visible, in_flight = self.backend.counts(self.name, time.time())
         return {
             "visible": visible,
             "in_flight": in_flight,
             "total": visible + in_flight,
         }
 
+    def expire_messages(self, max_messages: int = 1000) -> int:
+        """
+        Delete up to max_messages messages older than the retention period,
+        oldest first. Returns how many were deleted.
+        """
+        if self.retention_period is None:
+            return 0
+        return self.backend.expire(
+            self.name, time.time() - self.retention_period, max_messages
+        )
+
     def purge(self):
         """Clear all messages from the queue."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("DELETE FROM messages WHERE queue_name = ?", (self.name,))
+        self.backend.purge(self.name)
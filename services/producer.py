@@ -1,13 +1,31 @@
 import json
 from datetime import datetime, timezone
 from typing import Optional
-from messageBroker import SNSTopic, SQSQueue, create_dlq
+from messageBroker import (
+    QueueMaintenance,
+    SNSTopic,
+    SQSQueue,
+    create_backend,
+    create_dlq,
+)
 from config import (
     TOPIC_NAME,
     QUEUE_NAME,
     DLQ_NAME,
     VISIBILITY_TIMEOUT,
     MAX_RECEIVE_COUNT,
+    QUEUE_PRIORITY_FIELD,
+    QUEUE_GROUP_FIELD,
+    MESSAGE_ATTRIBUTE_FIELDS,
+    QUEUE_RETENTION_PERIOD,
+    DLQ_RETENTION_PERIOD,
+    MAINTENANCE_INTERVAL,
+    MAINTENANCE_BATCH_SIZE,
+    MAINTENANCE_MAX_BATCHES,
+    MAINTENANCE_VACUUM_PAGES,
+    QUEUE_BACKEND,
+    QUEUE_DB_PATH,
+    QUEUE_LOG_DIR,
 )
 
 
@@ -29,20 +47,42 @@ class ThreatEventProducer:
         if self._initialized:
             return
 
-        self.dlq = create_dlq(DLQ_NAME)
+        self.backend = create_backend(
+            QUEUE_BACKEND, QUEUE_LOG_DIR if QUEUE_BACKEND == "log" else QUEUE_DB_PATH
+        )
+        self.dlq = create_dlq(
+            DLQ_NAME,
+            db_path=QUEUE_DB_PATH,
+            backend=self.backend,
+            retention_period=DLQ_RETENTION_PERIOD,
+        )
 
         self.queue = SQSQueue(
             name=QUEUE_NAME,
             visibility_timeout=VISIBILITY_TIMEOUT,
             max_receive_count=MAX_RECEIVE_COUNT,
             dead_letter_queue=self.dlq,
+            db_path=QUEUE_DB_PATH,
+            backend=self.backend,
+            retention_period=QUEUE_RETENTION_PERIOD,
+        )
+        # Not started here: the long-running process decides (see
+        # run_consumer.py and ConsumerPool)
+        self.maintenance = QueueMaintenance(
+            [self.queue, self.dlq],
+            interval=MAINTENANCE_INTERVAL,
+            batch_size=MAINTENANCE_BATCH_SIZE,
+            max_batches=MAINTENANCE_MAX_BATCHES,
+            vacuum_pages=MAINTENANCE_VACUUM_PAGES,
         )
 
         self.topic = SNSTopic(TOPIC_NAME)
         self.topic.subscribe(self.queue)
 
         self._initialized = True
-        print(f"[Producer] Initialized with topic '{TOPIC_NAME}'")
+        print(
+            f"[Producer] Initialized with topic '{TOPIC_NAME}' ({QUEUE_BACKEND} backend)"
+        )
 
     def publish_event(self, event_data: dict) -> str:
         """
@@ -54,20 +94,63 @@ class ThreatEventProducer:
         Returns:
             Message ID
         """
-        if "timestamp" not in event_data:
-            event_data["timestamp"] = datetime.now(timezone.utc).isoformat()
-
-        message = json.dumps(event_data)
-        self.topic.publish(message)
+        message = self._serialize(event_data)
+        self.topic.publish(
+            message, *self._routing(event_data), attributes=self._attributes(event_data)
+        )
         return message
 
     def publish_batch(self, events: list[dict]) -> int:
-        for event in events:
-            self.publish_event(event)
+        """
+        Publish many threat events with one queue write per subscriber.
+
+        Returns:
+            Number of events published
+        """
+        routing = [self._routing(event) for event in events]
+        self.topic.publish_batch(
+            [self._serialize(event) for event in events],
+            [priority for priority, _ in routing],
+            [group for _, group in routing],
+            [self._attributes(event) for event in events],
+        )
         return len(events)
 
+    def _attributes(self, event_data: dict) -> dict:
+        """Message attributes of an event, for subscription filter policies."""
+        return {
+            field: event_data[field]
+            for field in MESSAGE_ATTRIBUTE_FIELDS
+            if event_data.get(field) is not None
+        }
+
+    def _routing(self, event_data: dict) -> tuple[int, Optional[str]]:
+        """Queue priority and message group of an event (see config.py)."""
+        priority = 0
+        if QUEUE_PRIORITY_FIELD:
+            value = event_data.get(QUEUE_PRIORITY_FIELD)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                priority = int(value)
+        group = None
+        if QUEUE_GROUP_FIELD:
+            value = event_data.get(QUEUE_GROUP_FIELD)
+            if value is not None:
+                group = str(value)
+        return priority, group
+
+    def _serialize(self, event_data: dict) -> str:
+        if "timestamp" not in event_data:
+            event_data["timestamp"] = datetime.now(timezone.utc).isoformat()
+        return json.dumps(event_data)
+
+    def get_topic(self) -> SNSTopic:
+        return self.topic
+
     def get_queue(self) -> SQSQueue:
         return self.queue
 
     def get_dlq(self) -> SQSQueue:
         return self.dlq
+
+    def get_maintenance(self) -> QueueMaintenance:
+        return self.maintenance
@@ -0,0 +1,340 @@
+"""
+End-to-end pipeline benchmark: publish -> queue -> consume -> store -> query.
+
+Starts the Django backend on a throwaway database (unless --api-url is
+given), publishes events through ThreatEventProducer at a fixed rate into a
+throwaway queue, consumes them with ThreatEventConsumer threads and samples
+the analytics API while the load runs.
+
+Reports, per stage, count and p50/p95/p99/max latency in milliseconds:
+    publish      producer.publish_batch call, per batch
+    queue_wait   publish -> received by a consumer, per event
+    ingest       bulk POST to the API, per batch
+    end_to_end   publish -> stored and acknowledged, per event
+    query        analytics/list API requests made during the run
+plus throughput and queue depth over time. The full result is written as
+JSON (stdout or --output) so runs can be compared across versions.
+
+Usage:
+    python benchmark_pipeline.py [--events N] [--rate N] [--consumers N]
+                                 [--batch-size N] [--output results.json]
+
+The queue backend follows config.QUEUE_BACKEND (SADTIME_QUEUE_BACKEND).
+
+Examples:
+    python benchmark_pipeline.py --events 20000 --rate 2000 --consumers 4
+    SADTIME_QUEUE_BACKEND=log python benchmark_pipeline.py --events 20000
+    python benchmark_pipeline.py --api-url http://127.0.0.1:8000 --events 5000
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+SERVICES_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = SERVICES_DIR.parent / "backend"
+sys.path.insert(0, str(SERVICES_DIR))
+
+SOURCES = ["malware_feed", "internal_siem", "honeypot", "osint_feed"]
+INDICATOR_TYPES = ["ip", "domain", "url", "hash"]
+QUERY_PATHS = [
+    "/api/analytics/summary/",
+    "/api/analytics/events/timeline/?days=30",
+    "/api/analytics/techniques/top/?limit=10",
+    "/api/analytics/events/recent/?limit=20",
+    "/api/threat/events/?page_size=50",
+]
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def percentiles(samples: list[float]) -> dict:
+    """Nearest-rank percentiles of latencies in seconds, reported in ms."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50": round(rank(50), 3),
+        "p95": round(rank(95), 3),
+        "p99": round(rank(99), 3),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+
+def random_event(run_id: str, seq: int) -> dict:
+    indicator_type = random.choice(INDICATOR_TYPES)
+    indicator = {
+        "ip": lambda: f"10.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}",
+        "domain": lambda: f"host{random.randint(1, 50000)}.bench.example",
+        "url": lambda: f"http://host{random.randint(1, 50000)}.bench.example/payload",
+        "hash": lambda: "%064x" % random.getrandbits(256),
+    }[indicator_type]()
+    return {
+        "indicator": indicator,
+        "indicator_type": indicator_type,
+        "source": random.choice(SOURCES),
+        "related_technique": random.choice(["T1059", "T1566", "T1105", None]),
+        "confidence": random.randint(10, 100),
+        "metadata": {"benchmark_run": run_id, "seq": seq, "sent_at": time.time()},
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_backend(db_path: Path, port: int) -> subprocess.Popen:
+    env = {**os.environ, "SADTIME_DB_PATH": str(db_path)}
+    subprocess.run(
+        [sys.executable, "manage.py", "migrate", "--verbosity", "0"],
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+    )
+    return subprocess.Popen(
+        [sys.executable, "manage.py", "runserver", "--noreload", f"127.0.0.1:{port}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_for_api(session, api_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if session.get(f"{api_url}/api/threat/events/?page_size=1").ok:
+                return
+        except Exception:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"API at {api_url} did not come up within {timeout}s")
+
+
+def run(args, api_url: str) -> dict:
+    # Imported here so SADTIME_API_URL / SADTIME_QUEUE_DB are already set
+    import requests
+    from consumer import ThreatEventConsumer
+    from producer import ThreatEventProducer
+
+    samples = {name: [] for name in ("publish", "queue_wait", "ingest", "end_to_end", "query")}
+    depth = []
+    lock = threading.Lock()
+    acked = 0
+    run_id = uuid.uuid4().hex[:8]
+
+    class TimedConsumer(ThreatEventConsumer):
+        def process_messages_bulk(self, messages):
+            received = time.time()
+            started = time.perf_counter()
+            outcomes = super().process_messages_bulk(messages)
+            elapsed = time.perf_counter() - started
+            stored = time.time()
+
+            sent = []
+            for message in messages:
+                try:
+                    sent.append(json.loads(message["Body"])["metadata"]["sent_at"])
+                except (ValueError, KeyError, TypeError):
+                    sent.append(None)
+
+            nonlocal acked
+            with lock:
+                samples["ingest"].append(elapsed)
+                for sent_at, ok in zip(sent, outcomes):
+                    if sent_at is not None:
+                        samples["queue_wait"].append(received - sent_at)
+                        if ok:
+                            samples["end_to_end"].append(stored - sent_at)
+                acked += len(messages)
+            return outcomes
+
+    producer = ThreatEventProducer()
+    queue = producer.get_queue()
+    consumers = [
+        TimedConsumer(queue, batch_size=args.batch_size, wait_time_seconds=1)
+        for _ in range(args.consumers)
+    ]
+    consumer_threads = [
+        threading.Thread(target=consumer.start, daemon=True) for consumer in consumers
+    ]
+    running = threading.Event()
+    running.set()
+
+    def publish():
+        batch = args.publish_batch
+        interval = batch / args.rate
+        next_at = time.perf_counter()
+        for start in range(0, args.events, batch):
+            events = [
+                random_event(run_id, seq)
+                for seq in range(start, min(start + batch, args.events))
+            ]
+            started = time.perf_counter()
+            producer.publish_batch(events)
+            with lock:
+                samples["publish"].append(time.perf_counter() - started)
+            next_at += interval
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+
+    def sample_depth(started: float):
+        while running.is_set():
+            size = queue.get_queue_size()
+            depth.append(
+                {
+                    "t": round(time.perf_counter() - started, 3),
+                    "visible": size["visible"],
+                    "in_flight": size["in_flight"],
+                }
+            )
+            time.sleep(args.sample_interval)
+
+    def query():
+        session = requests.Session()
+        while running.is_set():
+            path = random.choice(QUERY_PATHS)
+            started = time.perf_counter()
+            response = session.get(f"{api_url}{path}")
+            elapsed = time.perf_counter() - started
+            if response.ok:
+                with lock:
+                    samples["query"].append(elapsed)
+            time.sleep(1 / args.query_rate)
+
+    started = time.perf_counter()
+    for thread in consumer_threads:
+        thread.start()
+    helpers = [
+        threading.Thread(target=sample_depth, args=(started,), daemon=True),
+        threading.Thread(target=query, daemon=True),
+    ]
+    for thread in helpers:
+        thread.start()
+
+    publish_started = time.perf_counter()
+    publisher = threading.Thread(target=publish)
+    publisher.start()
+    publisher.join()
+    publish_elapsed = time.perf_counter() - publish_started
+    log(f"Published {args.events} events in {publish_elapsed:.2f}s")
+
+    deadline = time.monotonic() + args.drain_timeout
+    while time.monotonic() < deadline:
+        with lock:
+            if acked >= args.events:
+                break
+        time.sleep(0.05)
+    total_elapsed = time.perf_counter() - started
+
+    running.clear()
+    for consumer in consumers:
+        consumer.stop()
+    for thread in consumer_threads + helpers:
+        thread.join(timeout=5)
+
+    processed = sum(consumer.processed_count for consumer in consumers)
+    failed = sum(consumer.failed_count for consumer in consumers)
+    return {
+        "run_id": run_id,
+        "config": {
+            "events": args.events,
+            "rate": args.rate,
+            "publish_batch": args.publish_batch,
+            "consumers": args.consumers,
+            "batch_size": args.batch_size,
+            "query_rate": args.query_rate,
+        },
+        "throughput": {
+            "published_per_sec": round(args.events / publish_elapsed, 1),
+            "stored_per_sec": round(processed / total_elapsed, 1),
+            "elapsed_sec": round(total_elapsed, 3),
+            "processed": processed,
+            "failed": failed,
+            "drained": processed + failed >= args.events,
+        },
+        "latency_ms": {name: percentiles(values) for name, values in samples.items()},
+        "queue_depth": depth,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the full event pipeline")
+    parser.add_argument("--events", type=int, default=5000, help="Events to publish")
+    parser.add_argument("--rate", type=float, default=1000, help="Events published per second")
+    parser.add_argument("--publish-batch", type=int, default=50, help="Events per publish_batch call")
+    parser.add_argument("--consumers", type=int, default=2, help="Consumer threads")
+    parser.add_argument("--batch-size", type=int, default=50, help="Messages per receive")
+    parser.add_argument("--query-rate", type=float, default=5, help="API queries per second")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Queue depth sampling period (s)")
+    parser.add_argument("--drain-timeout", type=float, default=300, help="Max wait for the queue to drain (s)")
+    parser.add_argument("--api-url", help="Use a running backend instead of starting one")
+    parser.add_argument("--output", help="Write the JSON result here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SADTIME_QUEUE_DB"] = str(Path(tmp) / "queue.db")
+        os.environ["SADTIME_QUEUE_LOG_DIR"] = str(Path(tmp) / "queue_log")
+        server = None
+        api_url = args.api_url
+        if api_url is None:
+            port = free_port()
+            api_url = f"http://127.0.0.1:{port}"
+            log(f"Starting backend on {api_url}")
+            server = start_backend(Path(tmp) / "db.sqlite3", port)
+        os.environ["SADTIME_API_URL"] = api_url
+
+        import requests
+
+        try:
+            wait_for_api(requests.Session(), api_url)
+            # Producer and consumer log to stdout; keep it for the JSON result
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                result = run(args, api_url)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+    stages = result["latency_ms"]
+    for name, stats in stages.items():
+        if stats["count"]:
+            log(
+                f"{name:>11}: n={stats['count']:<6} p50={stats['p50']:.1f}ms "
+                f"p95={stats['p95']:.1f}ms p99={stats['p99']:.1f}ms"
+            )
+    log(
+        f"Stored {result['throughput']['processed']} events "
+        f"({result['throughput']['stored_per_sec']}/s), "
+        f"{result['throughput']['failed']} failed"
+    )
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
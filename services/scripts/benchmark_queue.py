@@ -0,0 +1,91 @@
+"""
+Measure SQSQueue throughput against a throwaway database.
+
+Usage:
+    python benchmark_queue.py [--messages N] [--batch-size N]
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from messageBroker import SQSQueue
+
+
+def run(messages: int, batch_size: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = SQSQueue(name="benchmark-queue", db_path=Path(tmp) / "queue.db")
+        body = json.dumps(
+            {
+                "indicator": "185.244.25.10",
+                "indicator_type": "ip",
+                "source": "benchmark",
+                "related_technique": "T1059",
+                "confidence": 82,
+            }
+        )
+
+        start = time.perf_counter()
+        for _ in range(messages):
+            queue.send_message(body)
+        send_elapsed = time.perf_counter() - start
+
+        received = 0
+        start = time.perf_counter()
+        while received < messages:
+            batch = queue.receive_message(max_messages=batch_size)
+            if not batch:
+                break
+            for msg in batch:
+                queue.delete_message(msg["ReceiptHandle"])
+            received += len(batch)
+        receive_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(0, messages, batch_size):
+            queue.send_message_batch([body] * min(batch_size, messages - i))
+        batch_send_elapsed = time.perf_counter() - start
+
+        received = 0
+        start = time.perf_counter()
+        while received < messages:
+            batch = queue.receive_message(max_messages=batch_size)
+            if not batch:
+                break
+            queue.delete_message_batch([msg["ReceiptHandle"] for msg in batch])
+            received += len(batch)
+        batch_receive_elapsed = time.perf_counter() - start
+
+    return {
+        "messages": messages,
+        "batch_size": batch_size,
+        "sends_per_sec": round(messages / send_elapsed),
+        "receives_per_sec": round(received / receive_elapsed),
+        "batch_sends_per_sec": round(messages / batch_send_elapsed),
+        "batch_receives_per_sec": round(received / batch_receive_elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite-backed queue")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=10)
+    args = parser.parse_args()
+
+    result = run(args.messages, args.batch_size)
+
+    print("=" * 50)
+    print("SQSQueue Benchmark")
+    print("=" * 50)
+    for key, value in result.items():
+        print(f"{key:>22}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Conformance tests and throughput for every queue backend.
+
+Runs the conformance tests from tests/test_backends.py (ordering,
+visibility timeout, stale receipt handles, DLQ, purge, retention,
+maintenance, priority, message-group fair share, concurrent claims,
+persistence) against the memory, sqlite, log and segments backends, each
+on throwaway storage, then measures send / receive+delete throughput.
+
+Usage:
+    python check_backends.py [--backends memory,sqlite,log,segments] [--messages N]
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from messageBroker import BACKENDS, create_backend
+from tests.test_backends import CONFORMANCE_TESTS, make_queue
+
+
+def throughput(backend, messages: int) -> dict:
+    queue = make_queue(backend, "throughput")
+    queue.visibility_timeout = 30
+    body = json.dumps({"indicator": "185.244.25.10", "indicator_type": "ip", "confidence": 82})
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        queue.send_message(body)
+    single = messages / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, messages, 100):
+        queue.send_message_batch([body] * min(100, messages - i))
+    batch = messages / (time.perf_counter() - start)
+
+    received = 0
+    start = time.perf_counter()
+    while received < 2 * messages:
+        batch_messages = queue.receive_message(max_messages=100)
+        if not batch_messages:
+            break
+        queue.delete_message_batch([m["ReceiptHandle"] for m in batch_messages])
+        received += len(batch_messages)
+    consume = received / (time.perf_counter() - start)
+
+    return {"send": single, "send_batch": batch, "receive_delete": consume}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark queue backends")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated backends")
+    parser.add_argument("--messages", type=int, default=5000, help="Messages for throughput")
+    args = parser.parse_args()
+
+    failed = False
+    runner = unittest.TextTestRunner(stream=sys.stdout, verbosity=2)
+    for kind in args.backends.split(","):
+        print(f"== {kind}")
+        tests = unittest.defaultTestLoader.loadTestsFromTestCase(CONFORMANCE_TESTS[kind])
+        failed |= not runner.run(tests).wasSuccessful()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = create_backend(kind, Path(tmp) / ("log" if kind == "log" else "queue.db"))
+            stats = throughput(backend, args.messages)
+            backend.close()
+        print(
+            f"  send {stats['send']:,.0f}/s, send_batch {stats['send_batch']:,.0f}/s, "
+            f"receive+delete {stats['receive_delete']:,.0f}/s"
+        )
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Checks for SNS subscription filter policies, and what filtering costs.
+
+Verifies each policy rule, malformed-policy errors and filtered fan-out
+from SNSTopic.publish / publish_batch (memory backend), then times a
+compiled policy against json.loads of the body it spares.
+
+Usage:
+    python check_filter_policy.py [--messages N]
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from messageBroker import SNSTopic, SQSQueue, MemoryBackend, compile_filter_policy
+
+EVENT = {
+    "indicator": "44d88612fea8a8f36de82e1278abb02f",
+    "indicator_type": "hash",
+    "source": "sandbox",
+    "related_technique": "T1059.001",
+    "confidence": 85,
+    "tags": ["malware", "loader"],
+}
+
+
+def check_rules():
+    cases = [
+        ({"indicator_type": ["hash"]}, True),
+        ({"indicator_type": ["ip", "domain"]}, False),
+        ({"related_technique": [{"prefix": "T1059"}]}, True),
+        ({"related_technique": [{"prefix": "T1566"}]}, False),
+        ({"related_technique": [{"suffix": ".001"}]}, True),
+        ({"source": [{"anything-but": ["honeypot"]}]}, True),
+        ({"source": [{"anything-but": "sandbox"}]}, False),
+        ({"source": [{"anything-but": {"prefix": "sand"}}]}, False),
+        ({"confidence": [{"numeric": [">=", 80]}]}, True),
+        ({"confidence": [{"numeric": [">", 0, "<=", 50]}]}, False),
+        ({"confidence": [85.0]}, True),
+        ({"tags": ["loader"]}, True),
+        ({"campaign": [{"exists": False}]}, True),
+        ({"campaign": [{"exists": True}]}, False),
+        ({"indicator_type": [{"exists": True}]}, True),
+        ({"campaign": ["x"]}, False),
+        ({"indicator_type": ["hash"], "confidence": [{"numeric": ["<", 50]}]}, False),
+        ({"indicator_type": ["ip", {"prefix": "ha"}], "source": ["sandbox"]}, True),
+    ]
+    for policy, expected in cases:
+        result = compile_filter_policy(policy)(EVENT)
+        assert result is expected, f"{policy} -> {result}"
+    assert compile_filter_policy(None) is None and compile_filter_policy({}) is None
+
+
+def check_invalid_policies():
+    for policy in (
+        {"indicator_type": "hash"},
+        {"indicator_type": []},
+        {"confidence": [{"numeric": ["~", 1]}]},
+        {"confidence": [{"numeric": [">", "1"]}]},
+        {"source": [{"regex": ".*"}]},
+        {"source": [{"prefix": "a", "suffix": "b"}]},
+        {"source": [{"exists": "yes"}]},
+        ["indicator_type"],
+    ):
+        try:
+            compile_filter_policy(policy)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted malformed policy {policy}")
+
+
+def check_fan_out():
+    backend = MemoryBackend()
+    everything = SQSQueue("everything", backend=backend)
+    hashes = SQSQueue("hashes", backend=backend)
+    execution = SQSQueue("execution", backend=backend)
+
+    topic = SNSTopic("filtered")
+    topic.subscribe(everything)
+    topic.subscribe(hashes, {"indicator_type": ["hash"]})
+    topic.subscribe(execution, {"related_technique": [{"prefix": "T1059"}]})
+
+    events = [
+        {"indicator_type": "hash", "related_technique": "T1059.001"},
+        {"indicator_type": "ip", "related_technique": "T1059.003"},
+        {"indicator_type": "hash", "related_technique": "T1566"},
+        {"indicator_type": "domain"},
+    ]
+    bodies = [json.dumps(event) for event in events]
+    assert topic.publish_batch(bodies, attributes=events) == 3
+    assert topic.publish(bodies[3], attributes=events[3]) == 1
+
+    def received(queue):
+        return [json.loads(m["Body"]) for m in queue.receive_message(max_messages=10)]
+
+    assert received(everything) == events + [events[3]]
+    assert received(hashes) == [events[0], events[2]]
+    assert received(execution) == [events[0], events[1]]
+
+    # Re-subscribing replaces the policy; unmatched batches write nothing
+    before = hashes.get_queue_size()["total"]
+    topic.subscribe(hashes, {"indicator_type": ["url"]})
+    assert topic.publish_batch(bodies, attributes=events) == 2
+    assert hashes.get_queue_size()["total"] == before
+
+
+def timing(messages: int) -> dict:
+    matches = compile_filter_policy(
+        {
+            "indicator_type": ["hash", "url"],
+            "related_technique": [{"prefix": "T1059"}],
+            "confidence": [{"numeric": [">=", 80]}],
+        }
+    )
+    body = json.dumps(EVENT)
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        matches(EVENT)
+    policy = (time.perf_counter() - start) / messages
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        json.loads(body)
+    parse = (time.perf_counter() - start) / messages
+    return {"policy_us": policy * 1e6, "json_loads_us": parse * 1e6}
+
+
+CHECKS = [check_rules, check_invalid_policies, check_fan_out]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check SNS filter policies")
+    parser.add_argument("--messages", type=int, default=100000, help="Messages to time")
+    args = parser.parse_args()
+
+    failures = 0
+    for check in CHECKS:
+        try:
+            check()
+            print(f"  ok    {check.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"  FAIL  {check.__name__}: {e}")
+
+    stats = timing(args.messages)
+    print(
+        f"  policy {stats['policy_us']:.2f}us/message, "
+        f"json.loads of the body {stats['json_loads_us']:.2f}us/message"
+    )
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,46 @@
 import random
 import sys
 import os
+import argparse
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from producer import ThreatEventProducer
 
+parser = argparse.ArgumentParser(description="Publish random threat events")
+parser.add_argument("--count", type=int, default=5, help="Number of events")
+parser.add_argument(
+    "--batch-size", type=int, default=1000, help="Events per publish_batch call"
+)
+args = parser.parse_args()
+
 producer = ThreatEventProducer()
 
-for i in range(5):
-    indicator = f"{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}"
-    indicator_type = random.choice(["ip", "domain", "url", "hash"])
+
+# One generator per indicator type, so every value is valid for its type
+INDICATORS = {
+    "ip": lambda: ".".join(str(random.randint(1, 254)) for _ in range(4)),
+    "domain": lambda: f"host{random.randint(1, 50000)}.example.com",
+    "url": lambda: f"http://host{random.randint(1, 50000)}.example.com/payload",
+    "hash": lambda: "%064x" % random.getrandbits(256),
+}
+
+
+def random_event() -> dict:
+    indicator_type = random.choice(list(INDICATORS))
+    indicator = INDICATORS[indicator_type]()
     related_technique = f"T{random.randint(1001, 9999)}"
     confidence = random.randint(50, 100)
 
-    producer.publish_event(
-        {
-            "indicator": indicator,
-            "indicator_type": indicator_type,
-            "source": "test_script",
-            "related_technique": related_technique,
-            "confidence": confidence,
-        }
-    )
+    return {
+        "indicator": indicator,
+        "indicator_type": indicator_type,
+        "source": "test_script",
+        "related_technique": related_technique,
+        "confidence": confidence,
+    }
+
+
+for start in range(0, args.count, args.batch_size):
+    size = min(args.batch_size, args.count - start)
+    producer.publish_batch([random_event() for _ in range(size)])
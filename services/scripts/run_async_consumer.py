@@ -0,0 +1,43 @@
+import sys
+import os
+import signal
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from producer import ThreatEventProducer
+from messageBroker import AsyncSQSQueue
+from async_consumer import AsyncThreatEventConsumer
+
+
+async def main():
+    producer = ThreatEventProducer()
+    queue = AsyncSQSQueue(producer.get_queue())
+    consumer = AsyncThreatEventConsumer(queue)
+    maintenance = producer.get_maintenance()
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, consumer.stop)
+        except NotImplementedError:  # Windows event loops
+            pass
+
+    print("=" * 50)
+    print("SADTIME Async Threat Event Consumer")
+    print("=" * 50)
+    print("Press Ctrl+C to stop\n")
+
+    maintenance.start()
+    try:
+        await consumer.start()
+    finally:
+        maintenance.stop()
+        await queue.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -1,17 +1,43 @@
 import sys
 import os
+import argparse
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from producer import ThreatEventProducer
 from consumer import ThreatEventConsumer
+from consumer_pool import ConsumerPool
+from config import CONSUMER_WORKERS
 
-producer = ThreatEventProducer()
-consumer = ThreatEventConsumer(producer.get_queue())
 
-print("=" * 50)
-print("SADTIME Threat Event Consumer")
-print("=" * 50)
-print("Press Ctrl+C to stop\n")
+def main():
+    parser = argparse.ArgumentParser(description="Run the threat event consumer")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=CONSUMER_WORKERS,
+        help="Number of consumer processes (default: %(default)s)",
+    )
+    args = parser.parse_args()
 
-consumer.start()
+    print("=" * 50)
+    print("SADTIME Threat Event Consumer")
+    print("=" * 50)
+    print("Press Ctrl+C to stop\n")
+
+    if args.workers > 1:
+        ConsumerPool(workers=args.workers).start()
+        return
+
+    producer = ThreatEventProducer()
+    consumer = ThreatEventConsumer(producer.get_queue())
+    maintenance = producer.get_maintenance()
+    maintenance.start()
+    try:
+        consumer.start()
+    finally:
+        maintenance.stop()
+
+
+if __name__ == "__main__":
+    main()
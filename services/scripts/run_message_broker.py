@@ -20,6 +20,7 @@ def main():
         visibility_timeout=10,
         max_receive_count=3,
         dead_letter_queue=dlq,
+        backend=dlq.backend,
     )
 
     topic = SNSTopic("threat-events")
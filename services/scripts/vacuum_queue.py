@@ -0,0 +1,49 @@
+"""
+Convert an existing queue database to auto_vacuum = INCREMENTAL, so
+QueueMaintenance can return the space of deleted messages to the
+filesystem. Files created by the current SQLite backend need no
+conversion.
+
+The conversion is one VACUUM, which rewrites the whole file and holds the
+write lock until it is done: stop producers and consumers first.
+
+Usage:
+    python vacuum_queue.py [--db PATH]
+"""
+
+import sys
+import os
+import argparse
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import QUEUE_DB_PATH
+from messageBroker import SQLiteBackend
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enable incremental vacuum on queue.db")
+    parser.add_argument("--db", type=Path, default=QUEUE_DB_PATH, help="Queue database")
+    args = parser.parse_args()
+
+    backend = SQLiteBackend(args.db)
+    before = backend.storage_bytes()
+    started = time.perf_counter()
+    converted = backend.enable_incremental_vacuum()
+    elapsed = time.perf_counter() - started
+    after = backend.storage_bytes()
+    backend.close()
+
+    if converted:
+        print(
+            f"[Vacuum] Converted {args.db} in {elapsed:.1f}s, "
+            f"{before:,} -> {after:,} bytes"
+        )
+    else:
+        print(f"[Vacuum] {args.db} already uses incremental vacuum")
+
+
+if __name__ == "__main__":
+    main()
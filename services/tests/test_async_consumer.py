@@ -0,0 +1,122 @@
+"""
+Smoke tests for the asyncio consumer: messages go from an AsyncSQSQueue
+through AsyncThreatEventConsumer to a mocked API, and only the accepted
+ones are deleted.
+
+Run from services/:
+    python -m unittest discover tests
+"""
+
+import asyncio
+import json
+import unittest
+
+import httpx
+
+from async_consumer import AsyncThreatEventConsumer
+from messageBroker import AsyncSQSQueue, MemoryBackend, SQSQueue
+
+BULK_URL = "http://api.test/api/threat/events/bulk/"
+EVENTS_URL = "http://api.test/api/threat/events/"
+
+
+def event(indicator: str, indicator_type: str = "ip") -> str:
+    return json.dumps(
+        {
+            "timestamp": "2025-01-01T00:00:00Z",
+            "indicator": indicator,
+            "indicator_type": indicator_type,
+            "source": "smoke",
+        }
+    )
+
+
+class AsyncConsumerSmokeTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.sync_queue = SQSQueue(
+            "async-smoke", visibility_timeout=30, backend=MemoryBackend()
+        )
+        self.queue = AsyncSQSQueue(self.sync_queue)
+        self.posted = []
+
+    async def asyncTearDown(self):
+        await self.queue.close()
+
+    def api(self, request: httpx.Request) -> httpx.Response:
+        """Accepts every event except those for 10.0.0.13."""
+        payload = json.loads(request.content)
+        self.posted.append((str(request.url), payload))
+        if str(request.url) == BULK_URL:
+            results = [
+                {"index": i, "status": "error", "errors": {"raw_indicator": ["bad"]}}
+                if item["raw_indicator"] == "10.0.0.13"
+                else {"index": i, "status": "created", "id": i + 1}
+                for i, item in enumerate(payload)
+            ]
+            return httpx.Response(201, json={"results": results})
+        if payload["raw_indicator"] == "10.0.0.13":
+            return httpx.Response(400, json={"raw_indicator": ["bad"]})
+        return httpx.Response(201, json={"id": 1})
+
+    async def consume(self, use_bulk: bool, expected: int) -> AsyncThreatEventConsumer:
+        consumer = AsyncThreatEventConsumer(
+            self.queue,
+            api_endpoint=EVENTS_URL,
+            bulk_endpoint=BULK_URL,
+            use_bulk=use_bulk,
+            batch_size=3,
+            wait_time_seconds=0.05,
+            poll_interval=0.05,
+            transport=httpx.MockTransport(self.api),
+        )
+        task = asyncio.create_task(consumer.start())
+
+        async def handled():
+            while consumer.processed_count + consumer.failed_count < expected:
+                await asyncio.sleep(0.01)
+
+        try:
+            await asyncio.wait_for(handled(), timeout=5)
+        finally:
+            consumer.stop()
+            await task
+        return consumer
+
+    async def send(self):
+        await self.queue.send_message_batch(
+            [
+                event("10.0.0.1"),
+                event(" EVIL.com. ", "domain"),
+                event("10.0.0.13"),
+                "[1]",  # valid JSON, not an event
+                event("10.0.0.2"),
+            ]
+        )
+
+    async def test_bulk_consumer_deletes_accepted_messages(self):
+        await self.send()
+        consumer = await self.consume(use_bulk=True, expected=5)
+
+        self.assertEqual((consumer.processed_count, consumer.failed_count), (3, 2))
+        self.assertTrue(all(url == BULK_URL for url, _ in self.posted))
+        posted = [item["raw_indicator"] for _, batch in self.posted for item in batch]
+        self.assertEqual(
+            sorted(posted), ["10.0.0.1", "10.0.0.13", "10.0.0.2", "evil.com"]
+        )
+        # The rejected and the malformed message stay for redelivery
+        size = await self.queue.get_queue_size()
+        self.assertEqual(size, {"visible": 0, "in_flight": 2, "total": 2})
+
+    async def test_per_message_consumer_deletes_accepted_messages(self):
+        await self.send()
+        consumer = await self.consume(use_bulk=False, expected=5)
+
+        self.assertEqual((consumer.processed_count, consumer.failed_count), (3, 2))
+        self.assertEqual(len(self.posted), 4)
+        self.assertTrue(all(url == EVENTS_URL for url, _ in self.posted))
+        size = await self.queue.get_queue_size()
+        self.assertEqual(size["total"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
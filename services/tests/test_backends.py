@@ -0,0 +1,468 @@
+"""
+Conformance tests for every queue backend: the same SQSQueue behaviour
+(ordering, visibility timeout, stale receipt handles, DLQ, purge,
+retention, maintenance, priority, message-group fair share, concurrent
+claims, persistence) runs against each one on throwaway storage.
+scripts/check_backends.py runs these classes and adds a throughput run.
+
+Run from services/:
+    python -m unittest discover tests
+"""
+
+import json
+import mmap
+import sqlite3
+import threading
+import time
+import tempfile
+import unittest
+from pathlib import Path
+
+from consumer import build_payload
+from messageBroker import (
+    BACKENDS,
+    MemoryBackend,
+    QueueBackend,
+    QueueMaintenance,
+    SQLiteBackend,
+    SQSQueue,
+    create_backend,
+)
+
+VISIBILITY = 0.2  # seconds, short so re-delivery tests run quickly
+
+
+def make_queue(backend, name="conformance", dlq=None, max_receive_count=3):
+    return SQSQueue(
+        name=name,
+        visibility_timeout=VISIBILITY,
+        max_receive_count=max_receive_count,
+        dead_letter_queue=dlq,
+        backend=backend,
+    )
+
+
+class BackendConformance:
+    """
+    SQSQueue behaviour every backend must provide. Mixed into one TestCase
+    per backend below, each setting `kind`.
+    """
+
+    kind = None
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.backend = self.open_backend("main")
+        self.addCleanup(self.backend.close)
+
+    def storage_path(self, name: str) -> Path:
+        """A log directory or SQLite file of its own under the test's tmp dir."""
+        return self.tmp / name / ("log" if self.kind == "log" else "queue.db")
+
+    def open_backend(self, name: str, **options):
+        path = self.storage_path(name)
+        path.parent.mkdir(exist_ok=True)
+        return create_backend(self.kind, path, **options)
+
+    def bodies(self, messages: list[dict]) -> list[str]:
+        """Message bodies, which SQSQueue returns as str for every backend."""
+        for message in messages:
+            self.assertIsInstance(message["Body"], str)
+        return [message["Body"] for message in messages]
+
+    def test_fifo(self):
+        queue = make_queue(self.backend, "fifo")
+        queue.send_message_batch([f"m{i}" for i in range(10)])
+        queue.send_message("m10")
+        self.assertEqual(
+            self.bodies(queue.receive_message(max_messages=20)),
+            [f"m{i}" for i in range(11)],
+        )
+
+    def test_visibility(self):
+        queue = make_queue(self.backend, "visibility")
+        queue.send_message("a")
+        first = queue.receive_message()
+        self.assertEqual(len(first), 1)
+        self.assertEqual(first[0]["ApproximateReceiveCount"], 1)
+        self.assertEqual(queue.receive_message(), [], "claimed message must be invisible")
+        self.assertEqual(queue.get_queue_size(), {"visible": 0, "in_flight": 1, "total": 1})
+
+        time.sleep(VISIBILITY + 0.05)
+        self.assertEqual(queue.get_queue_size(), {"visible": 1, "in_flight": 0, "total": 1})
+        second = queue.receive_message()
+        self.assertEqual(len(second), 1)
+        self.assertEqual(second[0]["ApproximateReceiveCount"], 2)
+        self.assertFalse(queue.delete_message(first[0]["ReceiptHandle"]), "stale handle deleted")
+        self.assertTrue(queue.delete_message(second[0]["ReceiptHandle"]))
+        self.assertEqual(queue.get_queue_size()["total"], 0)
+
+    def test_delete_batch(self):
+        queue = make_queue(self.backend, "delete-batch")
+        queue.send_message_batch(["a", "b", "c"])
+        handles = [m["ReceiptHandle"] for m in queue.receive_message(max_messages=3)]
+        result = queue.delete_message_batch(handles[:2] + ["bogus"])
+        self.assertEqual(result, {"Successful": handles[:2], "Failed": ["bogus"]})
+        self.assertEqual(queue.get_queue_size()["total"], 1)
+
+    def test_long_poll(self):
+        queue = make_queue(self.backend, "long-poll")
+        timer = threading.Timer(0.1, queue.send_message, args=("late",))
+        timer.start()
+        self.addCleanup(timer.join)
+        started = time.monotonic()
+        received = queue.receive_message(wait_time_seconds=2)
+        self.assertEqual(self.bodies(received), ["late"])
+        self.assertLess(time.monotonic() - started, 1, "long poll did not return early")
+
+    def test_dead_letters(self):
+        dlq = make_queue(self.backend, "dead-letters-dlq", max_receive_count=999)
+        queue = make_queue(self.backend, "dead-letters", dlq=dlq, max_receive_count=2)
+        queue.send_message("poison", priority=5, group="feed")
+        for _ in range(2):
+            self.assertTrue(queue.receive_message())
+            time.sleep(VISIBILITY + 0.05)
+
+        # A shared backend moves dead letters inside the claim, never through
+        # a separate send that a crash could cut off
+        def unreachable(bodies, priorities=None, groups=None):
+            self.fail("dead letter re-sent instead of moved")
+
+        dlq.send_message_batch = unreachable
+        self.assertEqual(queue.receive_message(), [])
+        moved = dlq.receive_message()
+        self.assertEqual(self.bodies(moved), ["poison"])
+        self.assertEqual(moved[0]["ApproximateReceiveCount"], 1)
+        self.assertEqual(queue.get_queue_size()["total"], 0)
+
+    def test_purge(self):
+        queue = make_queue(self.backend, "purge")
+        other = make_queue(self.backend, "purge-other")
+        queue.send_message_batch(["a", "b"])
+        other.send_message("kept")
+        queue.purge()
+        self.assertEqual(queue.get_queue_size()["total"], 0)
+        self.assertEqual(other.get_queue_size()["total"], 1, "purge touched another queue")
+
+    def test_retention(self):
+        queue = make_queue(self.backend, "retention")
+        queue.send_message_batch(["a", "b", "c"])
+        self.assertEqual(queue.expire_messages(), 0, "no retention period, nothing expires")
+
+        queue.retention_period = 3600
+        self.assertEqual(queue.expire_messages(), 0, "expired messages inside the period")
+        # Negative period: everything sent so far is past it
+        queue.retention_period = -10
+        claimed = queue.receive_message()
+        self.assertEqual(queue.expire_messages(max_messages=2), 2, "batch bound ignored")
+        self.assertEqual(queue.expire_messages(), 1)
+        self.assertEqual(queue.get_queue_size()["total"], 0)
+        self.assertFalse(
+            queue.delete_message(claimed[0]["ReceiptHandle"]), "expired yet deletable"
+        )
+
+    def test_maintenance(self):
+        queue = make_queue(self.backend, "maintenance")
+        kept = make_queue(self.backend, "maintenance-kept")
+        queue.retention_period = -10
+        queue.send_message_batch(["x" * 1000] * 250)
+        kept.send_message("kept")
+
+        maintenance = QueueMaintenance([queue, kept], batch_size=100, max_batches=2)
+        first = maintenance.run_once()
+        self.assertEqual(first["expired"], {"maintenance": 200, "maintenance-kept": 0})
+        maintenance.run_once()
+        stats = maintenance.get_stats()
+        self.assertEqual(stats["runs"], 2)
+        self.assertEqual(stats["expired"]["maintenance"], 250)
+        self.assertEqual(stats["queues"]["maintenance"]["total"], 0)
+        self.assertEqual(stats["queues"]["maintenance-kept"]["total"], 1)
+        self.assertGreaterEqual(stats["storage_bytes"], 0)
+        self.assertGreater(stats["last_duration"], 0)
+
+    def test_priority(self):
+        queue = make_queue(self.backend, "priority")
+        queue.send_message_batch(
+            ["low", "high", "mid", "high-2"], priorities=[10, 90, 50, 90]
+        )
+        queue.send_message("default")
+        self.assertEqual(
+            self.bodies(queue.receive_message(max_messages=10)),
+            ["high", "high-2", "mid", "low", "default"],
+        )
+
+    def test_fair_share(self):
+        queue = make_queue(self.backend, "fair-share")
+        # A flood from one group, then a few from two others
+        queue.send_message_batch(
+            [f"noisy-{i}" for i in range(50)], groups=["honeypot"] * 50
+        )
+        queue.send_message_batch(["feed-0", "feed-1"], groups=["feed"] * 2)
+        queue.send_message_batch(
+            ["intel-low", "intel-high"], priorities=[10, 95], groups=["intel"] * 2
+        )
+
+        first = self.bodies(queue.receive_message(max_messages=6))
+        self.assertCountEqual(
+            first, ["noisy-0", "noisy-1", "feed-0", "feed-1", "intel-high", "intel-low"]
+        )
+        self.assertLess(first.index("intel-high"), first.index("intel-low"))
+
+        # Turns carry over between receives: one message per group each time
+        queue.send_message_batch(["feed-2", "feed-3"], groups=["feed"] * 2)
+        seen = [body for _ in range(4) for body in self.bodies(queue.receive_message())]
+        self.assertEqual(sum(body.startswith("feed") for body in seen), 2, seen)
+
+    def test_concurrent_claims(self):
+        queue = make_queue(self.backend, "concurrent")
+        queue.send_message_batch([str(i) for i in range(2000)])
+        seen = []
+        lock = threading.Lock()
+
+        def drain():
+            while True:
+                messages = queue.receive_message(max_messages=25)
+                if not messages:
+                    return
+                with lock:
+                    seen.extend(message["Body"] for message in messages)
+                queue.delete_message_batch([m["ReceiptHandle"] for m in messages])
+
+        threads = [threading.Thread(target=drain) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            sorted(seen, key=int), [str(i) for i in range(2000)], "lost or duplicated"
+        )
+
+    def test_persistence(self):
+        if self.kind == "memory":
+            self.skipTest("nothing persisted")
+        backend = self.open_backend("reopen")
+        queue = make_queue(backend, "persistence")
+        queue.send_message_batch(["acked", "pending"])
+        queue.send_message_batch(
+            ["urgent", "grouped"], priorities=[9, 0], groups=[None, "g"]
+        )
+        acked = queue.receive_message()
+        self.assertEqual(self.bodies(acked), ["urgent"])
+        queue.delete_message(acked[0]["ReceiptHandle"])
+        backend.close()
+
+        reopened = self.open_backend("reopen")
+        self.addCleanup(reopened.close)
+        bodies = self.bodies(
+            make_queue(reopened, "persistence").receive_message(max_messages=10)
+        )
+        # Priority and group survive: groups "" and "g" alternate. Multiprocess
+        # backends also keep the rotation's place, after "" which served "urgent"
+        if reopened.multiprocess:
+            self.assertEqual(bodies, ["grouped", "acked", "pending"])
+        else:
+            self.assertEqual(bodies, ["acked", "grouped", "pending"])
+
+    def test_receive_count_survives_restart(self):
+        if self.kind == "memory":
+            self.skipTest("nothing persisted")
+
+        def consumer_process():
+            backend = self.open_backend("crash")
+            dlq = make_queue(backend, "crash-dlq")
+            return backend, make_queue(backend, "crash", dlq=dlq, max_receive_count=2)
+
+        # A message that takes its consumer down with it, once per process
+        backend, queue = consumer_process()
+        queue.send_message("poison")
+        for expected in (1, 2):
+            received = queue.receive_message()
+            self.assertEqual(received[0]["ApproximateReceiveCount"], expected)
+            backend.close()
+            time.sleep(VISIBILITY + 0.05)
+            backend, queue = consumer_process()
+
+        self.addCleanup(backend.close)
+        self.assertEqual(queue.receive_message(), [])
+        self.assertEqual(self.bodies(queue.dead_letter_queue.receive_message()), ["poison"])
+
+class MemoryConformanceTests(BackendConformance, unittest.TestCase):
+    kind = "memory"
+
+
+class SQLiteConformanceTests(BackendConformance, unittest.TestCase):
+    kind = "sqlite"
+
+
+class LogConformanceTests(BackendConformance, unittest.TestCase):
+    kind = "log"
+
+    def test_segment_drop(self):
+        """A log segment fully deleted while it was active goes at rollover."""
+        backend = self.open_backend("drop", segment_size=1024)
+        self.addCleanup(backend.close)
+        queue = make_queue(backend, "log-drop")
+        queue.send_message_batch(["x" * 100] * 20)  # one batch, one segment
+        while messages := queue.receive_message(max_messages=50):
+            queue.delete_message_batch([m["ReceiptHandle"] for m in messages])
+        queue.send_message("next")  # rolls over to a new segment
+
+        segments = [
+            p for p in (backend.directory / "log-drop").glob("*.log") if p.stem.isdigit()
+        ]
+        self.assertEqual(len(segments), 1, segments)
+        self.assertEqual(self.bodies(queue.receive_message()), ["next"])
+
+
+class SegmentsConformanceTests(BackendConformance, unittest.TestCase):
+    kind = "segments"
+
+    def test_segment_drop(self):
+        """Fully deleted segments are removed; the one being appended to stays."""
+        backend = self.open_backend("drop", segment_size=4096)
+        self.addCleanup(backend.close)
+        queue = make_queue(backend, "segment-drop")
+        queue.send_message_batch(["x" * 100] * 200)  # ~5 segments
+        self.assertGreaterEqual(backend.segment_count(), 5)
+
+        while messages := queue.receive_message(max_messages=50):
+            queue.delete_message_batch([m["ReceiptHandle"] for m in messages])
+        files = list(backend.store.directory.glob("*.seg"))
+        self.assertEqual(backend.segment_count(), 1)
+        self.assertEqual(len(files), 1, files)
+
+
+# The conformance tests of each backend, by name
+CONFORMANCE_TESTS = {
+    test_case.kind: test_case
+    for test_case in (
+        MemoryConformanceTests,
+        SQLiteConformanceTests,
+        LogConformanceTests,
+        SegmentsConformanceTests,
+    )
+}
+
+
+class BackendInterfaceTests(unittest.TestCase):
+    def test_every_backend_has_conformance_tests(self):
+        self.assertEqual(set(CONFORMANCE_TESTS), set(BACKENDS))
+
+    def test_backend_must_implement_interface(self):
+        class Partial(QueueBackend):
+            def send(self, queue_name, bodies, priorities=None, groups=None):
+                return []
+
+        with self.assertRaises(TypeError):
+            Partial()
+
+
+class SegmentsBodyTests(unittest.TestCase):
+    """
+    The segments backend reads bodies as views of its mapped files; callers
+    get str unless they ask for the view.
+    """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.backend = create_backend("segments", Path(tmp.name) / "queue.db")
+        self.addCleanup(self.backend.close)
+
+    def test_body_is_json_text(self):
+        queue = SQSQueue("events", backend=self.backend)
+        queue.send_message(json.dumps({"indicator": "EVIL.com", "indicator_type": "domain"}))
+        message = queue.receive_message()[0]
+        self.assertIsInstance(message["Body"], str)
+        self.assertEqual(build_payload(message)["raw_indicator"], "evil.com")
+
+    def test_raw_body_is_a_view_of_the_segment(self):
+        queue = SQSQueue("events", backend=self.backend)
+        queue.send_message("café")
+        body = queue.receive_message(raw=True)[0]["Body"]
+        self.assertIsInstance(body, memoryview)
+        self.assertIsInstance(body.obj, mmap.mmap)
+        self.assertEqual(bytes(body), "café".encode("utf-8"))
+
+    def test_dead_letter_to_another_backend(self):
+        dlq = SQSQueue("events-dlq", backend=MemoryBackend())
+        queue = SQSQueue(
+            "events",
+            visibility_timeout=0,
+            max_receive_count=1,
+            dead_letter_queue=dlq,
+            backend=self.backend,
+        )
+        queue.send_message("poison")
+        self.assertTrue(queue.receive_message())
+        time.sleep(0.01)
+        self.assertEqual(queue.receive_message(), [])
+        self.assertEqual([m["Body"] for m in dlq.receive_message()], ["poison"])
+
+
+class SharedGroupRotationTests(unittest.TestCase):
+    """Processes on one database continue a single group rotation."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "queue.db"
+
+    def test_rotation_is_shared(self):
+        for kind in ("sqlite", "segments"):
+            with self.subTest(backend=kind):
+                # One backend instance per consumer process
+                consumers = [
+                    SQSQueue(f"rotation-{kind}", backend=create_backend(kind, self.path))
+                    for _ in range(3)
+                ]
+                for consumer in consumers:
+                    self.addCleanup(consumer.close)
+                consumers[0].send_message_batch(
+                    [f"{group}-{i}" for group in "abc" for i in range(2)],
+                    groups=[group for group in "abc" for _ in range(2)],
+                )
+
+                served = [
+                    consumer.receive_message()[0]["Body"]
+                    for _ in range(2)
+                    for consumer in consumers
+                ]
+                self.assertEqual(served, ["a-0", "b-0", "c-0", "a-1", "b-1", "c-1"])
+
+
+class SQLiteVacuumTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "queue.db"
+
+    def test_new_file_is_incremental(self):
+        backend = SQLiteBackend(self.path)
+        self.addCleanup(backend.close)
+        self.assertTrue(backend.incremental_vacuum_enabled())
+        self.assertFalse(backend.enable_incremental_vacuum())
+
+    def test_existing_file_converted_on_request_only(self):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE legacy (x BLOB)")
+            conn.executemany("INSERT INTO legacy VALUES (?)", [(b"x" * 4000,)] * 100)
+        backend = SQLiteBackend(self.path)
+        self.addCleanup(backend.close)
+        self.assertFalse(backend.incremental_vacuum_enabled())
+
+        backend._connect().execute("DELETE FROM legacy")
+        self.assertEqual(backend.reclaim(1000), 0)
+        self.assertTrue(backend.enable_incremental_vacuum())
+        self.assertTrue(backend.incremental_vacuum_enabled())
+
+        queue = SQSQueue("vacuum", backend=backend)
+        queue.send_message_batch(["x" * 4000] * 100)
+        queue.purge()
+        self.assertGreater(backend.reclaim(1000), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+services/normalize.py and backend/threat_models/normalize.py must agree:
+the consumer normalizes before posting and the API normalizes again at
+ingest, and both key indicators with indicator_key(). Both run against
+the case table in backend/threat_models/normalize_cases.json, which the
+backend tests use too; add cases there, not here.
+
+Run from services/:
+    python -m unittest discover tests
+"""
+
+import importlib.util
+import json
+import unittest
+from pathlib import Path
+
+import normalize
+
+BACKEND_APP = Path(__file__).resolve().parents[2] / "backend" / "threat_models"
+BACKEND_NORMALIZE = BACKEND_APP / "normalize.py"
+CASES = BACKEND_APP / "normalize_cases.json"
+
+
+class NormalizeParityTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        spec = importlib.util.spec_from_file_location(
+            "backend_normalize", BACKEND_NORMALIZE
+        )
+        cls.backend = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(cls.backend)
+        cls.cases = json.loads(CASES.read_text(encoding="utf-8"))
+
+    def test_case_table(self):
+        for module in (normalize, self.backend):
+            for case in self.cases:
+                with self.subTest(module=module.__name__, **case):
+                    if case["canonical"] is None:
+                        with self.assertRaises(ValueError):
+                            module.normalize_indicator(case["value"], case["type"])
+                        continue
+                    self.assertEqual(
+                        module.normalize_indicator(case["value"], case["type"]),
+                        case["canonical"],
+                    )
+                    self.assertEqual(
+                        module.indicator_key(case["canonical"]),
+                        self.backend.indicator_key(case["canonical"]),
+                    )
+
+    def test_same_tables(self):
+        self.assertEqual(normalize.HASH_LENGTHS, self.backend.HASH_LENGTHS)
+        self.assertEqual(normalize.DEFAULT_PORTS, self.backend.DEFAULT_PORTS)
+        self.assertEqual(set(normalize.NORMALIZERS), set(self.backend.NORMALIZERS))
+
+
+if __name__ == "__main__":
+    unittest.main()